@@ -10,6 +10,9 @@ import json
 import subprocess
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / "tools"))
+from parse_markdown import MarkdownParser
+
 # Mapas de regiões
 REGIOES_ZONAS = {
     # Zona Sul
@@ -216,32 +219,6 @@ def processar_dados(config: dict):
     print("🔍 PROCESSANDO DADOS")
     print("="*60 + "\n")
 
-    # Consolidar JSONs
-    print("📊 Consolidando anúncios...")
-
-    script = f"""
-import json
-from pathlib import Path
-
-all_listings = []
-unique_links = set()
-
-for json_file in Path('data/processed').glob('temp_*/listings.json'):
-    with open(json_file) as f:
-        listings = json.load(f)
-        for listing in listings:
-            if listing['link'] not in unique_links:
-                all_listings.append(listing)
-                unique_links.add(listing['link'])
-
-print(f'✅ Total: {{len(all_listings)}} anúncios únicos')
-
-with open('data/processed/listings.json', 'w') as f:
-    json.dump(all_listings, f, indent=2, ensure_ascii=False)
-"""
-
-    subprocess.run(["python3", "-c", script], check=True)
-
     # Gerar Excel com parâmetros estruturados
     print("\n📈 Gerando relatório Excel...\n")
     subprocess.run([
@@ -284,19 +261,17 @@ def main():
     # Executar
     executar_crawl(config)
 
-    # Processar primeiro arquivo para teste
+    # Parse paralelo de todas as páginas, no mesmo processo
+    # (merge + filtro + deduplicação → data/processed/listings.json)
     print("\n📄 Processando páginas...")
-    for md_file in Path("data/raw").glob("page_*.md"):
-        output_dir = Path(f"data/processed/temp_{md_file.stem}")
-        subprocess.run([
-            "python3", "tools/parse_markdown.py",
-            "--input", str(md_file),
-            "--min-area", str(config['min_area']),
-            "--max-area", str(config['max_area']),
-            "--output-dir", str(output_dir)
-        ], capture_output=True)
-
-    # Consolidar e gerar Excel
+    md_parser = MarkdownParser(output_dir="data/processed")
+    md_parser.parse_files(
+        sorted(Path("data/raw").glob("page_*.md")),
+        min_area=config['min_area'],
+        max_area=config['max_area']
+    )
+
+    # Gerar Excel
     processar_dados(config)
 
     # Detectar pasta criada
@@ -310,6 +285,8 @@ def main():
     print(f"\n📁 Pasta criada: reports/{folder_name}/")
     print(f"   📊 relatorio.xlsx")
     print(f"   🗺️  mapa.html")
+    print(f"   📦 markers.js, marker_details.js (dados dos pins)")
+    print(f"   🧩 clusters.js (grupos do mapa por zoom)")
     print("\n💡 Para abrir:")
     print(f"   open reports/{folder_name}/relatorio.xlsx")
     print(f"   open reports/{folder_name}/mapa.html")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Testes do crawl concorrente do VivaReal contra um servidor HTTP local.
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent / "tools"))
+from crawl_vivareal import VivaRealCrawler
+from http_client import ResilientHTTPClient
+from listing_ids import STOP_NO_NEW_LISTINGS
+
+LAST_PAGE = 3
+RPS = 5.0
+CONCURRENCY = 4
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    """Páginas 1..LAST_PAGE com anúncios próprios; depois repete a última."""
+
+    requests_at = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.requests_at.append(time.monotonic())
+        query = parse_qs(urlsplit(self.path).query)
+        page = min(int(query.get("pagina", ["1"])[0]), LAST_PAGE)
+        body = "".join(
+            f'<a href="/imovel/apartamento-2-quartos-venda-id-{page * 100 + i}/">x</a>'
+            for i in range(3)
+        ).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_concurrent_crawl_order_stop_reason_and_rate(tmp_path):
+    SearchHandler.requests_at = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SearchHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        crawler = VivaRealCrawler(
+            output_dir=str(tmp_path),
+            base_url=f"http://127.0.0.1:{server.server_port}",
+            http_client=ResilientHTTPClient(max_retries=0)
+        )
+        saved = crawler.crawl("freguesia-do-o", 40, 45, max_pages=8,
+                              concurrency=CONCURRENCY, rps=RPS)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Páginas salvas na ordem da paginação, parando na primeira repetida
+    assert [path.name for path in saved] == [f"page_{n:03d}.html" for n in range(1, LAST_PAGE + 1)]
+    assert crawler.last_metadata["stop_reason"] == STOP_NO_NEW_LISTINGS
+    assert crawler.last_metadata["unique_listings"] == LAST_PAGE * 3
+    # Limitador do crawl não fica preso à instância
+    assert crawler.rate_limiter is None
+
+    # Teto do token bucket: burst de CONCURRENCY e depois RPS por segundo
+    times = sorted(SearchHandler.requests_at)
+    assert len(times) > LAST_PAGE
+    for i in range(len(times)):
+        for j in range(i + 1, len(times)):
+            assert j - i + 1 <= CONCURRENCY + RPS * (times[j] - times[i]) + 0.5
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Testes da deduplicação de quase duplicados (tools/dedup.py)
+"""
+
+import sys
+from pathlib import Path
+
+# Adicionar tools ao path
+sys.path.insert(0, str(Path(__file__).parent / "tools"))
+
+from dedup import NearDuplicateDetector
+
+SLUG = ("https://www.vivareal.com.br/imovel/"
+        "apartamento-2-quartos-vila-santa-delfina-zona-norte-sao-paulo-com-garagem-{area}m2-venda-RS{price}-id-{id}/")
+
+
+def listing(listing_id, price, area, **fields):
+    return {"link": SLUG.format(area=area, price=price, id=listing_id), "price": price,
+            "area": area, "price_per_sqm": round(price / area), "region": "vila-santa-delfina", **fields}
+
+
+def test_same_building_different_units_are_kept():
+    """Só link/região (Markdown): IDs diferentes não são unidos pelo slug."""
+    listings = [listing(1, 400000, 67), listing(2, 410000, 67), listing(3, 420000, 68)]
+
+    canonical, report = NearDuplicateDetector().dedupe(listings)
+
+    assert len(canonical) == 3
+    assert report == []
+
+
+def test_same_building_different_titles_are_kept():
+    listings = [
+        listing(1, 400000, 67, title="Apartamento 2 quartos, 5º andar", street="Rua Itaúna"),
+        listing(2, 405000, 67, title="Apartamento 2 quartos, 12º andar", street="Rua Itaúna"),
+    ]
+
+    canonical, report = NearDuplicateDetector().dedupe(listings)
+
+    assert len(canonical) == 2
+    assert report == []
+
+
+def test_same_unit_with_matching_text_is_merged():
+    listings = [
+        listing(1, 400000, 67, title="Apartamento 2 quartos com varanda", street="Rua Itaúna", street_number="120"),
+        listing(2, 404000, 67, title="Apartamento 2 quartos com varanda", street="Rua Itauna", street_number="120"),
+    ]
+
+    canonical, report = NearDuplicateDetector().dedupe(listings)
+
+    assert len(canonical) == 1
+    assert report[0]["size"] == 2
+    assert report[0]["dropped"] == [l["link"] for l in listings if l["link"] != report[0]["canonical"]]
+
+
+def test_no_transitive_chaining():
+    """A~B e B~C dentro de 3%, mas A e C longe: nunca os três juntos."""
+    fields = {"title": "Apartamento 2 quartos com varanda", "street": "Rua Itaúna", "street_number": "120"}
+    listings = [listing(1, 400000, 67, **fields), listing(2, 411000, 67, **fields),
+                listing(3, 422000, 67, **fields)]
+
+    detector = NearDuplicateDetector()
+    for members in detector.clusters(listings):
+        keep = detector.canonical_index(listings, members)
+        for i in members:
+            price_a, price_b = sorted((listings[i]["price"], listings[keep]["price"]))
+            assert price_b <= price_a * (1 + detector.price_tolerance)
+    assert len(detector.clusters(listings)) == 2
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tool: Benchmark de Parsers
+Compara os backends de parse DOM (bs4 x lxml) sobre um corpus de páginas
+salvas: tempo por página, speedup e se a saída é idêntica página a página.
+"""
+
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict
+
+sys.path.insert(0, str(Path(__file__).parent))
+from parse_listings import PARSER_BACKENDS, create_parser
+
+
+def find_pages(input_dir: Path) -> List[Path]:
+    """Mesmo corpus usado pelo parse_all (inclui shards)."""
+    return (
+        sorted(input_dir.glob("page_*.html")) +
+        sorted(input_dir.glob("shard_*/page_*.html"))
+    )
+
+
+def run_backend(backend: str, pages: List[Path], mode: str, repeat: int) -> Dict:
+    """
+    Parseia o corpus `repeat` vezes e guarda o melhor tempo.
+
+    Returns:
+        {"backend", "seconds", "listings", "results"} (results = última rodada)
+    """
+    parser = create_parser(backend, input_dir=str(pages[0].parent), mode=mode)
+
+    best = None
+    results = []
+    for _ in range(repeat):
+        # Silencia os prints por página para não distorcer a medição
+        with contextlib.redirect_stdout(io.StringIO()):
+            started_at = time.perf_counter()
+            results = [parser.parse_page(page) for page in pages]
+            elapsed = time.perf_counter() - started_at
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {
+        "backend": backend,
+        "seconds": best,
+        "listings": sum(len(r) for r in results),
+        "results": results
+    }
+
+
+def main():
+    """CLI para execução standalone."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de parse (bs4 x lxml)")
+    parser.add_argument("--input", default="data/raw", help="Diretório com page_*.html")
+    parser.add_argument("--repeat", type=int, default=3, help="Rodadas por backend (vale a melhor)")
+    parser.add_argument("--mode", choices=("auto", "dom"), default="dom",
+                        help="dom: mede só o parse HTML (padrão); auto: inclui o atalho JSON")
+
+    args = parser.parse_args()
+
+    pages = find_pages(Path(args.input))
+    if not pages:
+        print(f"❌ Nenhum arquivo HTML encontrado em {args.input}")
+        sys.exit(1)
+
+    print(f"\n⏱️  Benchmark de parsers")
+    print(f"   Páginas: {len(pages)}")
+    print(f"   Rodadas: {args.repeat} (melhor tempo)")
+    print(f"   Modo: {args.mode}\n")
+
+    runs = [run_backend(backend, pages, args.mode, max(1, args.repeat)) for backend in PARSER_BACKENDS]
+    baseline = runs[0]
+
+    for run in runs:
+        per_page = run["seconds"] / len(pages) * 1000
+        speedup = baseline["seconds"] / run["seconds"] if run["seconds"] > 0 else float("inf")
+        print(f"   {run['backend']:<5} {run['seconds']:8.3f}s  {per_page:8.2f} ms/página  "
+              f"{run['listings']:6d} anúncios  {speedup:5.2f}x")
+
+    mismatches = []
+    for run in runs[1:]:
+        for page, expected, got in zip(pages, baseline["results"], run["results"]):
+            if expected != got:
+                mismatches.append((run["backend"], page))
+
+    if mismatches:
+        print(f"\n❌ Saída diferente do {baseline['backend']} em {len(mismatches)} página(s):")
+        for backend, page in mismatches[:10]:
+            print(f"   {backend}: {page}")
+        sys.exit(1)
+
+    print(f"\n✅ Saída idêntica em todas as páginas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tool: Crawl Journal
+Journal append-only (JSON Lines) gravado após cada página do crawl,
+permitindo retomar um crawl interrompido (--resume).
+
+Cada linha é um evento:
+    {"event": "start", "resume": false, "ts": ...}
+    {"event": "page", "page_num": 3, "url": ..., "status": "ok",
+     "files": [{"file": ..., "sha256": ...}], "ts": ...}
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+
+
+def file_sha256(path: Path) -> str:
+    """Hash SHA-256 do conteúdo de um arquivo."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CrawlJournal:
+    """Registro durável, página a página, do progresso de um crawl."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _append(self, event: Dict):
+        event["ts"] = datetime.now().isoformat(timespec="seconds")
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def start(self, resume: bool, **config):
+        """Marca o início de uma execução (nova ou retomada)."""
+        self._append({"event": "start", "resume": resume, **config})
+
+    def record_page(self,
+                    page_num: int,
+                    url: str,
+                    status: str,
+                    files: Optional[List[Path]] = None,
+                    error: Optional[str] = None):
+        """Registra o resultado de uma página, com hash de cada arquivo salvo."""
+        event = {
+            "event": "page",
+            "page_num": page_num,
+            "url": url,
+            "status": status,
+            "files": [
+                {"file": str(path), "sha256": file_sha256(path)}
+                for path in (files or [])
+            ]
+        }
+        if error:
+            event["error"] = error
+        self._append(event)
+
+    def load_pages(self) -> Dict[str, Dict]:
+        """
+        Último evento de cada URL desde a última execução não-retomada.
+
+        Uma execução sem --resume começa do zero; execuções com --resume
+        continuam acumulando sobre as anteriores.
+        """
+        if not self.path.exists():
+            return {}
+
+        pages: Dict[str, Dict] = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # Linha truncada (processo morto durante a escrita)
+                    continue
+
+                if event.get("event") == "start" and not event.get("resume"):
+                    pages = {}
+                elif event.get("event") == "page":
+                    pages[event["url"]] = event
+
+        return pages
+
+    def completed_files(self, pages: Dict[str, Dict], url: str) -> Optional[List[Path]]:
+        """
+        Arquivos de uma página já concluída, se ainda íntegros em disco.
+
+        Retorna None se a página falhou, não existe no journal ou algum
+        arquivo sumiu/mudou de conteúdo (nesses casos ela é buscada de novo).
+        """
+        entry = pages.get(url)
+        if not entry or entry.get("status") != STATUS_OK or not entry.get("files"):
+            return None
+
+        paths = []
+        for item in entry["files"]:
+            path = Path(item["file"])
+            if not path.exists() or file_sha256(path) != item["sha256"]:
+                return None
+            paths.append(path)
+
+        return paths
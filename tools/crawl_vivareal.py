@@ -5,35 +5,63 @@ Coleta anúncios de apartamentos do VivaReal com filtros específicos.
 """
 
 import requests
+import sys
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlencode
 
+sys.path.insert(0, str(Path(__file__).parent))
+from http_client import ResilientHTTPClient, get_default_client
+from rate_limit import HostRateLimiter
+from page_store import PageCache
+from listing_ids import (
+    NoveltyTracker,
+    STOP_FETCH_ERROR,
+    STOP_MAX_PAGES,
+    STOP_MIN_COUNT,
+    STOP_NO_NEW_LISTINGS,
+)
+
 class VivaRealCrawler:
-    def __init__(self, output_dir: str = "data/raw"):
-        self.base_url = "https://www.vivareal.com.br"
+    def __init__(self,
+                 output_dir: str = "data/raw",
+                 base_url: str = "https://www.vivareal.com.br",
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 cache: Optional[PageCache] = None,
+                 http_client: Optional[ResilientHTTPClient] = None):
+        # base_url configurável permite apontar para um servidor local em testes
+        self.base_url = base_url.rstrip("/")
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.last_metadata: Optional[Dict] = None
+        # Cliente compartilhado: pool keep-alive, retry/backoff e circuit breaker
+        self.http = http_client or get_default_client()
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
-        })
+        }
 
     def build_search_url(self,
                          region: str,
                          min_area: int,
                          max_area: int,
                          transaction: str = "venda",
-                         property_type: str = "apartamento") -> str:
+                         property_type: str = "apartamento",
+                         min_price: Optional[int] = None,
+                         max_price: Optional[int] = None) -> str:
         """
         Constrói URL de busca do VivaReal.
 
         Exemplo: /venda/sp/sao-paulo/zona-norte/freguesia-do-o/apartamento_residencial/
                  ?tipos=apartamento&areaUtil=40-45
+
+        Faixa de preço (opcional) vira precoMinimo/precoMaximo.
         """
         # Normalizar região para slug
         region_slug = region.lower().replace(" ", "-")
@@ -55,13 +83,25 @@ class VivaRealCrawler:
             "tipos": property_type,
             "areaUtil": f"{min_area}-{max_area}"
         }
+        if min_price is not None:
+            params["precoMinimo"] = min_price
+        if max_price is not None:
+            params["precoMaximo"] = max_price
 
         return self.base_url + path + "?" + urlencode(params)
 
-    def fetch_page(self, url: str, page_num: int = 1) -> Dict:
+    def fetch_page(self,
+                   url: str,
+                   page_num: int = 1,
+                   rate_limiter: Optional[HostRateLimiter] = None) -> Dict:
         """
         Busca uma página de resultados.
         Retorna dict com status, content e metadata.
+
+        `rate_limiter` substitui o limitador da instância nesta chamada.
+
+        Com cache configurado, envia request condicional e, em caso de
+        304 Not Modified, devolve o corpo armazenado em disco.
         """
         try:
             # Adicionar parâmetro de página se necessário
@@ -70,16 +110,60 @@ class VivaRealCrawler:
                 separator = "&" if "?" in url else "?"
                 page_url = f"{url}{separator}pagina={page_num}"
 
+            limiter = rate_limiter or self.rate_limiter
+            if limiter:
+                limiter.acquire(page_url)
+
+            headers = dict(self.headers)
+            if self.cache:
+                headers.update(self.cache.conditional_headers(page_url))
+
             print(f"📡 Fetching: {page_url}")
-            response = self.session.get(page_url, timeout=30)
+            response = self.http.get(page_url, headers=headers, timeout=30)
             response.raise_for_status()
 
+            if response.status_code == 304 and self.cache:
+                entry = self.cache.touch(page_url)
+                content = None
+                if entry:
+                    try:
+                        content = self.cache.read_body(entry)
+                    except OSError:
+                        pass
+
+                if content is not None:
+                    print(f"   ♻️  Não modificada (304), usando cache")
+                    return {
+                        "success": True,
+                        "status_code": 304,
+                        "content": content,
+                        "url": page_url,
+                        "page_num": page_num,
+                        "from_cache": True
+                    }
+
+                # Entrada removida do cache entre o request e a resposta: busca completa
+                print(f"   ⚠️  304 sem corpo no cache, buscando de novo")
+                if limiter:
+                    limiter.acquire(page_url)
+                response = self.http.get(page_url, headers=self.headers, timeout=30)
+                response.raise_for_status()
+
+            if self.cache:
+                self.cache.put(
+                    page_url,
+                    response.text,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified")
+                )
+
             return {
                 "success": True,
                 "status_code": response.status_code,
                 "content": response.text,
                 "url": page_url,
-                "page_num": page_num
+                "page_num": page_num,
+                "from_cache": False
             }
 
         except requests.RequestException as e:
@@ -110,16 +194,31 @@ class VivaRealCrawler:
               min_area: int,
               max_area: int,
               max_pages: int = 10,
-              delay: int = 2) -> List[Path]:
+              delay: int = 2,
+              concurrency: int = 1,
+              rps: Optional[float] = None,
+              min_count: Optional[int] = None,
+              min_price: Optional[int] = None,
+              max_price: Optional[int] = None) -> List[Path]:
         """
         Executa crawl completo.
 
+        A paginação para antes de `max_pages` quando uma página não traz
+        nenhum ID de anúncio novo ou quando `min_count` anúncios únicos
+        foram coletados. O motivo fica em `stop_reason` na metadata.
+
         Args:
             region: Nome da região (ex: "freguesia-do-o")
             min_area: Área mínima em m²
             max_area: Área máxima em m²
             max_pages: Número máximo de páginas para crawl
-            delay: Delay entre requests (segundos)
+            delay: Delay entre requests (segundos), usado no modo sequencial
+            concurrency: Máximo de requests simultâneos (1 = sequencial)
+            rps: Requests por segundo por host no modo concorrente
+                 (padrão: 1/delay)
+            min_count: Parar ao atingir este número de anúncios únicos
+            min_price: Preço mínimo (opcional)
+            max_price: Preço máximo (opcional)
 
         Returns:
             Lista de caminhos dos arquivos salvos
@@ -127,39 +226,52 @@ class VivaRealCrawler:
         print(f"\n🚀 Iniciando crawl VivaReal")
         print(f"   Região: {region}")
         print(f"   Área: {min_area}-{max_area} m²")
-        print(f"   Páginas máximas: {max_pages}\n")
+        print(f"   Páginas máximas: {max_pages}")
+        if concurrency > 1:
+            print(f"   Concorrência: {concurrency}")
+        print()
 
         # Construir URL base
-        base_url = self.build_search_url(region, min_area, max_area)
-
-        saved_files = []
-
-        for page_num in range(1, max_pages + 1):
-            # Fetch página
-            page_data = self.fetch_page(base_url, page_num)
+        base_url = self.build_search_url(
+            region, min_area, max_area, min_price=min_price, max_price=max_price
+        )
 
-            if not page_data.get("success"):
-                print(f"⚠️  Parando crawl na página {page_num}")
-                break
+        tracker = NoveltyTracker(min_count=min_count)
+        started_at = time.monotonic()
 
-            # Salvar
-            filepath = self.save_page(page_data)
-            if filepath:
-                saved_files.append(filepath)
-
-            # Delay para não sobrecarregar servidor
-            if page_num < max_pages:
-                time.sleep(delay)
+        try:
+            if concurrency > 1:
+                saved_files, stop_reason = self._crawl_concurrent(
+                    base_url, max_pages, delay, concurrency, rps, tracker
+                )
+            else:
+                saved_files, stop_reason = self._crawl_sequential(base_url, max_pages, delay, tracker)
+        finally:
+            if self.cache:
+                self.cache.flush()
+
+        elapsed = time.monotonic() - started_at
+        pages_per_second = len(saved_files) / elapsed if elapsed > 0 else 0.0
 
         print(f"\n✅ Crawl concluído! {len(saved_files)} páginas salvas")
+        print(f"   🛑 Motivo da parada: {stop_reason}")
+        print(f"   ⏱️  {elapsed:.1f}s ({pages_per_second:.2f} páginas/s)")
 
         # Salvar metadata
         metadata = {
             "region": region,
             "min_area": min_area,
             "max_area": max_area,
+            "min_price": min_price,
+            "max_price": max_price,
             "pages_crawled": len(saved_files),
+            "unique_listings": len(tracker.seen),
+            "listing_ids": sorted(tracker.seen),
+            "stop_reason": stop_reason,
             "base_url": base_url,
+            "concurrency": concurrency,
+            "elapsed_seconds": round(elapsed, 3),
+            "pages_per_second": round(pages_per_second, 3),
             "files": [str(f) for f in saved_files]
         }
 
@@ -169,8 +281,101 @@ class VivaRealCrawler:
 
         print(f"📋 Metadata: {metadata_path}")
 
+        self.last_metadata = metadata
+
         return saved_files
 
+    def _handle_page(self,
+                     page_data: Dict,
+                     tracker: NoveltyTracker,
+                     saved_files: List[Path]) -> Optional[str]:
+        """
+        Processa uma página buscada, na ordem da paginação.
+
+        Returns:
+            Motivo de parada, ou None para continuar
+        """
+        page_num = page_data['page_num']
+
+        if not page_data.get("success"):
+            print(f"⚠️  Parando crawl na página {page_num}")
+            return STOP_FETCH_ERROR
+
+        stop_reason = tracker.observe(page_data['content'])
+
+        # Página repetida/vazia não é salva
+        if stop_reason == STOP_NO_NEW_LISTINGS:
+            print(f"⏹️  Página {page_num} sem anúncios novos, parando")
+            return stop_reason
+
+        filepath = self.save_page(page_data)
+        if filepath:
+            saved_files.append(filepath)
+
+        if stop_reason == STOP_MIN_COUNT:
+            print(f"⏹️  Meta de {tracker.min_count} anúncios atingida na página {page_num}")
+
+        return stop_reason
+
+    def _crawl_sequential(self,
+                          base_url: str,
+                          max_pages: int,
+                          delay: int,
+                          tracker: NoveltyTracker) -> Tuple[List[Path], str]:
+        """Busca páginas uma a uma, com delay fixo entre requests."""
+        saved_files = []
+
+        for page_num in range(1, max_pages + 1):
+            # Fetch página
+            page_data = self.fetch_page(base_url, page_num)
+
+            stop_reason = self._handle_page(page_data, tracker, saved_files)
+            if stop_reason:
+                return saved_files, stop_reason
+
+            # Delay para não sobrecarregar servidor
+            if page_num < max_pages:
+                time.sleep(delay)
+
+        return saved_files, STOP_MAX_PAGES
+
+    def _crawl_concurrent(self,
+                          base_url: str,
+                          max_pages: int,
+                          delay: int,
+                          concurrency: int,
+                          rps: Optional[float],
+                          tracker: NoveltyTracker) -> Tuple[List[Path], str]:
+        """
+        Busca páginas em paralelo (thread pool limitado a `concurrency`),
+        respeitando um token bucket de `rps` requests/s por host.
+
+        Os resultados são processados na ordem das páginas; ao primeiro
+        motivo de parada as páginas ainda não iniciadas são canceladas.
+        """
+        # Limitador local: cada crawl usa o próprio rps/concurrency
+        limiter = self.rate_limiter or HostRateLimiter(
+            rps if rps else 1.0 / max(delay, 1), capacity=concurrency
+        )
+
+        saved_files = []
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(self.fetch_page, base_url, page_num, limiter)
+                for page_num in range(1, max_pages + 1)
+            ]
+
+            for page_num, future in enumerate(futures, 1):
+                stop_reason = self._handle_page(future.result(), tracker, saved_files)
+                if stop_reason:
+                    # Cancelar páginas que ainda não começaram
+                    for pending in futures[page_num:]:
+                        pending.cancel()
+                    return saved_files, stop_reason
+
+        return saved_files, STOP_MAX_PAGES
+
 
 def main():
     """CLI para execução standalone."""
@@ -182,17 +387,28 @@ def main():
     parser.add_argument("--max-area", type=int, default=45, help="Área máxima (m²)")
     parser.add_argument("--max-pages", type=int, default=10, help="Máximo de páginas")
     parser.add_argument("--delay", type=int, default=2, help="Delay entre requests (s)")
+    parser.add_argument("--min-count", type=int, help="Parar ao coletar N anúncios únicos")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests simultâneos (1 = sequencial)")
+    parser.add_argument("--rps", type=float, help="Requests/s por host no modo concorrente")
+    parser.add_argument("--base-url", default="https://www.vivareal.com.br", help="URL base do portal")
     parser.add_argument("--output", default="data/raw", help="Diretório de saída")
+    parser.add_argument("--cache-dir", default="data/cache/pages", help="Cache de páginas brutas")
+    parser.add_argument("--no-cache", action="store_true", help="Desativar cache/revalidação condicional")
 
     args = parser.parse_args()
 
-    crawler = VivaRealCrawler(output_dir=args.output)
+    cache = None if args.no_cache else PageCache(args.cache_dir)
+
+    crawler = VivaRealCrawler(output_dir=args.output, base_url=args.base_url, cache=cache)
     crawler.crawl(
         region=args.region,
         min_area=args.min_area,
         max_area=args.max_area,
         max_pages=args.max_pages,
-        delay=args.delay
+        delay=args.delay,
+        concurrency=args.concurrency,
+        rps=args.rps,
+        min_count=args.min_count
     )
 
 
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Tool: Near-Duplicate Detector
+Detecta o mesmo imóvel anunciado várias vezes (corretores diferentes,
+preço/área ligeiramente diferentes) com MinHash + LSH:
+
+1. Shingles do texto do anúncio (slug da URL, título, rua, bairro), sem
+   os números de preço/área, que são comparados com tolerância
+2. Assinatura MinHash (numpy) e LSH por bandas: só anúncios que caem no
+   mesmo bucket em alguma banda viram candidatos (sub-quadrático)
+3. Candidatos filtrados por tolerâncias de preço/área e confirmados
+   pelo Jaccard estimado nas assinaturas (tudo vetorizado)
+4. Anúncios com IDs diferentes só são unidos se houver texto que os
+   distinga de outra unidade do mesmo prédio (título, rua ou número
+   iguais); o slug da URL sozinho é genérico demais
+5. Clusters em estrela: cada membro foi comparado diretamente com o
+   anúncio canônico (sem encadear A~B~C), que é mantido; os removidos
+   vão para duplicate_clusters.json
+"""
+
+import json
+import re
+import unicodedata
+import zlib
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from listing_ids import listing_id_from_url
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Tokens numéricos do slug comparados à parte: preço (RS699000) e área (67m2)
+NUMERIC_TOKEN_RE = re.compile(r'^(?:rs\d+|\d+(?:[.,]\d+)?m[²2])$')
+ID_SUFFIX_RE = re.compile(r'-id-\d+$')
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+TEXT_FIELDS = ("title", "street", "street_number", "neighborhood", "region")
+# Campos que diferenciam um anúncio de outra unidade do mesmo prédio
+EVIDENCE_FIELDS = ("title", "street", "street_number")
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def listing_tokens(listing: Dict) -> List[str]:
+    """Palavras do slug da URL e dos campos de texto, sem preço/área."""
+    tokens = []
+
+    link = listing.get("link") or ""
+    path = link.split("?", 1)[0].split("#", 1)[0].rstrip("/")
+    if "/imovel/" in path:
+        slug = ID_SUFFIX_RE.sub("", path.rsplit("/", 1)[-1].lower())
+        tokens.extend(t for t in slug.split("-") if t and not NUMERIC_TOKEN_RE.match(t))
+
+    for field in TEXT_FIELDS:
+        value = listing.get(field)
+        if value:
+            tokens.extend(TOKEN_RE.findall(_normalize(str(value))))
+
+    return tokens
+
+
+def listing_shingles(listing: Dict, k: int = 2) -> Set[str]:
+    """Shingles de k palavras (conjunto de palavras se houver menos de k)."""
+    tokens = listing_tokens(listing)
+    if len(tokens) < k:
+        return set(tokens)
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+class NearDuplicateDetector:
+    """MinHash/LSH + tolerâncias numéricas para anúncios quase duplicados."""
+
+    def __init__(self,
+                 num_perm: int = 128,
+                 bands: int = 16,
+                 threshold: float = 0.8,
+                 price_tolerance: float = 0.03,
+                 area_tolerance: float = 0.02,
+                 min_area_delta: float = 1.0,
+                 chunk_size: int = 5000,
+                 seed: int = 1):
+        """
+        Args:
+            num_perm: Permutações do MinHash (tamanho da assinatura)
+            bands: Bandas do LSH (num_perm deve ser múltiplo)
+            threshold: Jaccard mínimo entre os shingles
+            price_tolerance: Diferença relativa máxima de preço
+            area_tolerance: Diferença relativa máxima de área
+            min_area_delta: Diferença absoluta de área sempre aceita (m²)
+            chunk_size: Anúncios por lote no cálculo das assinaturas
+            seed: Semente das permutações (resultado determinístico)
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) deve ser múltiplo de bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.price_tolerance = price_tolerance
+        self.area_tolerance = area_tolerance
+        self.min_area_delta = min_area_delta
+        self.chunk_size = chunk_size
+
+        rng = np.random.RandomState(seed)
+        self.perm_a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.perm_b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signatures(self, shingle_sets: List[Set[str]]) -> np.ndarray:
+        """Matriz (anúncios x num_perm) de assinaturas MinHash."""
+        result = np.empty((len(shingle_sets), self.num_perm), dtype=np.uint64)
+
+        for start in range(0, len(shingle_sets), self.chunk_size):
+            chunk = shingle_sets[start:start + self.chunk_size]
+            # Conjunto vazio recebe um shingle único, para não colidir com outros vazios
+            hashed = [
+                [zlib.crc32(s.encode('utf-8')) for s in shingles] or [zlib.crc32(f"#{start + i}".encode())]
+                for i, shingles in enumerate(chunk)
+            ]
+            counts = np.fromiter((len(h) for h in hashed), dtype=np.int64, count=len(hashed))
+            values = np.fromiter((v for h in hashed for v in h), dtype=np.uint64, count=int(counts.sum()))
+            offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+            # (a*x + b) mod p, truncado em 32 bits (overflow de uint64 é intencional)
+            with np.errstate(over='ignore'):
+                permuted = (np.outer(values, self.perm_a) + self.perm_b) % MERSENNE_PRIME & MAX_HASH
+            result[start:start + len(chunk)] = np.minimum.reduceat(permuted, offsets, axis=0)
+
+        return result
+
+    def candidate_pairs(self,
+                        signatures: np.ndarray,
+                        prices: np.ndarray,
+                        areas: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Pares que caem no mesmo bucket em alguma banda e têm preço/área
+        dentro da tolerância, em lotes de arrays (índices i, j).
+
+        Dentro de um bucket os anúncios são ordenados por preço e cada um
+        só é comparado com os vizinhos seguintes até sair da tolerância de
+        preço, então buckets grandes (slugs genéricos como
+        "apartamento-2-quartos-...") não geram todos os pares. Um mesmo par
+        pode aparecer em mais de uma banda.
+        """
+        if len(signatures) < 2:
+            return
+
+        for band in range(self.bands):
+            rows = np.ascontiguousarray(signatures[:, band * self.rows:(band + 1) * self.rows])
+            keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * self.rows))).ravel()
+            _, bucket_ids = np.unique(keys, return_inverse=True)
+            bucket_ids = bucket_ids.ravel()
+
+            order = np.lexsort((prices, bucket_ids))
+            sorted_buckets = bucket_ids[order]
+            sorted_prices = prices[order]
+            sorted_areas = areas[order]
+
+            for offset in range(1, len(order)):
+                same = sorted_buckets[offset:] == sorted_buckets[:-offset]
+                same &= sorted_prices[offset:] <= sorted_prices[:-offset] * (1 + self.price_tolerance)
+                # Ordenado por preço: se nenhum par passa neste deslocamento, nenhum maior passa
+                if not same.any():
+                    break
+
+                area_a, area_b = sorted_areas[:-offset], sorted_areas[offset:]
+                same &= np.abs(area_a - area_b) <= np.maximum(
+                    self.min_area_delta, self.area_tolerance * np.minimum(area_a, area_b))
+
+                hits = np.nonzero(same)[0]
+                if len(hits):
+                    yield order[hits], order[hits + offset]
+
+    def similar_pairs(self,
+                      signatures: np.ndarray,
+                      prices: np.ndarray,
+                      areas: np.ndarray) -> Iterator[Tuple[int, int]]:
+        """Candidatos com Jaccard estimado (fração de MinHashes iguais) >= threshold."""
+        for left, right in self.candidate_pairs(signatures, prices, areas):
+            estimated = (signatures[left] == signatures[right]).mean(axis=1)
+            keep = estimated >= self.threshold
+            yield from zip(left[keep].tolist(), right[keep].tolist())
+
+    @staticmethod
+    def _attributes_match(a: Dict, b: Dict) -> bool:
+        """Atributos estruturados, quando os dois anúncios têm, precisam bater."""
+        for field in ("bedrooms", "bathrooms", "parking_spaces"):
+            if a.get(field) is not None and b.get(field) is not None and a[field] != b[field]:
+                return False
+        return True
+
+    @staticmethod
+    def _has_evidence(a: Dict, b: Dict) -> bool:
+        """
+        Mesmo ID de anúncio, ou algum campo de EVIDENCE_FIELDS presente nos
+        dois e todos os presentes nos dois iguais. Sem isso (ex.: anúncios
+        do Markdown, só com link e região), IDs diferentes não são unidos.
+        """
+        id_a, id_b = listing_id_from_url(a.get("link")), listing_id_from_url(b.get("link"))
+        if id_a and id_a == id_b:
+            return True
+
+        shared = 0
+        for field in EVIDENCE_FIELDS:
+            if a.get(field) and b.get(field):
+                if " ".join(TOKEN_RE.findall(_normalize(str(a[field])))) != \
+                        " ".join(TOKEN_RE.findall(_normalize(str(b[field])))):
+                    return False
+                shared += 1
+        return shared > 0
+
+    @staticmethod
+    def _rank(listings: List[Dict], i: int) -> Tuple:
+        """Ordem de preferência para canônico: mais completo, menor preço, primeiro."""
+        return (-sum(v is not None for v in listings[i].values()), listings[i]["price"], i)
+
+    def clusters(self, listings: List[Dict]) -> List[List[int]]:
+        """
+        Agrupa anúncios quase duplicados.
+
+        Returns:
+            Clusters (índices em `listings`, em ordem), incluindo unitários,
+            ordenados pelo primeiro índice; todo membro é similar ao
+            canônico (canonical_index) do seu cluster
+        """
+        signatures = self.signatures([listing_shingles(listing) for listing in listings])
+        prices = np.array([listing["price"] for listing in listings], dtype=np.float64)
+        areas = np.array([listing["area"] for listing in listings], dtype=np.float64)
+
+        neighbors: Dict[int, Set[int]] = {}
+        for i, j in self.similar_pairs(signatures, prices, areas):
+            if self._attributes_match(listings[i], listings[j]) and self._has_evidence(listings[i], listings[j]):
+                neighbors.setdefault(i, set()).add(j)
+                neighbors.setdefault(j, set()).add(i)
+
+        # Estrela: o melhor anúncio ainda livre vira canônico e absorve só
+        # os vizinhos diretos livres (sem fechamento transitivo)
+        assigned = [False] * len(listings)
+        groups = []
+        for center in sorted(range(len(listings)), key=lambda i: self._rank(listings, i)):
+            if assigned[center]:
+                continue
+            members = [center] + [j for j in neighbors.get(center, ()) if not assigned[j]]
+            for i in members:
+                assigned[i] = True
+            groups.append(sorted(members))
+
+        return sorted(groups, key=lambda members: members[0])
+
+    @classmethod
+    def canonical_index(cls, listings: List[Dict], members: List[int]) -> int:
+        """Anúncio mais completo do cluster; empate: menor preço, depois o primeiro."""
+        return min(members, key=lambda i: cls._rank(listings, i))
+
+    def dedupe(self, listings: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Remove quase duplicados.
+
+        Returns:
+            (anúncios canônicos na ordem original, clusters com 2+ anúncios)
+        """
+        canonical = []
+        report = []
+
+        for members in self.clusters(listings):
+            keep = self.canonical_index(listings, members)
+            canonical.append(listings[keep])
+
+            if len(members) > 1:
+                prices = [listings[i]["price"] for i in members]
+                areas = [listings[i]["area"] for i in members]
+                report.append({
+                    "canonical": listings[keep]["link"],
+                    "size": len(members),
+                    "links": [listings[i]["link"] for i in members],
+                    "dropped": [listings[i]["link"] for i in members if i != keep],
+                    "price_min": min(prices),
+                    "price_max": max(prices),
+                    "area_min": min(areas),
+                    "area_max": max(areas)
+                })
+
+        return canonical, report
+
+
+def save_clusters(report: List[Dict], output_dir: Path) -> Path:
+    """Grava duplicate_clusters.json ao lado do listings.json."""
+    output_path = Path(output_dir) / "duplicate_clusters.json"
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return output_path
+
+
+def dedupe_near_duplicates(listings: List[Dict],
+                           output_dir: Optional[Path] = None,
+                           detector: Optional[NearDuplicateDetector] = None) -> List[Dict]:
+    """Atalho usado pelos parsers: dedup + relatório de clusters."""
+    detector = detector or NearDuplicateDetector()
+    canonical, report = detector.dedupe(listings)
+
+    if output_dir is not None:
+        clusters_path = save_clusters(report, output_dir)
+        merged = sum(cluster["size"] - 1 for cluster in report)
+        print(f"   🔗 Quase duplicados: {len(report)} clusters, {merged} anúncios removidos ({clusters_path})")
+
+    return canonical
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tool: Enrichment Pipeline
+Enriquecimento de anúncios em pipeline: scrape da página de detalhe e
+geocoding rodam em pools de threads separados, ligados por filas
+limitadas, para que o scrape do anúncio N+1 aconteça enquanto o N é
+geocodificado.
+
+    entrada ──▶ [fila scrape] ──▶ scrape workers ──▶ [fila geocode] ──▶ geocode workers
+                                       │ (sem endereço)                        │
+                                       └───────────────▶ [fila saída] ◀────────┘
+                                                              │
+                                                   writer (JSONL incremental)
+
+O scrape tem seu próprio TokenBucket; no geocoding, o GeocodeScheduler do
+extractor limita cada provedor (Google, Nominatim) separadamente.
+Respostas em cache e endereços resolvidos pelo gazetteer local não
+consomem token. Cada endereço distinto é geocodificado uma vez por
+execução: pedidos simultâneos do mesmo endereço são coalescidos
+(SingleFlight) e os seguintes reaproveitam o resultado.
+"""
+
+import json
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+from firecrawl_budget import BudgetExceeded, KIND_DETAIL
+from geocode_cache import normalize_address
+from rate_limit import TokenBucket
+from single_flight import SingleFlight
+
+_STOP = object()
+
+
+class EnrichmentPipeline:
+    """Scrape e geocoding concorrentes, com saída incremental."""
+
+    def __init__(self,
+                 extractor,
+                 scrape_workers: int = 4,
+                 geocode_workers: int = 2,
+                 scrape_rps: float = 2.0,
+                 queue_size: int = 100):
+        """
+        Args:
+            extractor: AddressExtractor (scrape, extração e geocoding)
+            scrape_workers: Threads de scrape
+            geocode_workers: Threads de geocoding
+            scrape_rps: Scrapes por segundo (todas as threads)
+            queue_size: Capacidade de cada fila entre estágios
+        """
+        self.extractor = extractor
+        self.scrape_workers = max(1, scrape_workers)
+        self.geocode_workers = max(1, geocode_workers)
+        self.scrape_bucket = TokenBucket(scrape_rps, capacity=self.scrape_workers)
+        self.queue_size = queue_size
+        self.budget_exhausted = threading.Event()
+        self.single_flight = SingleFlight()
+        # Endereço normalizado → coordenadas (execução atual)
+        self.resolved: Dict[str, Optional[Dict]] = {}
+        self.geocode_calls = 0
+
+    def _scrape_stage(self, inbox: "queue.Queue", geocode_queue: "queue.Queue", outbox: "queue.Queue"):
+        crawler = self.extractor.crawler
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                return
+            index, listing = item
+            try:
+                if self.budget_exhausted.is_set():
+                    outbox.put((index, listing))
+                    continue
+
+                link = listing['link']
+                if not (crawler.cache and crawler.cache.contains(link, ['markdown'], KIND_DETAIL)):
+                    self.scrape_bucket.acquire()
+                result = crawler.scrape_url(link, formats=['markdown'], kind=KIND_DETAIL)
+
+                address_info = self.extractor.address_from_result(listing, result)
+                if address_info:
+                    geocode_queue.put((index, listing, address_info))
+                else:
+                    outbox.put((index, listing))
+            except BudgetExceeded as e:
+                if not self.budget_exhausted.is_set():
+                    print(f"   ⏹️  {e}")
+                self.budget_exhausted.set()
+                outbox.put((index, listing))
+            except Exception as e:
+                print(f"   ❌ Erro no scrape de {listing.get('link')}: {e}")
+                outbox.put((index, listing))
+
+    def _geocode_stage(self, inbox: "queue.Queue", outbox: "queue.Queue"):
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                return
+            index, listing, address_info = item
+            try:
+                full_address = address_info['full_address']
+                key = normalize_address(full_address)
+                if key in self.resolved:
+                    coords = self.resolved[key]
+                else:
+                    coords = self.single_flight.do(key, self._geocode_once, key, full_address)
+                outbox.put((index, self.extractor.with_coordinates(listing, address_info, coords)))
+            except Exception as e:
+                print(f"   ❌ Erro no geocoding de {address_info.get('full_address')}: {e}")
+                outbox.put((index, listing))
+
+    def _geocode_once(self, key: str, full_address: str) -> Optional[Dict]:
+        """Geocoding de um endereço distinto (limites por provedor no scheduler do extractor)."""
+        if key in self.resolved:
+            return self.resolved[key]
+        if self.extractor.needs_remote_geocode(full_address):
+            self.geocode_calls += 1
+        coords = self.extractor.geocode_address(full_address)
+        self.resolved[key] = coords
+        return coords
+
+    def run(self, listings: List[Dict], progress_path: Optional[Path] = None) -> List[Dict]:
+        """
+        Enriquece os anúncios.
+
+        Args:
+            listings: Anúncios com campo 'link'
+            progress_path: JSONL gravado conforme cada anúncio termina
+                           ({"index": i, "listing": {...}}), truncado no início
+
+        Returns:
+            Anúncios enriquecidos, na ordem da entrada
+        """
+        scrape_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        geocode_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        output_queue: "queue.Queue" = queue.Queue()
+        self.budget_exhausted.clear()
+        self.resolved = {}
+        self.geocode_calls = 0
+
+        threads = [
+            threading.Thread(target=self._scrape_stage, args=(scrape_queue, geocode_queue, output_queue),
+                             daemon=True)
+            for _ in range(self.scrape_workers)
+        ] + [
+            threading.Thread(target=self._geocode_stage, args=(geocode_queue, output_queue), daemon=True)
+            for _ in range(self.geocode_workers)
+        ]
+
+        def feed():
+            # Fila limitada: o feeder espera quando o scrape está à frente
+            for item in enumerate(listings):
+                scrape_queue.put(item)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        for thread in threads + [feeder]:
+            thread.start()
+
+        results: List[Optional[Dict]] = [None] * len(listings)
+        progress = None
+        if progress_path:
+            progress_path = Path(progress_path)
+            progress_path.parent.mkdir(parents=True, exist_ok=True)
+            progress = open(progress_path, 'w', encoding='utf-8')
+
+        started_at = time.monotonic()
+        try:
+            # Cada anúncio gera exatamente uma saída (enriquecido ou original)
+            for done in range(1, len(listings) + 1):
+                index, listing = output_queue.get()
+                results[index] = listing
+                if progress:
+                    progress.write(json.dumps({"index": index, "listing": listing}, ensure_ascii=False) + "\n")
+                    progress.flush()
+                if done % 50 == 0 or done == len(listings):
+                    elapsed = time.monotonic() - started_at
+                    print(f"[{done}/{len(listings)}] {done / elapsed if elapsed else 0:.1f} anúncios/s")
+        finally:
+            if progress:
+                progress.close()
+
+        print(f"   🧭 Geocoding: {len(self.resolved)} endereços distintos, "
+              f"{self.geocode_calls} consultas aos provedores, "
+              f"{self.single_flight.coalesced} pedidos coalescidos")
+
+        # Filas vazias neste ponto: os workers recebem o sinal de parada e saem
+        for _ in range(self.scrape_workers):
+            scrape_queue.put(_STOP)
+        for _ in range(self.geocode_workers):
+            geocode_queue.put(_STOP)
+
+        return results
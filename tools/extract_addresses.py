@@ -2,30 +2,125 @@
 """
 Tool: Address Extractor
 Extrai endereços completos das páginas individuais dos anúncios.
+
+Incremental: a saída anterior é reaproveitada por ID do anúncio; só são
+processados anúncios novos ou cujo conteúdo de origem mudou (hash em
+"source_hash"). A saída é regravada (atomicamente) a cada lote.
 """
 
+import hashlib
 import os
 import re
 import json
 import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import sys
+import requests
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
 sys.path.insert(0, str(Path(__file__).parent))
+from firecrawl_budget import BudgetExceeded, FirecrawlBudget, KIND_DETAIL, budget_from_env
+from enrichment_pipeline import EnrichmentPipeline
 from firecrawl_integration import FirecrawlCrawler
+from gazetteer import Gazetteer, PRECISION_NEIGHBORHOOD, PRECISION_STREET, gazetteer_from_env, split_address
+from geocode_cache import GeocodeCache, normalize_address
+from geocode_scheduler import GeocodeScheduler, ProviderLane, parse_order
+from http_client import ResilientHTTPClient, get_default_client
+from listing_ids import listing_id_from_url
+from scrape_cache import ScrapeCache
+from single_flight import SingleFlight
+
+
+def listing_key(listing: Dict) -> str:
+    """Chave estável do anúncio: ID da URL (ou a própria URL)."""
+    return listing_id_from_url(listing['link']) or listing['link']
+
+
+def source_hash(listing: Dict) -> str:
+    """Hash do anúncio como veio do parser (antes do enriquecimento)."""
+    raw = json.dumps(listing, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _google_api_key() -> Optional[str]:
+    key = os.getenv("GOOGLE_MAPS_API_KEY")
+    if not key or key == "your_google_maps_api_key_here":
+        return None
+    return key
+
+
+def write_json_atomic(path: Path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
 
 class AddressExtractor:
     """Extrai endereços de anúncios individuais."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 http_client: Optional[ResilientHTTPClient] = None,
+                 cache: Optional[ScrapeCache] = None,
+                 budget: Optional[FirecrawlBudget] = None,
+                 geocode_cache: Optional[GeocodeCache] = None,
+                 gazetteer: Optional[Gazetteer] = None,
+                 offline: bool = False,
+                 scheduler: Optional[GeocodeScheduler] = None,
+                 geocode_workers: int = 4,
+                 google_qps: float = 10.0,
+                 nominatim_rps: float = 1.0,
+                 geocode_order: Optional[Dict[str, List[str]]] = None,
+                 hedge_after: Optional[float] = None):
+        """
+        Args:
+            api_key: Chave do Firecrawl (padrão: FIRECRAWL_API_KEY)
+            http_client: Cliente HTTP compartilhado
+            cache: Cache de respostas do Firecrawl
+            budget: Orçamento de créditos do Firecrawl
+            geocode_cache: Cache de geocoding
+            gazetteer: Geocoder offline consultado antes dos provedores remotos
+            offline: Nunca chamar provedores de geocoding remotos
+            scheduler: Agendador dos provedores remotos (padrão: um
+                       GeocodeScheduler sobre provider_lanes(), configurado
+                       pelos parâmetros abaixo)
+            geocode_workers: Endereços geocodificados em paralelo (modos
+                             sequencial e batch)
+            google_qps: Requests/s do Google no agendador padrão
+            nominatim_rps: Requests/s do Nominatim no agendador padrão
+            geocode_order: Ordem dos provedores por precisão (ver parse_order)
+            hedge_after: Segundos até disparar o próximo provedor (None = sem hedge)
+        """
         self.api_key = api_key or os.getenv("FIRECRAWL_API_KEY")
-        self.crawler = FirecrawlCrawler(api_key=self.api_key)
+        self.http = http_client or get_default_client()
+        self.crawler = FirecrawlCrawler(api_key=self.api_key, http_client=self.http,
+                                        cache=cache, budget=budget)
+        self.geocode_cache = geocode_cache
+        self.gazetteer = gazetteer
+        self.offline = offline
+        self.scheduler = scheduler or GeocodeScheduler(
+            self.provider_lanes(google_qps=google_qps, nominatim_rps=nominatim_rps),
+            order=geocode_order,
+            hedge_after=hedge_after
+        )
+        self.geocode_workers = max(1, geocode_workers)
+        # Chamadas simultâneas para o mesmo endereço compartilham um request
+        self.single_flight = SingleFlight()
+
+    def provider_lanes(self, google_qps: float = 10.0, nominatim_rps: float = 1.0) -> List[ProviderLane]:
+        """Faixas dos provedores remotos (Google só com GOOGLE_MAPS_API_KEY)."""
+        lanes = []
+        if _google_api_key():
+            lanes.append(ProviderLane("google", self._geocode_google, google_qps))
+        lanes.append(ProviderLane("nominatim", self._geocode_nominatim, nominatim_rps))
+        return lanes
 
     def clean_text(self, text: str) -> str:
         """Remove caracteres indesejados do texto."""
@@ -87,132 +182,377 @@ class AddressExtractor:
 
     def geocode_address(self, address: str) -> Optional[Dict[str, float]]:
         """
-        Converte endereço em coordenadas usando Google Geocoding API.
+        Converte endereço em coordenadas ({"lat", "lng"}).
 
-        Requer GOOGLE_MAPS_API_KEY no .env
+        Ver geocode_details para provedores e cache.
         """
-        google_api_key = os.getenv("GOOGLE_MAPS_API_KEY")
-
-        # Tentar Google Maps API primeiro (mais preciso para Brasil)
-        if google_api_key and google_api_key != "your_google_maps_api_key_here":
-            try:
-                url = "https://maps.googleapis.com/maps/api/geocode/json"
-                params = {
-                    "address": address,
-                    "key": google_api_key,
-                    "region": "br"  # Priorizar Brasil
-                }
+        details = self.geocode_details(address)
+        if not details or details.get("lat") is None:
+            return None
+        return {"lat": details["lat"], "lng": details["lng"]}
 
-                response = requests.get(url, params=params, timeout=10)
-                response.raise_for_status()
-
-                data = response.json()
-                if data.get("status") == "OK" and data.get("results"):
-                    location = data["results"][0]["geometry"]["location"]
-                    return {
-                        "lat": float(location["lat"]),
-                        "lng": float(location["lng"])
-                    }
-                elif data.get("status") != "OK":
-                    print(f"   ⚠️  Google Geocoding: {data.get('status')}")
-
-            except Exception as e:
-                print(f"   ⚠️  Erro Google Geocoding: {e}")
-
-        # Fallback: Nominatim (OpenStreetMap) - gratuito mas menos preciso
-        try:
-            url = "https://nominatim.openstreetmap.org/search"
-            params = {
-                "q": address,
-                "format": "json",
-                "limit": 1,
-                "countrycodes": "br"
-            }
-            headers = {
-                "User-Agent": "VivaRealMarketResearch/1.0"
-            }
+    def geocode_details(self, address: str) -> Optional[Dict]:
+        """
+        Geocoding: gazetteer local, depois cache e os provedores remotos
+        via GeocodeScheduler (Google Geocoding API, se GOOGLE_MAPS_API_KEY
+        no .env, e Nominatim; ordem por precisão do endereço).
 
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            response.raise_for_status()
+        O gazetteer resolve sozinho quando acha a rua, ou o bairro de um
+        endereço sem rua; um centróide de bairro para endereço com rua só
+        é usado se os provedores remotos não acharem nada (ou offline).
 
-            data = response.json()
-            if data and len(data) > 0:
-                return {
-                    "lat": float(data[0]["lat"]),
-                    "lng": float(data[0]["lon"])
-                }
+        "Não encontrado" também vai para o cache (TTL curto); erros de
+        rede/API não, para que a próxima execução tente de novo. Pedidos
+        simultâneos para o mesmo endereço normalizado são coalescidos.
 
-        except Exception as e:
-            print(f"   ⚠️  Erro Nominatim: {e}")
+        Returns:
+            {"lat", "lng", "provider", "precision"} ou None
+        """
+        return self.single_flight.do(normalize_address(address), self._lookup_address, address)
+
+    def _local_geocode(self, address: str) -> Tuple[Optional[Dict], bool]:
+        """(resultado do gazetteer, se ele basta sem consultar os remotos)."""
+        local = self.gazetteer.lookup(address) if self.gazetteer else None
+        final = self.offline or bool(local) and (
+            local["precision"] == PRECISION_STREET or split_address(address)[0] is None
+        )
+        return local, final
+
+    def needs_remote_geocode(self, address: str) -> bool:
+        """Se geocodificar o endereço vai chamar um provedor remoto."""
+        _, final = self._local_geocode(address)
+        return not final and not (self.geocode_cache and self.geocode_cache.contains(address))
+
+    def _lookup_address(self, address: str) -> Optional[Dict]:
+        local, final = self._local_geocode(address)
+        if final:
+            return local
+        return self._lookup_remote(address) or local
+
+    def _lookup_remote(self, address: str) -> Optional[Dict]:
+        """Cache, depois os provedores remotos em ordem."""
+        if self.geocode_cache:
+            cached = self.geocode_cache.get(address)
+            if cached is not None:
+                return cached if cached.get("lat") is not None else None
+
+        precision = PRECISION_STREET if split_address(address)[0] else PRECISION_NEIGHBORHOOD
+        result, failed = self.scheduler.geocode(address, precision)
+
+        if self.geocode_cache and (result or not failed):
+            self.geocode_cache.put(address, result)
+
+        return result
+
+    def _geocode_google(self, address: str) -> Optional[Dict]:
+        """Google Geocoding API (mais preciso para Brasil); None sem chave ou sem resultado."""
+        google_api_key = _google_api_key()
+        if not google_api_key:
+            return None
+
+        url = "https://maps.googleapis.com/maps/api/geocode/json"
+        params = {
+            "address": address,
+            "key": google_api_key,
+            "region": "br"  # Priorizar Brasil
+        }
+
+        response = self.http.get(url, params=params, timeout=10)
+        response.raise_for_status()
+
+        data = response.json()
+        status = data.get("status")
+        if status == "OK" and data.get("results"):
+            result = data["results"][0]
+            location = result["geometry"]["location"]
+            return {
+                "lat": float(location["lat"]),
+                "lng": float(location["lng"]),
+                "provider": "google",
+                # ROOFTOP, RANGE_INTERPOLATED, GEOMETRIC_CENTER ou APPROXIMATE
+                "precision": result["geometry"].get("location_type")
+            }
+        if status == "ZERO_RESULTS":
+            return None
+        raise requests.RequestException(f"status {status}")
+
+    def _geocode_nominatim(self, address: str) -> Optional[Dict]:
+        """Nominatim (OpenStreetMap) - gratuito mas menos preciso."""
+        url = "https://nominatim.openstreetmap.org/search"
+        params = {
+            "q": address,
+            "format": "json",
+            "limit": 1,
+            "countrycodes": "br"
+        }
+        headers = {
+            "User-Agent": "VivaRealMarketResearch/1.0"
+        }
+
+        response = self.http.get(url, params=params, headers=headers, timeout=10)
+        response.raise_for_status()
+
+        data = response.json()
+        if not data:
+            return None
+        return {
+            "lat": float(data[0]["lat"]),
+            "lng": float(data[0]["lon"]),
+            "provider": "nominatim",
+            # Tipo do objeto OSM encontrado (house, residential, suburb, ...)
+            "precision": data[0].get("addresstype") or data[0].get("type")
+        }
+
+    def enrich_listing(self, listing: Dict, result: Dict) -> Dict:
+        """
+        Aplica o resultado do scrape da página individual a um anúncio.
 
-        return None
+        Returns:
+            Cópia enriquecida com 'address'/'coordinates', ou o próprio
+            anúncio se o scrape falhou ou não há endereço
+        """
+        address_info = self.address_from_result(listing, result)
+        if not address_info:
+            return listing
+        coords = self.geocode_address(address_info['full_address'])
+        return self.with_coordinates(listing, address_info, coords)
+
+    def address_from_result(self, listing: Dict, result: Dict) -> Optional[Dict]:
+        """Endereço extraído do markdown do scrape (None se falhou ou não achou)."""
+        if not result.get('success'):
+            print(f"   ❌ Erro no scrape: {result.get('error')}")
+            return None
+
+        markdown = result.get('data', {}).get('markdown', '')
+
+        # Extrair endereço
+        address_info = self.extract_address_from_markdown(markdown, listing['link'])
+
+        if not address_info:
+            print(f"   ⚠️  Endereço não encontrado")
+            return None
+
+        print(f"   ✅ Endereço: {address_info['full_address']}")
+        return address_info
+
+    def with_coordinates(self,
+                         listing: Dict,
+                         address_info: Dict,
+                         coords: Optional[Dict[str, float]]) -> Dict:
+        """Cópia do anúncio com endereço e coordenadas."""
+        if coords:
+            print(f"   📍 Coordenadas: {coords['lat']:.6f}, {coords['lng']:.6f}")
+        else:
+            print(f"   ⚠️  Geocoding falhou, usando coordenadas aproximadas")
+            # Mantém coordenadas vindas do JSON do portal, se houver
+            coords = listing.get('coordinates')
+
+        # Adicionar informações ao listing
+        listing_enriched = listing.copy()
+        listing_enriched['address'] = address_info
+        listing_enriched['coordinates'] = coords
+        return listing_enriched
 
     def extract_addresses_from_listings(self, listings: List[Dict],
-                                       delay: int = 3) -> List[Dict]:
+                                       delay: int = 3,
+                                       batch: bool = False,
+                                       concurrency: int = 4,
+                                       pipeline: Optional[EnrichmentPipeline] = None,
+                                       progress_path: Optional[Path] = None) -> List[Dict]:
         """
         Extrai endereços de uma lista de anúncios.
 
         Args:
             listings: Lista de anúncios com campo 'link'
-            delay: Delay entre requests (segundos)
+            delay: Delay entre requests (segundos, só no modo sequencial)
+            batch: Usar jobs de batch scrape do Firecrawl em vez de um
+                   request por anúncio
+            concurrency: Jobs de batch simultâneos
+            pipeline: Pipeline concorrente scrape → geocoding (tem
+                      precedência sobre os outros modos)
+            progress_path: JSONL incremental do pipeline
 
         Returns:
             Lista de anúncios enriquecidos com endereço e coordenadas
         """
         print(f"\n📍 Extraindo Endereços Reais\n")
         print(f"   Total de anúncios: {len(listings)}")
-        print(f"   Delay entre requests: {delay}s\n")
+        budget = self.crawler.budget
+        if budget:
+            budget.print_estimate(budget.estimate(detail_pages=self.estimate_detail_pages(listings)))
+        if pipeline:
+            print(f"   Modo pipeline: {pipeline.scrape_workers} threads de scrape, "
+                  f"{pipeline.geocode_workers} de geocoding\n")
+            enriched_listings = pipeline.run(listings, progress_path)
+        elif batch:
+            print(f"   Modo batch: até {concurrency} jobs simultâneos\n")
+            enriched_listings = self._extract_batch(listings, concurrency)
+        else:
+            print(f"   Delay entre requests: {delay}s\n")
+            enriched_listings = self._extract_sequential(listings, delay)
+
+        print(f"\n✅ Processamento concluído!")
+        with_address = sum(1 for l in enriched_listings if 'address' in l)
+        with_coords = sum(1 for l in enriched_listings if l.get('coordinates'))
+        print(f"   Com endereço: {with_address}/{len(enriched_listings)}")
+        print(f"   Com coordenadas: {with_coords}/{len(enriched_listings)}")
+        if self.crawler.cache:
+            self.crawler.cache.print_stats()
+        if budget:
+            budget.print_summary()
+        if self.geocode_cache:
+            self.geocode_cache.print_stats()
+        self.scheduler.print_stats()
 
-        enriched_listings = []
+        return enriched_listings
+
+    def extract_incremental(self,
+                            listings: List[Dict],
+                            output_path: Path,
+                            flush_every: int = 100,
+                            full: bool = False,
+                            **options) -> List[Dict]:
+        """
+        Enriquece só o que mudou desde a última execução.
+
+        Anúncios já enriquecidos em `output_path` (mesmo ID e mesmo
+        source_hash) são reaproveitados; os demais são processados em lotes
+        de `flush_every`, e a saída completa (na ordem de `listings`) é
+        regravada após cada lote, então uma execução interrompida mantém o
+        progresso. Anúncios sem endereço (scrape falhou, sem endereço na
+        página, orçamento esgotado) ficam sem source_hash e são tentados de
+        novo na próxima execução; o cache de scrape torna isso barato.
+
+        Args:
+            listings: Anúncios do parser
+            output_path: JSON de saída (lido como estado anterior)
+            flush_every: Anúncios por lote entre gravações
+            full: Ignorar a saída anterior e reprocessar tudo
+            **options: Repassados a extract_addresses_from_listings
+
+        Returns:
+            Anúncios enriquecidos, na ordem da entrada
+        """
+        output_path = Path(output_path)
+        flush_every = max(1, flush_every)
+        previous: Dict[str, Dict] = {}
+        if not full and output_path.exists():
+            with open(output_path, 'r', encoding='utf-8') as f:
+                previous = {
+                    listing_key(listing): listing
+                    for listing in json.load(f) if listing.get('source_hash')
+                }
+
+        hashes = [source_hash(listing) for listing in listings]
+        results: List[Dict] = []
+        pending: List[int] = []
+
+        for i, (listing, digest) in enumerate(zip(listings, hashes)):
+            prior = previous.get(listing_key(listing))
+            if prior is not None and prior['source_hash'] == digest:
+                results.append(prior)
+            else:
+                results.append(listing)
+                pending.append(i)
+
+        print(f"♻️  Incremental: {len(listings) - len(pending)} anúncios já enriquecidos, "
+              f"{len(pending)} novos ou alterados")
+
+        for start in range(0, len(pending), flush_every):
+            batch = pending[start:start + flush_every]
+            enriched = self.extract_addresses_from_listings([listings[i] for i in batch], **options)
+            for i, listing in zip(batch, enriched):
+                if 'address' in listing:
+                    listing = {**listing, 'source_hash': hashes[i]}
+                results[i] = listing
+
+            write_json_atomic(output_path, results)
+            print(f"💾 Progresso salvo: {min(start + flush_every, len(pending))}/{len(pending)} ({output_path})")
+
+        if not pending:
+            write_json_atomic(output_path, results)
+
+        return results
+
+    def estimate_detail_pages(self, listings: List[Dict]) -> int:
+        """Páginas de detalhe que custariam créditos (links únicos fora do cache)."""
+        cache = self.crawler.cache
+        links = dict.fromkeys(listing['link'] for listing in listings)
+        return sum(1 for link in links if not (cache and cache.contains(link, ['markdown'], KIND_DETAIL)))
+
+    def _extract_sequential(self, listings: List[Dict], delay: int) -> List[Dict]:
+        """Um scrape por anúncio, com delay entre eles; geocoding no final."""
+        addresses: List[Optional[Dict]] = [None] * len(listings)
 
         for i, listing in enumerate(listings, 1):
             print(f"[{i}/{len(listings)}] Processando...")
 
             # Fazer scrape da página individual
-            result = self.crawler.scrape_url(listing['link'], formats=['markdown'])
+            try:
+                result = self.crawler.scrape_url(listing['link'], formats=['markdown'], kind=KIND_DETAIL)
+            except BudgetExceeded as e:
+                # Anúncios restantes seguem sem endereço
+                print(f"   ⏹️  {e}")
+                break
+            addresses[i - 1] = self.address_from_result(listing, result)
 
-            if not result.get('success'):
-                print(f"   ❌ Erro no scrape: {result.get('error')}")
-                enriched_listings.append(listing)
-                continue
+            # Delay para não sobrecarregar (respostas do cache não contam)
+            if addresses[i - 1] and not result.get('from_cache') and i < len(listings):
+                time.sleep(delay)
 
-            markdown = result.get('data', {}).get('markdown', '')
+        return self.geocode_listings(listings, addresses)
 
-            # Extrair endereço
-            address_info = self.extract_address_from_markdown(markdown, listing['link'])
+    def _extract_batch(self, listings: List[Dict], concurrency: int) -> List[Dict]:
+        """
+        Scrape em batch: resultados chegam na ordem de conclusão e o
+        endereço é extraído na hora; geocoding no final.
+        """
+        positions: Dict[str, List[int]] = {}
+        for i, listing in enumerate(listings):
+            positions.setdefault(listing['link'], []).append(i)
 
-            if address_info:
-                full_address = address_info['full_address']
-                print(f"   ✅ Endereço: {full_address}")
+        addresses: List[Optional[Dict]] = [None] * len(listings)
+        done = 0
 
-                # Geocoding
-                coords = self.geocode_address(full_address)
+        for result in self.crawler.batch_scrape(list(positions), formats=['markdown'],
+                                                max_concurrency=concurrency):
+            for i in positions.get(result['url'], []):
+                done += 1
+                print(f"[{done}/{len(listings)}] {result['url']}")
+                addresses[i] = self.address_from_result(listings[i], result)
 
-                if coords:
-                    print(f"   📍 Coordenadas: {coords['lat']:.6f}, {coords['lng']:.6f}")
-                else:
-                    print(f"   ⚠️  Geocoding falhou, usando coordenadas aproximadas")
-                    coords = None
+        return self.geocode_listings(listings, addresses)
 
-                # Adicionar informações ao listing
-                listing_enriched = listing.copy()
-                listing_enriched['address'] = address_info
-                listing_enriched['coordinates'] = coords
+    def geocode_listings(self, listings: List[Dict], addresses: List[Optional[Dict]]) -> List[Dict]:
+        """
+        Geocodifica cada endereço distinto (chave normalizada) uma única vez
+        e distribui as coordenadas para todos os anúncios com ele. Os
+        endereços são processados em paralelo (geocode_workers); o
+        GeocodeScheduler mantém cada provedor no seu limite de taxa.
 
-                enriched_listings.append(listing_enriched)
+        Args:
+            listings: Anúncios
+            addresses: Endereço extraído de cada anúncio (None = sem endereço)
 
-                # Delay para não sobrecarregar
-                if i < len(listings):
-                    time.sleep(delay)
-            else:
-                print(f"   ⚠️  Endereço não encontrado")
-                enriched_listings.append(listing)
+        Returns:
+            Anúncios enriquecidos, na ordem da entrada
+        """
+        groups: Dict[str, List[int]] = {}
+        for i, address_info in enumerate(addresses):
+            if address_info:
+                groups.setdefault(normalize_address(address_info['full_address']), []).append(i)
 
-        print(f"\n✅ Processamento concluído!")
-        with_address = sum(1 for l in enriched_listings if 'address' in l)
-        with_coords = sum(1 for l in enriched_listings if l.get('coordinates'))
-        print(f"   Com endereço: {with_address}/{len(enriched_listings)}")
-        print(f"   Com coordenadas: {with_coords}/{len(enriched_listings)}")
+        with_address = sum(len(members) for members in groups.values())
+        print(f"\n🧭 Geocoding: {len(groups)} endereços distintos para {with_address} anúncios\n")
+
+        enriched_listings = list(listings)
+        distinct = [addresses[members[0]]['full_address'] for members in groups.values()]
+        with ThreadPoolExecutor(max_workers=self.geocode_workers) as executor:
+            for n, (members, full_address, coords) in enumerate(
+                    zip(groups.values(), distinct, executor.map(self.geocode_address, distinct)), 1):
+                print(f"[{n}/{len(groups)}] {full_address} ({len(members)} anúncio(s))")
+                for i in members:
+                    enriched_listings[i] = self.with_coordinates(listings[i], addresses[i], coords)
 
         return enriched_listings
 
@@ -225,6 +565,39 @@ def main():
     parser.add_argument("--input", default="data/processed/listings.json")
     parser.add_argument("--output", default="data/processed/listings_with_addresses.json")
     parser.add_argument("--delay", type=int, default=3, help="Delay entre requests (s)")
+    parser.add_argument("--full", action="store_true",
+                        help="Reprocessar todos os anúncios, ignorando a saída anterior")
+    parser.add_argument("--flush-every", type=int, default=100,
+                        help="Gravar a saída a cada N anúncios processados")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--batch", action="store_true",
+                      help="Usar batch scrape do Firecrawl (jobs assíncronos)")
+    mode.add_argument("--pipeline", action="store_true",
+                      help="Scrape e geocoding concorrentes em pipeline")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jobs de batch simultâneos")
+    parser.add_argument("--scrape-workers", type=int, default=4, help="Threads de scrape (pipeline)")
+    parser.add_argument("--geocode-workers", type=int, default=4,
+                        help="Endereços geocodificados em paralelo")
+    parser.add_argument("--scrape-rps", type=float, default=2.0, help="Scrapes por segundo (pipeline)")
+    parser.add_argument("--google-qps", type=float, default=10.0, help="Requests/s ao Google Geocoding")
+    parser.add_argument("--nominatim-rps", type=float, default=1.0,
+                        help="Requests/s ao Nominatim (política de uso: no máximo 1)")
+    parser.add_argument("--geocode-order", action="append", default=[], metavar="PRECISÃO=PROV1,PROV2",
+                        help="Ordem dos provedores por precisão (ex.: street=google,nominatim)")
+    parser.add_argument("--hedge-after", type=float,
+                        help="Segundos até consultar o próximo provedor em paralelo (hedge)")
+    parser.add_argument("--cache-dir", default="data/cache/scrape", help="Cache de respostas do Firecrawl")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Sempre chamar as APIs (sem cache de scrape e de geocoding)")
+    parser.add_argument("--geocode-cache", default="data/cache/geocode.sqlite",
+                        help="Cache SQLite de geocoding")
+    parser.add_argument("--gazetteer", help="CSV de ruas/bairros para geocoding offline (ou GAZETTEER_FILE env)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Geocoding só pelo gazetteer local, sem provedores remotos")
+    parser.add_argument("--budget", type=float,
+                        help="Máximo de créditos Firecrawl nesta execução (ou FIRECRAWL_BUDGET env)")
+    parser.add_argument("--ledger", default="data/cache/firecrawl_ledger.jsonl",
+                        help="Ledger JSONL de custo/latência por chamada")
 
     args = parser.parse_args()
 
@@ -240,13 +613,28 @@ def main():
     print(f"📂 Carregados {len(listings)} anúncios")
 
     # Extrair endereços
-    extractor = AddressExtractor()
-    enriched = extractor.extract_addresses_from_listings(listings, delay=args.delay)
-
-    # Salvar
+    cache = None if args.no_cache else ScrapeCache(args.cache_dir)
+    budget = budget_from_env(ledger_path=args.ledger, max_credits=args.budget)
+    geocode_cache = None if args.no_cache else GeocodeCache(args.geocode_cache)
+    extractor = AddressExtractor(cache=cache, budget=budget, geocode_cache=geocode_cache,
+                                 gazetteer=gazetteer_from_env(args.gazetteer), offline=args.offline,
+                                 geocode_workers=args.geocode_workers,
+                                 google_qps=args.google_qps, nominatim_rps=args.nominatim_rps,
+                                 geocode_order=parse_order(args.geocode_order),
+                                 hedge_after=args.hedge_after)
+    pipeline = None
+    if args.pipeline:
+        pipeline = EnrichmentPipeline(
+            extractor,
+            scrape_workers=args.scrape_workers,
+            geocode_workers=args.geocode_workers,
+            scrape_rps=args.scrape_rps
+        )
     output_path = Path(args.output)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(enriched, f, indent=2, ensure_ascii=False)
+    extractor.extract_incremental(
+        listings, output_path, flush_every=args.flush_every, full=args.full,
+        delay=args.delay, batch=args.batch, concurrency=args.concurrency, pipeline=pipeline
+    )
 
     print(f"\n💾 Salvo em: {output_path}")
 
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Tool: Firecrawl Budget
+Orçamento de créditos do Firecrawl por execução, com ledger de custo e
+latência de cada chamada.
+
+- estimativa: quantas chamadas uma execução configurada vai precisar
+  (páginas de busca que faltam, páginas de detalhe fora do cache)
+- limite rígido: `acquire` levanta BudgetExceeded quando a chamada não
+  cabe no orçamento
+- prioridade: créditos reservados para páginas de busca (listagem) não
+  podem ser gastos com páginas de detalhe
+- ledger (JSON Lines): uma linha por chamada paga, com tipo, URL,
+  latência, créditos e sucesso
+
+Uso do ledger:
+    python tools/firecrawl_budget.py --ledger data/cache/firecrawl_ledger.jsonl
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+KIND_LISTING = "listing"
+KIND_DETAIL = "detail"
+
+# Firecrawl cobra 1 crédito por página (scrape ou item de batch)
+CREDITS_PER_PAGE = 1.0
+DEFAULT_LEDGER = "data/cache/firecrawl_ledger.jsonl"
+
+
+class BudgetExceeded(Exception):
+    """A chamada não cabe no orçamento restante."""
+
+
+class FirecrawlBudget:
+    """Limite de créditos de uma execução + ledger de chamadas."""
+
+    def __init__(self,
+                 max_credits: Optional[float] = None,
+                 ledger_path: Optional[str] = DEFAULT_LEDGER,
+                 credits_per_page: float = CREDITS_PER_PAGE):
+        """
+        Args:
+            max_credits: Orçamento da execução (None = sem limite, só registra)
+            ledger_path: Arquivo JSONL do ledger (None = não grava)
+            credits_per_page: Custo de cada página
+        """
+        self.max_credits = max_credits
+        self.ledger_path = Path(ledger_path) if ledger_path else None
+        self.credits_per_page = credits_per_page
+        self.spent = 0.0
+        self.reserved = {KIND_LISTING: 0.0, KIND_DETAIL: 0.0}
+        self.lock = threading.Lock()
+
+        if self.ledger_path:
+            self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def remaining(self) -> Optional[float]:
+        if self.max_credits is None:
+            return None
+        return self.max_credits - self.spent
+
+    def estimate(self, listing_pages: int = 0, detail_pages: int = 0) -> Dict:
+        """
+        Custo estimado de uma execução e quanto dela cabe no orçamento.
+
+        Páginas de busca entram primeiro; detalhes ficam com o que sobrar.
+        """
+        listing_cost = listing_pages * self.credits_per_page
+        detail_cost = detail_pages * self.credits_per_page
+        remaining = self.remaining
+
+        if remaining is None:
+            affordable_listing, affordable_detail = listing_pages, detail_pages
+        else:
+            affordable_listing = min(listing_pages, int(remaining // self.credits_per_page))
+            left = remaining - affordable_listing * self.credits_per_page
+            affordable_detail = min(detail_pages, int(left // self.credits_per_page))
+
+        return {
+            "listing_pages": listing_pages,
+            "detail_pages": detail_pages,
+            "credits": listing_cost + detail_cost,
+            "remaining": remaining,
+            "affordable_listing_pages": affordable_listing,
+            "affordable_detail_pages": affordable_detail,
+            "fits": affordable_listing == listing_pages and affordable_detail == detail_pages
+        }
+
+    def print_estimate(self, estimate: Dict):
+        print(f"   💳 Estimativa Firecrawl: {estimate['credits']:.0f} créditos "
+              f"({estimate['listing_pages']} buscas, {estimate['detail_pages']} detalhes)")
+        if estimate["remaining"] is None:
+            return
+        print(f"   💳 Orçamento restante: {estimate['remaining']:.0f} créditos")
+        if not estimate["fits"]:
+            print(f"   ⚠️  Orçamento insuficiente: cabem {estimate['affordable_listing_pages']} "
+                  f"buscas e {estimate['affordable_detail_pages']} detalhes")
+
+    def reserve(self, kind: str, pages: int):
+        """Reserva créditos para páginas planejadas de um tipo (substitui a reserva anterior)."""
+        with self.lock:
+            self.reserved[kind] = max(0, pages) * self.credits_per_page
+
+    def acquire(self, kind: str, pages: int = 1) -> float:
+        """
+        Debita o custo de `pages` páginas antes da chamada.
+
+        Detalhes só usam o orçamento não reservado para buscas; uma busca
+        consome a própria reserva.
+
+        Raises:
+            BudgetExceeded: a chamada não cabe no orçamento
+
+        Returns:
+            Créditos debitados
+        """
+        cost = pages * self.credits_per_page
+        with self.lock:
+            if self.max_credits is not None:
+                blocked = self.reserved[KIND_LISTING] if kind != KIND_LISTING else 0.0
+                available = self.max_credits - self.spent - blocked
+                if cost > available + 1e-9:
+                    raise BudgetExceeded(
+                        f"Orçamento Firecrawl esgotado: {kind} x{pages} custa {cost:.0f}, "
+                        f"disponível {max(0.0, available):.0f} de {self.max_credits:.0f}"
+                    )
+            self.spent += cost
+            if kind in self.reserved:
+                self.reserved[kind] = max(0.0, self.reserved[kind] - cost)
+            return cost
+
+    def affordable(self, kind: str) -> Optional[int]:
+        """Quantas páginas do tipo ainda cabem (None = sem limite)."""
+        with self.lock:
+            if self.max_credits is None:
+                return None
+            blocked = self.reserved[KIND_LISTING] if kind != KIND_LISTING else 0.0
+            available = self.max_credits - self.spent - blocked
+            return max(0, int((available + 1e-9) // self.credits_per_page))
+
+    def refund(self, credits: float):
+        """Devolve créditos debitados de chamadas que não chegaram a ser feitas."""
+        with self.lock:
+            self.spent = max(0.0, self.spent - credits)
+
+    def record(self,
+               kind: str,
+               url: str,
+               latency: float,
+               success: bool,
+               credits: Optional[float] = None,
+               mode: str = "scrape"):
+        """Grava uma chamada paga no ledger."""
+        if not self.ledger_path:
+            return
+        event = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "kind": kind,
+            "mode": mode,
+            "url": url,
+            "latency_s": round(latency, 3),
+            "credits": self.credits_per_page if credits is None else credits,
+            "success": success
+        }
+        with self.lock:
+            with open(self.ledger_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def print_summary(self):
+        limit = "sem limite" if self.max_credits is None else f"de {self.max_credits:.0f}"
+        print(f"   💳 Créditos Firecrawl usados: {self.spent:.0f} {limit}")
+
+
+def summarize_ledger(path: Path) -> Dict[str, Dict]:
+    """Chamadas, créditos e latência (média, p50, p95) por tipo de página."""
+    latencies: Dict[str, List[float]] = {}
+    totals: Dict[str, Dict] = {}
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            kind = event.get("kind", "?")
+            entry = totals.setdefault(kind, {"calls": 0, "failures": 0, "credits": 0.0})
+            entry["calls"] += 1
+            entry["failures"] += 0 if event.get("success") else 1
+            entry["credits"] += event.get("credits", 0)
+            latencies.setdefault(kind, []).append(event.get("latency_s", 0.0))
+
+    for kind, values in latencies.items():
+        values.sort()
+        totals[kind].update({
+            "latency_mean_s": sum(values) / len(values),
+            "latency_p50_s": values[len(values) // 2],
+            "latency_p95_s": values[min(len(values) - 1, int(len(values) * 0.95))]
+        })
+
+    return totals
+
+
+def budget_from_env(ledger_path: Optional[str] = DEFAULT_LEDGER,
+                    max_credits: Optional[float] = None) -> FirecrawlBudget:
+    """Orçamento do argumento ou de FIRECRAWL_BUDGET (vazio = sem limite)."""
+    if max_credits is None and os.getenv("FIRECRAWL_BUDGET"):
+        max_credits = float(os.getenv("FIRECRAWL_BUDGET"))
+    return FirecrawlBudget(max_credits=max_credits, ledger_path=ledger_path)
+
+
+def main():
+    """CLI para execução standalone."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resumo do ledger de chamadas do Firecrawl")
+    parser.add_argument("--ledger", default=DEFAULT_LEDGER, help="Arquivo JSONL do ledger")
+
+    args = parser.parse_args()
+
+    ledger_path = Path(args.ledger)
+    if not ledger_path.exists():
+        print(f"❌ Ledger não encontrado: {ledger_path}")
+        return
+
+    print(f"\n💳 Ledger Firecrawl: {ledger_path}\n")
+    for kind, entry in sorted(summarize_ledger(ledger_path).items()):
+        print(f"   {kind:<8} {entry['calls']:6d} chamadas  {entry['failures']:4d} falhas  "
+              f"{entry['credits']:8.0f} créditos  "
+              f"latência média {entry['latency_mean_s']:.2f}s  "
+              f"p50 {entry['latency_p50_s']:.2f}s  p95 {entry['latency_p95_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,38 @@ Wrapper para usar Firecrawl API ou MCP para crawling robusto.
 
 import json
 import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 import requests
 
+sys.path.insert(0, str(Path(__file__).parent))
+from listing_ids import (
+    NoveltyTracker,
+    STOP_BUDGET,
+    STOP_FETCH_ERROR,
+    STOP_MAX_PAGES,
+    STOP_MIN_COUNT,
+    STOP_NO_NEW_LISTINGS,
+)
+from firecrawl_budget import (
+    BudgetExceeded,
+    FirecrawlBudget,
+    KIND_DETAIL,
+    KIND_LISTING,
+    budget_from_env,
+)
+from crawl_journal import CrawlJournal, STATUS_FAILED, STATUS_OK
+from http_client import ResilientHTTPClient, get_default_client
+from markdown_boilerplate import BoilerplateStore
+from scrape_cache import ScrapeCache
+
+DEFAULT_API_URL = "https://api.firecrawl.dev/v1"
+
 class FirecrawlCrawler:
     """
     Integração com Firecrawl para bypass de proteções anti-bot.
@@ -20,23 +48,84 @@ class FirecrawlCrawler:
     3. Fallback para requests simples (limitado)
     """
 
-    def __init__(self, api_key: Optional[str] = None, output_dir: str = "data/raw"):
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 output_dir: str = "data/raw",
+                 http_client: Optional[ResilientHTTPClient] = None,
+                 api_url: Optional[str] = None,
+                 cache: Optional[ScrapeCache] = None,
+                 budget: Optional[FirecrawlBudget] = None):
+        """
+        Args:
+            api_key: Chave da API (padrão: FIRECRAWL_API_KEY)
+            output_dir: Diretório das páginas salvas
+            http_client: Cliente HTTP compartilhado (sessão com pool)
+            api_url: URL base da API (padrão: FIRECRAWL_API_URL ou a API
+                     pública; útil para apontar para um servidor local)
+            cache: Cache persistente de respostas (None = sem cache)
+            budget: Orçamento de créditos + ledger (None = sem controle)
+        """
         self.api_key = api_key or os.getenv("FIRECRAWL_API_KEY")
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.base_url = "https://api.firecrawl.dev/v1"
+        self.base_url = (api_url or os.getenv("FIRECRAWL_API_URL") or DEFAULT_API_URL).rstrip("/")
+        self.http = http_client or get_default_client()
+        self.cache = cache
+        self.budget = budget
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
 
-    def scrape_url(self, url: str, formats: List[str] = ["markdown", "html"]) -> Dict:
+    def scrape_url(self,
+                   url: str,
+                   formats: List[str] = ["markdown", "html"],
+                   kind: str = KIND_LISTING) -> Dict:
         """
         Scrape uma URL usando Firecrawl API.
 
+        Com cache configurado, respostas ainda válidas são devolvidas sem
+        chamar a API ("from_cache": True). Com orçamento, a chamada é
+        debitada antes (falhas são estornadas) e registrada no ledger.
+
         Args:
             url: URL para scrape
             formats: Formatos desejados (markdown, html, links, etc.)
+            kind: Tipo de página (listing ou detail), para o orçamento e a
+                  validade do cache
 
         Returns:
             Dict com success, data, metadata
+
+        Raises:
+            BudgetExceeded: orçamento não comporta a chamada
         """
+        if self.cache:
+            cached = self.cache.get(url, formats, kind)
+            if cached is not None:
+                print(f"♻️  Firecrawl cache: {url}")
+                return {"success": True, "data": cached, "url": url, "from_cache": True}
+
+        cost = self.budget.acquire(kind) if self.budget else 0.0
+        started_at = time.monotonic()
+        result = self._scrape(url, formats)
+
+        if self.budget:
+            self._settle(kind, url, cost, time.monotonic() - started_at, result.get("success"), "scrape")
+        if self.cache and result.get("success"):
+            self.cache.put(url, formats, result["data"], kind)
+        return result
+
+    def _settle(self, kind: str, url: str, cost: float, latency: float, success: bool, mode: str):
+        """Registra a chamada no ledger; falhas não são cobradas pelo Firecrawl."""
+        if not success:
+            self.budget.refund(cost)
+        self.budget.record(kind, url, latency, bool(success), credits=cost if success else 0.0, mode=mode)
+
+    def _scrape(self, url: str, formats: List[str]) -> Dict:
+        """Chamada /scrape, sem cache."""
         if not self.api_key:
             return {
                 "success": False,
@@ -46,12 +135,9 @@ class FirecrawlCrawler:
         print(f"🔥 Firecrawl scraping: {url}")
 
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/scrape",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
+                headers=self._headers(),
                 json={
                     "url": url,
                     "formats": formats,
@@ -85,79 +171,459 @@ class FirecrawlCrawler:
                 "url": url
             }
 
+    def start_batch(self, urls: List[str], formats: List[str]) -> str:
+        """Cria um job de batch scrape e retorna o ID do job."""
+        response = self.http.post(
+            f"{self.base_url}/batch/scrape",
+            headers=self._headers(),
+            json={"urls": urls, "formats": formats, "onlyMainContent": False},
+            timeout=60
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not data.get("success") or not data.get("id"):
+            raise requests.RequestException(data.get("error") or "Batch não iniciado")
+        return data["id"]
+
+    def _fetch_batch_documents(self, job_id: str, skip: int = 0) -> Dict:
+        """
+        Status do job + documentos a partir de `skip` (segue a paginação "next").
+
+        Returns:
+            {"status": ..., "documents": [...]}
+        """
+        url = f"{self.base_url}/batch/scrape/{job_id}"
+        params = {"skip": skip} if skip else None
+        status = None
+        documents = []
+
+        while url:
+            response = self.http.get(url, headers=self._headers(), params=params, timeout=60)
+            response.raise_for_status()
+            data = response.json()
+            status = status or data.get("status")
+            documents.extend(data.get("data") or [])
+            url, params = data.get("next"), None
+
+        return {"status": status, "documents": documents}
+
+    def _run_batch(self,
+                   urls: List[str],
+                   formats: List[str],
+                   poll_interval: float,
+                   timeout: float,
+                   results: "queue.Queue",
+                   stop: Optional[threading.Event] = None) -> None:
+        """
+        Executa um job (criar + polling) e publica cada resultado na fila.
+
+        Com `stop` sinalizado (consumidor parou de iterar), o polling
+        termina na próxima volta em vez de esperar o timeout.
+        """
+        stop = stop or threading.Event()
+        # Firecrawl pode normalizar a URL (ex.: barra final)
+        pending = {url.rstrip("/"): url for url in urls}
+
+        started_at = time.monotonic()
+
+        def emit(key: str, result: Dict):
+            url = pending.pop(key, None)
+            if url is not None:
+                results.put({**result, "url": url, "latency": time.monotonic() - started_at})
+
+        try:
+            job_id = self.start_batch(urls, formats)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in (404, 405):
+                raise
+            # Servidor sem endpoint de batch: scrape individual
+            for url in urls:
+                if stop.is_set():
+                    return
+                emit(url.rstrip("/"), self._scrape(url, formats))
+            return
+
+        deadline = time.monotonic() + timeout
+        received = 0
+
+        while pending:
+            batch = self._fetch_batch_documents(job_id, skip=received)
+            received += len(batch["documents"])
+            finished = batch["status"] in ("completed", "failed", "cancelled")
+
+            if finished and pending:
+                # Varredura completa no final, caso a ordem dos documentos tenha mudado
+                batch["documents"] = self._fetch_batch_documents(job_id)["documents"]
+
+            for document in batch["documents"]:
+                metadata = document.get("metadata") or {}
+                source = (metadata.get("sourceURL") or metadata.get("url") or "").rstrip("/")
+                if metadata.get("error") or (metadata.get("statusCode") or 200) >= 400:
+                    emit(source, {"success": False,
+                                  "error": metadata.get("error") or f"HTTP {metadata.get('statusCode')}"})
+                else:
+                    emit(source, {"success": True, "data": document})
+
+            if finished:
+                break
+            if time.monotonic() >= deadline:
+                batch["status"] = "timeout"
+                break
+            if stop.wait(poll_interval):
+                return
+
+        for key in list(pending):
+            emit(key, {"success": False, "error": f"Sem resultado no batch {job_id} ({batch['status']})"})
+
+    def batch_scrape(self,
+                     urls: List[str],
+                     formats: List[str] = ["markdown"],
+                     batch_size: int = 50,
+                     max_concurrency: int = 4,
+                     poll_interval: float = 2.0,
+                     timeout: float = 900.0,
+                     kind: str = KIND_DETAIL) -> Iterator[Dict]:
+        """
+        Scrape de muitas URLs via jobs de batch, com polling em threads.
+
+        As URLs são divididas em jobs de até `batch_size`; no máximo
+        `max_concurrency` jobs ficam ativos ao mesmo tempo. Resultados são
+        entregues assim que cada página termina (ordem de conclusão), no
+        mesmo formato de scrape_url: {"success", "data"|"error", "url"}.
+        Com cache, URLs em cache são entregues primeiro, sem criar job.
+        Com orçamento, só as URLs que cabem nele são enviadas (na ordem
+        recebida); as demais voltam como falha, sem chamar a API. Os
+        créditos de cada job são debitados quando ele começa, então jobs
+        não iniciados (consumidor parou antes) não contam como gasto.
+        """
+        urls = list(dict.fromkeys(urls))
+
+        if self.cache:
+            missing = []
+            for url in urls:
+                cached = self.cache.get(url, formats, kind)
+                if cached is None:
+                    missing.append(url)
+                else:
+                    yield {"success": True, "data": cached, "url": url, "from_cache": True}
+            if len(missing) < len(urls):
+                print(f"♻️  Firecrawl cache: {len(urls) - len(missing)} URLs em cache")
+            urls = missing
+
+        if not urls:
+            return
+
+        if not self.api_key:
+            for url in urls:
+                yield {"success": False, "url": url,
+                       "error": "Firecrawl API key not configured. Set FIRECRAWL_API_KEY env var."}
+            return
+
+        if self.budget:
+            affordable = self.budget.affordable(kind)
+            if affordable is not None and affordable < len(urls):
+                print(f"⚠️  Orçamento Firecrawl: {len(urls) - affordable} URLs ficam de fora")
+                for url in urls[affordable:]:
+                    yield {"success": False, "url": url, "budget_exceeded": True,
+                           "error": "Orçamento Firecrawl esgotado"}
+                urls = urls[:affordable]
+            if not urls:
+                return
+
+        chunks = [urls[i:i + batch_size] for i in range(0, len(urls), batch_size)]
+        print(f"🔥 Firecrawl batch: {len(urls)} URLs em {len(chunks)} job(s), "
+              f"até {max_concurrency} simultâneos")
+
+        results: "queue.Queue" = queue.Queue()
+        done_marker = object()
+        stop = threading.Event()
+
+        def worker(chunk: List[str]):
+            try:
+                if stop.is_set():
+                    return
+                if self.budget:
+                    self.budget.acquire(kind, len(chunk))
+                self._run_batch(chunk, formats, poll_interval, timeout, results, stop)
+            except BudgetExceeded as e:
+                # Nada foi debitado: falha sem estorno
+                print(f"   ⚠️  {e}")
+                for url in chunk:
+                    results.put({"success": False, "url": url, "budget_exceeded": True,
+                                 "error": str(e), "_chunk_error": True})
+            except Exception as e:
+                # Qualquer erro (rede, payload inesperado do job) vira falha
+                # por URL, para nenhuma sumir da saída
+                print(f"   ❌ Erro no batch: {type(e).__name__}: {e}")
+                for url in chunk:
+                    results.put({"success": False, "error": str(e), "url": url, "_chunk_error": True})
+            finally:
+                results.put(done_marker)
+
+        delivered = set()
+
+        def settle(item: Dict) -> bool:
+            """Registra o resultado no orçamento; False se já entregue."""
+            # Falha do job inteiro não sobrescreve página já entregue
+            if item.pop("_chunk_error", False) and item["url"] in delivered:
+                return False
+            delivered.add(item["url"])
+            latency = item.pop("latency", 0.0)
+            if self.budget and not item.get("budget_exceeded"):
+                self._settle(kind, item["url"], self.budget.credits_per_page,
+                             latency, item["success"], "batch")
+            return True
+
+        executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency))
+        try:
+            for chunk in chunks:
+                executor.submit(worker, chunk)
+
+            running = len(chunks)
+            while running:
+                item = results.get()
+                if item is done_marker:
+                    running -= 1
+                    continue
+                if not settle(item):
+                    continue
+                if self.cache and item["success"]:
+                    self.cache.put(item["url"], formats, item["data"], kind)
+                yield item
+        finally:
+            # Consumidor pode ter parado antes (break, orçamento, Ctrl-C):
+            # os pollers saem na próxima volta, sem bloquear até o timeout
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            # Resultados prontos e não consumidos ainda entram no ledger
+            # (falhas estornadas); jobs não iniciados não debitaram nada
+            while True:
+                try:
+                    item = results.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not done_marker:
+                    settle(item)
+
+    @staticmethod
+    def page_url(base_url: str, page_num: int) -> str:
+        """URL da página `page_num` de uma busca."""
+        if page_num == 1:
+            return base_url
+        return f"{base_url}&pagina={page_num}"
+
+    def estimate_listing_pages(self,
+                               base_url: str,
+                               max_pages: int,
+                               formats: List[str],
+                               journal: Optional[CrawlJournal] = None,
+                               previous_pages: Optional[Dict[str, Dict]] = None) -> int:
+        """
+        Páginas de busca que ainda custariam créditos: até `max_pages`,
+        menos as já concluídas no journal (--resume) e as válidas no cache.
+        Limite superior: o crawl pode parar antes (sem anúncios novos).
+        """
+        needed = 0
+        for page_num in range(1, max_pages + 1):
+            page_url = self.page_url(base_url, page_num)
+            if journal and previous_pages and journal.completed_files(previous_pages, page_url):
+                continue
+            if self.cache and self.cache.contains(page_url, formats, KIND_LISTING):
+                continue
+            needed += 1
+        return needed
+
+    def build_search_url(self,
+                         region: str,
+                         min_area: int,
+                         max_area: int,
+                         zone: str = "zona-norte",
+                         property_type: str = "apartamento",
+                         business_type: str = "residencial") -> str:
+        """Constrói URL de busca do VivaReal (mesmo formato do crawler original)."""
+        return (
+            f"https://www.vivareal.com.br/venda/sp/sao-paulo/{zone}/{region}/"
+            f"{property_type}_{business_type}/?tipos={property_type}&areaUtil={min_area}-{max_area}"
+        )
+
+    def save_page_contents(self, page_num: int, data: Dict) -> List[Path]:
+        """Salva HTML/Markdown de uma página. Retorna arquivos salvos (HTML primeiro)."""
+        files = []
+
+        html_content = data.get("html", "")
+        if html_content:
+            html_file = self.output_dir / f"page_{page_num:03d}.html"
+            with open(html_file, 'w', encoding='utf-8') as f:
+                f.write(html_content)
+            print(f"💾 Saved HTML: {html_file}")
+            files.append(html_file)
+
+        markdown_content = data.get("markdown", "")
+        if markdown_content:
+            md_file = self.output_dir / f"page_{page_num:03d}.md"
+            with open(md_file, 'w', encoding='utf-8') as f:
+                f.write(markdown_content)
+            print(f"💾 Saved Markdown: {md_file}")
+            files.append(md_file)
+
+        return files
+
     def crawl_vivareal(self,
                        region: str,
                        min_area: int,
                        max_area: int,
-                       max_pages: int = 10) -> List[Path]:
+                       max_pages: int = 10,
+                       min_count: Optional[int] = None,
+                       zone: str = "zona-norte",
+                       property_type: str = "apartamento",
+                       business_type: str = "residencial",
+                       formats: List[str] = ["html", "markdown"],
+                       resume: bool = False,
+                       compact_markdown: bool = True) -> List[Path]:
         """
         Crawl VivaReal usando Firecrawl.
 
+        Para antes de `max_pages` quando uma página não traz IDs de anúncio
+        novos ou quando `min_count` anúncios únicos foram coletados,
+        economizando créditos do Firecrawl.
+
+        Cada página é registrada em `crawl_journal.jsonl` assim que termina.
+        Com `resume=True`, páginas já concluídas (arquivos íntegros) são
+        reaproveitadas e apenas as que faltam ou falharam são buscadas.
+
+        Ao final, o cabeçalho/rodapé comum das páginas Markdown é guardado
+        uma vez em boilerplate.json e removido de cada página (reversível
+        com tools/markdown_boilerplate.py --restore).
+
         Args:
             region: Região (slug do VivaReal)
             min_area: Área mínima
             max_area: Área máxima
             max_pages: Número de páginas
+            min_count: Parar ao atingir este número de anúncios únicos
+            zone: Zona da cidade no path da URL
+            property_type: Tipologia (apartamento, casa, ...)
+            business_type: residencial ou comercial
+            formats: Formatos pedidos ao Firecrawl
+            resume: Retomar crawl anterior a partir do journal
+            compact_markdown: Remover o boilerplate comum das páginas Markdown
+
+        Com orçamento configurado, as páginas que faltam são estimadas e
+        reservadas antes de começar (detalhes não podem usar essa reserva) e
+        o crawl para quando o orçamento acaba.
 
         Returns:
-            Lista de arquivos salvos
+            Lista de arquivos salvos (um por página; HTML se disponível)
         """
         print(f"\n🔥 Firecrawl Crawl - VivaReal")
         print(f"   Região: {region}")
-        print(f"   Área: {min_area}-{max_area} m²\n")
+        print(f"   Área: {min_area}-{max_area} m²")
+        if resume:
+            print(f"   ♻️  Retomando a partir do journal")
+        print()
 
-        # Construir URL base (mesmo formato do crawler original)
-        base_url = (
-            f"https://www.vivareal.com.br/venda/sp/sao-paulo/zona-norte/{region}/"
-            f"apartamento_residencial/?tipos=apartamento&areaUtil={min_area}-{max_area}"
+        base_url = self.build_search_url(
+            region, min_area, max_area, zone, property_type, business_type
         )
 
-        saved_files = []
+        # Páginas compactadas voltam ao original: o journal confere os hashes
+        # dos arquivos completos e o boilerplate é recalculado no final
+        boilerplate = BoilerplateStore(self.output_dir)
+        boilerplate.restore()
 
-        for page_num in range(1, max_pages + 1):
-            # Construir URL da página
-            if page_num == 1:
-                page_url = base_url
-            else:
-                page_url = f"{base_url}&pagina={page_num}"
+        journal = CrawlJournal(self.output_dir / "crawl_journal.jsonl")
+        previous_pages = journal.load_pages() if resume else {}
+        journal.start(resume=resume, base_url=base_url, max_pages=max_pages)
 
-            # Scrape usando Firecrawl
-            result = self.scrape_url(page_url, formats=["html", "markdown"])
+        if self.budget:
+            needed = self.estimate_listing_pages(base_url, max_pages, formats, journal, previous_pages)
+            self.budget.print_estimate(self.budget.estimate(listing_pages=needed))
+            self.budget.reserve(KIND_LISTING, needed)
+            print()
 
-            if not result.get("success"):
-                print(f"⚠️  Falhou na página {page_num}: {result.get('error')}")
-                if page_num == 1:
-                    # Se primeira página falhar, abortar
-                    break
-                continue
+        saved_files = []
+        tracker = NoveltyTracker(min_count=min_count)
+        stop_reason = STOP_MAX_PAGES
+        scraped = 0
 
-            # Salvar HTML
-            data = result.get("data", {})
-            html_content = data.get("html", "")
-            markdown_content = data.get("markdown", "")
+        for page_num in range(1, max_pages + 1):
+            page_url = self.page_url(base_url, page_num)
 
-            if html_content:
-                html_file = self.output_dir / f"page_{page_num:03d}.html"
-                with open(html_file, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                print(f"💾 Saved HTML: {html_file}")
-                saved_files.append(html_file)
+            page_files = journal.completed_files(previous_pages, page_url)
 
-            if markdown_content:
-                md_file = self.output_dir / f"page_{page_num:03d}.md"
-                with open(md_file, 'w', encoding='utf-8') as f:
-                    f.write(markdown_content)
-                print(f"💾 Saved Markdown: {md_file}")
+            if page_files:
+                print(f"⏭️  Página {page_num} já concluída, pulando")
+                data = None
+                content = page_files[0].read_text(encoding='utf-8')
+            else:
+                # Scrape usando Firecrawl
+                try:
+                    result = self.scrape_url(page_url, formats=formats, kind=KIND_LISTING)
+                except BudgetExceeded as e:
+                    print(f"⏹️  Página {page_num}: {e}")
+                    stop_reason = STOP_BUDGET
+                    break
+                if not result.get("from_cache"):
+                    scraped += 1
+
+                if not result.get("success"):
+                    print(f"⚠️  Falhou na página {page_num}: {result.get('error')}")
+                    journal.record_page(page_num, page_url, STATUS_FAILED,
+                                        error=str(result.get("error")))
+                    if page_num == 1:
+                        # Se primeira página falhar, abortar
+                        stop_reason = STOP_FETCH_ERROR
+                        break
+                    continue
+
+                data = result.get("data", {})
+                content = data.get("html", "") or data.get("markdown", "")
+
+            page_stop = tracker.observe(content)
+            if page_stop == STOP_NO_NEW_LISTINGS:
+                print(f"⏹️  Página {page_num} sem anúncios novos, parando")
+                journal.record_page(page_num, page_url, STOP_NO_NEW_LISTINGS)
+                stop_reason = page_stop
+                break
+
+            if data is not None:
+                page_files = self.save_page_contents(page_num, data)
+                journal.record_page(page_num, page_url, STATUS_OK, files=page_files)
+
+            if page_files:
+                saved_files.append(page_files[0])
+
+            if page_stop == STOP_MIN_COUNT:
+                print(f"⏹️  Meta de {min_count} anúncios atingida na página {page_num}")
+                stop_reason = page_stop
+                break
+
+        if self.budget:
+            # Parada antecipada libera o que sobrou da reserva
+            self.budget.reserve(KIND_LISTING, 0)
+
+        if compact_markdown and "markdown" in formats:
+            boilerplate.compact()
 
         print(f"\n✅ Firecrawl concluído! {len(saved_files)} páginas salvas")
+        print(f"   🔥 Scrapes nesta execução: {scraped}")
+        if self.cache:
+            self.cache.print_stats()
+        if self.budget:
+            self.budget.print_summary()
+        print(f"   🛑 Motivo da parada: {stop_reason}")
 
         # Salvar metadata
         metadata = {
             "engine": "firecrawl",
             "region": region,
+            "zone": zone,
             "min_area": min_area,
             "max_area": max_area,
             "pages_crawled": len(saved_files),
+            "pages_scraped": scraped,
+            "unique_listings": len(tracker.seen),
+            "stop_reason": stop_reason,
             "files": [str(f) for f in saved_files]
         }
 
@@ -174,15 +640,48 @@ def main():
 
     parser = argparse.ArgumentParser(description="Firecrawl VivaReal Integration")
     parser.add_argument("--api-key", help="Firecrawl API key (ou use FIRECRAWL_API_KEY env)")
+    parser.add_argument("--api-url", help="URL base da API (ou use FIRECRAWL_API_URL env)")
     parser.add_argument("--region", default="freguesia-do-o", help="Região")
     parser.add_argument("--min-area", type=int, default=40)
     parser.add_argument("--max-area", type=int, default=45)
     parser.add_argument("--max-pages", type=int, default=10)
+    parser.add_argument("--min-count", type=int, help="Parar ao coletar N anúncios únicos")
+    parser.add_argument("--zone", default="zona-norte", help="Zona (zona-norte, zona-sul, ...)")
+    parser.add_argument("--property-type", default="apartamento", help="Tipologia do imóvel")
+    parser.add_argument("--business-type", default="residencial", help="residencial ou comercial")
+    parser.add_argument("--formats", default="html,markdown", help="Formatos separados por vírgula")
+    parser.add_argument("--output", default="data/raw", help="Diretório de saída")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retomar crawl: pula páginas concluídas e refaz as que falharam")
+    parser.add_argument("--no-compact", action="store_true",
+                        help="Não remover o cabeçalho/rodapé comum das páginas Markdown")
     parser.add_argument("--test-url", help="Testar scrape de uma URL específica")
+    parser.add_argument("--cache-dir", default="data/cache/scrape", help="Cache de respostas do Firecrawl")
+    parser.add_argument("--no-cache", action="store_true", help="Desativar o cache de respostas")
+    parser.add_argument("--budget", type=float,
+                        help="Máximo de créditos Firecrawl nesta execução (ou FIRECRAWL_BUDGET env)")
+    parser.add_argument("--ledger", default="data/cache/firecrawl_ledger.jsonl",
+                        help="Ledger JSONL de custo/latência por chamada")
+    parser.add_argument("--estimate", action="store_true",
+                        help="Só estimar os créditos necessários, sem fazer scrape")
 
     args = parser.parse_args()
 
-    crawler = FirecrawlCrawler(api_key=args.api_key)
+    cache = None if args.no_cache else ScrapeCache(args.cache_dir)
+    budget = budget_from_env(ledger_path=args.ledger, max_credits=args.budget)
+    crawler = FirecrawlCrawler(api_key=args.api_key, output_dir=args.output,
+                               api_url=args.api_url, cache=cache, budget=budget)
+
+    if args.estimate:
+        base_url = crawler.build_search_url(
+            args.region, args.min_area, args.max_area, args.zone,
+            args.property_type, args.business_type
+        )
+        needed = crawler.estimate_listing_pages(base_url, args.max_pages, args.formats.split(","))
+        print(f"🧮 {args.region}: até {needed} de {args.max_pages} páginas de busca fora do cache")
+        estimate = budget.estimate(listing_pages=needed)
+        budget.print_estimate(estimate)
+        sys.exit(0 if estimate["fits"] else 1)
 
     if args.test_url:
         # Modo de teste
@@ -200,7 +699,14 @@ def main():
             region=args.region,
             min_area=args.min_area,
             max_area=args.max_area,
-            max_pages=args.max_pages
+            max_pages=args.max_pages,
+            min_count=args.min_count,
+            zone=args.zone,
+            property_type=args.property_type,
+            business_type=args.business_type,
+            formats=args.formats.split(","),
+            resume=args.resume,
+            compact_markdown=not args.no_compact
         )
 
 
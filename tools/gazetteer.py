@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Tool: Gazetteer
+Geocoder offline para São Paulo: resolve o endereço montado por
+AddressExtractor.extract_address_from_markdown ("Rua X - Bairro, São
+Paulo - SP") sem chamar APIs.
+
+Índices em memória:
+- trie de palavras com os nomes normalizados das ruas (normalize_address);
+  a rua só é aceita se o nome inteiro estiver no índice (sobrando no
+  máximo o número: "Rua X 120" encontra "Rua X", mas "Rua Santa Cruz da
+  Boa Vista" não vira "Rua Santa Cruz")
+- por rua, centróide em cada bairro; a rua só vale no bairro informado
+- centróides de bairro (embutidos: neighborhoods.py; mais os do
+  arquivo)
+
+Arquivo do usuário (CSV, UTF-8), ex. extraído do OpenStreetMap:
+    name,neighborhood,lat,lng
+    Rua Itaúna,Freguesia do Ó,-23.4990,-46.7012
+    ,Freguesia do Ó,-23.4983,-46.7031      ← linha sem nome = centróide do bairro
+
+Várias linhas da mesma rua no mesmo bairro (trechos) são promediadas.
+
+    python tools/gazetteer.py --file data/gazetteer/sp.csv --lookup "Rua Itaúna - Freguesia do Ó, São Paulo - SP"
+"""
+
+import csv
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from geocode_cache import normalize_address
+from neighborhoods import NEIGHBORHOOD_COORDINATES
+
+PRECISION_STREET = "street"
+PRECISION_NEIGHBORHOOD = "neighborhood"
+
+# Primeira palavra (normalizada) que indica um logradouro
+STREET_WORDS = {
+    "rua", "avenida", "alameda", "travessa", "praca", "estrada", "rodovia",
+    "largo", "viela", "ladeira", "viaduto", "passagem", "beco", "via",
+}
+
+# Trechos finais que não ajudam a localizar dentro da cidade
+CITY_SEGMENTS = {"sao paulo", "sp", "brasil", "brazil"}
+
+_TERMINAL = "\0"
+
+
+def _normalize_name(name: str) -> str:
+    """Nome normalizado de rua ou bairro (slug "freguesia-do-o" vira "freguesia do o")."""
+    return normalize_address((name or "").replace("-", " ")).replace(",", "")
+
+
+def split_address(address: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (rua, bairro) normalizados de um endereço.
+
+    >>> split_address("R. Itaúna, 120 - Freguesia do Ó, São Paulo - SP")
+    ('rua itauna', 'freguesia do o')
+    >>> split_address("Freguesia Do O, São Paulo - SP")
+    (None, 'freguesia do o')
+    """
+    segments = [
+        segment for segment in normalize_address(address).split(", ")
+        if segment and segment not in CITY_SEGMENTS and not segment.replace(" ", "").isdigit()
+    ]
+    if not segments:
+        return None, None
+    if segments[0].split(" ", 1)[0] in STREET_WORDS:
+        return segments[0], (segments[1] if len(segments) > 1 else None)
+    return None, segments[0]
+
+
+class Gazetteer:
+    """Índice em memória de ruas e bairros."""
+
+    def __init__(self, path: Optional[str] = None, include_builtin: bool = True):
+        """
+        Args:
+            path: CSV de ruas/bairros (opcional)
+            include_builtin: Incluir os centróides de bairro de neighborhoods.py
+        """
+        self.trie: Dict = {}
+        self.neighborhoods: Dict[str, Tuple[float, float]] = {}
+        self.streets = 0
+
+        if include_builtin:
+            for slug, coords in NEIGHBORHOOD_COORDINATES.items():
+                self.neighborhoods[_normalize_name(slug)] = (coords["lat"], coords["lng"])
+
+        if path:
+            self.load(Path(path))
+
+    def _add_street(self, name: str, neighborhood: str, lat: float, lng: float):
+        node = self.trie
+        for word in name.split(" "):
+            node = node.setdefault(word, {})
+        # Terminal: bairro → [soma lat, soma lng, n]
+        by_neighborhood = node.setdefault(_TERMINAL, {})
+        if not by_neighborhood:
+            self.streets += 1
+        total = by_neighborhood.setdefault(neighborhood, [0.0, 0.0, 0])
+        total[0] += lat
+        total[1] += lng
+        total[2] += 1
+
+    def load(self, path: Path):
+        """Carrega um CSV name,neighborhood,lat,lng."""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                try:
+                    lat, lng = float(row["lat"]), float(row["lng"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                neighborhood = _normalize_name(row.get("neighborhood", ""))
+                name = _normalize_name(row.get("name", ""))
+                if name:
+                    self._add_street(name, neighborhood, lat, lng)
+                elif neighborhood:
+                    self.neighborhoods[neighborhood] = (lat, lng)
+
+        print(f"🗺️  Gazetteer: {self.streets} ruas, {len(self.neighborhoods)} bairros ({path})")
+
+    def _match_street(self, street: str) -> Optional[Dict[str, List]]:
+        """
+        Rua do índice com o nome completo (bairro → soma), ou None.
+
+        Depois do nome só podem sobrar números (número da casa); um
+        prefixo do nome ("Rua Santa Cruz" para "Rua Santa Cruz da Boa
+        Vista") não conta.
+        """
+        node = self.trie
+        found = None
+        words = street.split(" ")
+        for consumed, word in enumerate(words, 1):
+            node = node.get(word)
+            if node is None:
+                break
+            if _TERMINAL in node and all(rest.isdigit() for rest in words[consumed:]):
+                found = node[_TERMINAL]
+        return found
+
+    def lookup(self, address: str) -> Optional[Dict]:
+        """
+        Coordenadas locais do endereço.
+
+        - nome completo da rua encontrado no bairro informado → precisão
+          "street"
+        - senão, centróide do bairro → precisão "neighborhood" (para
+          endereço com rua, o extractor ainda consulta os provedores)
+
+        Returns:
+            {"lat", "lng", "provider": "gazetteer", "precision"} ou None
+        """
+        street, neighborhood = split_address(address)
+
+        if street:
+            by_neighborhood = self._match_street(street)
+            if by_neighborhood and neighborhood:
+                total = by_neighborhood.get(neighborhood)
+                if total is not None:
+                    return {"lat": total[0] / total[2], "lng": total[1] / total[2],
+                            "provider": "gazetteer", "precision": PRECISION_STREET}
+
+        centroid = self.neighborhoods.get(neighborhood) if neighborhood else None
+        if centroid:
+            return {"lat": centroid[0], "lng": centroid[1],
+                    "provider": "gazetteer", "precision": PRECISION_NEIGHBORHOOD}
+
+        return None
+
+
+def gazetteer_from_env(path: Optional[str] = None) -> Gazetteer:
+    """Gazetteer do argumento ou de GAZETTEER_FILE (sem arquivo = só bairros embutidos)."""
+    return Gazetteer(path or os.getenv("GAZETTEER_FILE") or None)
+
+
+def main():
+    """CLI para execução standalone."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Geocoder offline (gazetteer local)")
+    parser.add_argument("--file", help="CSV name,neighborhood,lat,lng (ou use GAZETTEER_FILE env)")
+    parser.add_argument("--lookup", action="append", default=[], help="Endereço a resolver (repetível)")
+
+    args = parser.parse_args()
+
+    gazetteer = gazetteer_from_env(args.file)
+    print(f"   {gazetteer.streets} ruas, {len(gazetteer.neighborhoods)} bairros no índice\n")
+
+    for address in args.lookup:
+        started_at = time.perf_counter()
+        result = gazetteer.lookup(address)
+        elapsed_us = (time.perf_counter() - started_at) * 1e6
+        if result:
+            print(f"📍 {address}\n   {result['lat']:.6f}, {result['lng']:.6f} "
+                  f"({result['precision']}, {elapsed_us:.0f} µs)")
+        else:
+            print(f"❌ {address}\n   não encontrado ({elapsed_us:.0f} µs)")
+
+
+if __name__ == "__main__":
+    main()
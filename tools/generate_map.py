@@ -2,38 +2,75 @@
 """
 Tool: Map Generator
 Gera visualização dos anúncios no Google Maps.
+
+Arquivos gerados na pasta do relatório:
+- mapa.html: página (sem dados embutidos)
+- markers.js: lat/lng/preço/área/preço-m²/bairro de cada pin, colunar e
+  comprimido (map_payload.py), decodificado uma vez ao abrir
+- marker_details.js: link e endereço, carregado só no primeiro clique
+- clusters.js: pins agrupados por zoom (map_clusters.py); a página só
+  desenha os clusters/anúncios do viewport
 """
 
 import os
 import json
 import re
+import sys
+import zlib
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).parent))
+from listing_ids import listing_id_from_url
+from map_clusters import build_clusters, write_clusters_js
+from map_payload import DECODE_JS, dictionary_encode, write_payload_js
+from neighborhoods import DEFAULT_COORDINATES, NEIGHBORHOOD_COORDINATES
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Deslocamento máximo (graus) dos pins sem coordenadas reais, para não se sobreporem
+JITTER = 0.005
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """Mistura de bits (SplitMix64) de um array uint64."""
+    with np.errstate(over='ignore'):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def listing_jitter(links: List[str], scale: float = JITTER) -> np.ndarray:
+    """
+    Deslocamento (lat, lng) de cada anúncio em [-scale, scale), derivado
+    do ID do anúncio (ou CRC32 da URL): o mesmo anúncio cai sempre no
+    mesmo ponto, entre execuções e independente dos outros anúncios.
+
+    Returns:
+        Array (2, n)
+    """
+    def key(link: str) -> int:
+        listing_id = listing_id_from_url(link)
+        return int(listing_id) & 0xFFFFFFFFFFFFFFFF if listing_id else zlib.crc32(link.encode('utf-8'))
+
+    keys = np.fromiter((key(link) for link in links), dtype=np.uint64, count=len(links))
+    first = _splitmix64(keys)
+    second = _splitmix64(first)
+    # 53 bits altos → uniforme em [0, 1)
+    uniform = (np.stack([first, second]) >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+    return (uniform * 2 - 1) * scale
+
+
 class MapGenerator:
     """Gerador de mapas HTML com Google Maps."""
 
     # Coordenadas aproximadas dos bairros de SP
-    COORDINATES = {
-        "interlagos": {"lat": -23.6797, "lng": -46.6893},
-        "socorro": {"lat": -23.6425, "lng": -46.6947},
-        "vila-mariana": {"lat": -23.5871, "lng": -46.6364},
-        "moema": {"lat": -23.6011, "lng": -46.6664},
-        "pinheiros": {"lat": -23.5629, "lng": -46.6979},
-        "santana": {"lat": -23.5065, "lng": -46.6290},
-        "tatuape": {"lat": -23.5403, "lng": -46.5766},
-        "freguesia-do-o": {"lat": -23.4983, "lng": -46.7031},
-        "brooklin": {"lat": -23.6069, "lng": -46.6950},
-        "campo-belo": {"lat": -23.6155, "lng": -46.6726},
-        "perdizes": {"lat": -23.5344, "lng": -46.6718},
-        "lapa": {"lat": -23.5279, "lng": -46.7082},
-        "mooca": {"lat": -23.5554, "lng": -46.5989},
-        "penha": {"lat": -23.5290, "lng": -46.5419},
-    }
+    COORDINATES = NEIGHBORHOOD_COORDINATES
 
     def __init__(self, input_file: str = "data/processed/listings.json",
                  output_dir: str = "reports",
@@ -45,6 +82,7 @@ class MapGenerator:
         self.region = region
         self.min_area = min_area
         self.max_area = max_area
+        self.payload_sizes: Dict[str, int] = {}
 
         # Criar pasta estruturada se tiver região e tamanho
         self.output_dir = self._create_structured_folder()
@@ -86,16 +124,52 @@ class MapGenerator:
         return None
 
     def get_coordinates(self, region: str) -> Dict[str, float]:
-        """Retorna coordenadas do bairro ou coordenadas padrão de SP."""
-        if not region:
-            return {"lat": -23.5505, "lng": -46.6333}  # Centro de SP
-
-        coords = self.COORDINATES.get(region)
-        if coords:
-            return coords
-
-        # Coordenadas padrão de SP
-        return {"lat": -23.5505, "lng": -46.6333}
+        """Retorna coordenadas do bairro ou coordenadas padrão de SP (cópia)."""
+        return dict(self.COORDINATES.get(region) or DEFAULT_COORDINATES)
+
+    def resolve_coordinates(self,
+                            listings: List[Dict],
+                            url_regions: Optional[List[Optional[str]]] = None
+                            ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Coordenadas de todos os anúncios de uma vez.
+
+        Anúncios com 'coordinates' usam as reais; os demais, o centróide do
+        bairro da URL (índice em COORDINATES, ou o centro de SP) mais o
+        deslocamento determinístico de listing_jitter.
+
+        Args:
+            listings: Anúncios
+            url_regions: extract_region de cada link, se já calculado
+
+        Returns:
+            (lat, lng, tem coordenada real)
+        """
+        count = len(listings)
+        real = [listing.get('coordinates') for listing in listings]
+        has_real = np.fromiter((bool(coords) for coords in real), dtype=bool, count=count)
+        lat = np.fromiter((coords['lat'] if coords else np.nan for coords in real), dtype=np.float64, count=count)
+        lng = np.fromiter((coords['lng'] if coords else np.nan for coords in real), dtype=np.float64, count=count)
+
+        fallback = np.flatnonzero(~has_real)
+        if fallback.size:
+            # Centróides: bairros de COORDINATES e, na última linha, o padrão
+            index = {region: i for i, region in enumerate(self.COORDINATES)}
+            centroids = np.array(
+                [[c["lat"], c["lng"]] for c in self.COORDINATES.values()]
+                + [[DEFAULT_COORDINATES["lat"], DEFAULT_COORDINATES["lng"]]]
+            )
+            links = [listings[i]['link'] for i in fallback]
+            regions = ([url_regions[i] for i in fallback] if url_regions is not None
+                       else [self.extract_region(link) for link in links])
+            region_index = np.fromiter((index.get(region, len(index)) for region in regions),
+                                       dtype=np.intp, count=fallback.size)
+
+            jitter = listing_jitter(links)
+            lat[fallback] = centroids[region_index, 0] + jitter[0]
+            lng[fallback] = centroids[region_index, 1] + jitter[1]
+
+        return lat, lng, has_real
 
     def load_listings(self) -> List[Dict]:
         """Carrega anúncios do JSON."""
@@ -113,49 +187,47 @@ class MapGenerator:
         # Obter chave do Google Maps do .env
         google_maps_key = os.getenv("GOOGLE_MAPS_API_KEY", "YOUR_API_KEY_HERE")
 
-        # Preparar dados para o mapa
-        markers_data = []
-        has_real_coords = 0
+        # Coordenadas (reais ou centróide do bairro + deslocamento por ID)
+        url_regions = [self.extract_region(listing['link']) for listing in listings]
+        lat, lng, has_real = self.resolve_coordinates(listings, url_regions)
+        print(f"📍 {int(has_real.sum())}/{len(listings)} anúncios com coordenadas reais")
 
-        for listing in listings:
-            # Usar coordenadas reais se disponíveis
-            if 'coordinates' in listing and listing['coordinates']:
-                coords = listing['coordinates']
-                has_real_coords += 1
-            else:
-                # Fallback para coordenadas aproximadas
-                region = self.extract_region(listing['link'])
-                coords = self.get_coordinates(region)
-
-                # Adicionar pequena variação aleatória para evitar sobreposição
-                import random
-                coords['lat'] += random.uniform(-0.005, 0.005)
-                coords['lng'] += random.uniform(-0.005, 0.005)
-
-            # Pegar endereço se disponível
-            address_info = listing.get('address', {})
-            full_address = address_info.get('full_address', 'Endereço não disponível')
-            region = address_info.get('neighborhood', self.extract_region(listing['link']) or "Desconhecido")
-
-            marker = {
-                "lat": coords['lat'],
-                "lng": coords['lng'],
-                "price": listing['price'],
-                "area": listing['area'],
-                "price_per_sqm": listing['price_per_sqm'],
-                "link": listing['link'],
-                "region": region,
-                "address": full_address
-            }
-
-            markers_data.append(marker)
+        # Endereço e bairro, se disponíveis
+        addresses_info = [listing.get('address') or {} for listing in listings]
+        full_addresses = [info.get('full_address', 'Endereço não disponível') for info in addresses_info]
+        regions = [info.get('neighborhood') or url_region or "Desconhecido"
+                   for info, url_region in zip(addresses_info, url_regions)]
+        price_per_sqm = [listing['price_per_sqm'] for listing in listings]
 
         # Calcular centro do mapa (média das coordenadas)
-        if markers_data:
-            center_lat = sum(m['lat'] for m in markers_data) / len(markers_data)
-            center_lng = sum(m['lng'] for m in markers_data) / len(markers_data)
+        if len(listings):
+            center_lat, center_lng = float(lat.mean()), float(lng.mean())
         else:
-            center_lat, center_lng = -23.5505, -46.6333
+            center_lat, center_lng = DEFAULT_COORDINATES["lat"], DEFAULT_COORDINATES["lng"]
+
+        # Clusters por zoom (mesma ordem dos pins)
+        clusters = build_clusters(lat, lng, price_per_sqm)
+        write_clusters_js(self.output_dir / "clusters.js", clusters)
+
+        # Pins em colunas; link/endereço à parte, carregados no primeiro clique
+        region_codes, region_names = dictionary_encode(regions)
+        address_codes, addresses = dictionary_encode(full_addresses)
+        self.payload_sizes = {
+            "markers.js": write_payload_js(self.output_dir / "markers.js", "MAP_MARKERS", {
+                "lat": np.round(lat, 6).tolist(),
+                "lng": np.round(lng, 6).tolist(),
+                "price": [listing['price'] for listing in listings],
+                "area": [listing['area'] for listing in listings],
+                "price_per_sqm": price_per_sqm,
+                "region": region_codes,
+                "regions": region_names,
+            }),
+            "marker_details.js": write_payload_js(self.output_dir / "marker_details.js", "MAP_MARKER_DETAILS", {
+                "link": [listing['link'] for listing in listings],
+                "address": address_codes,
+                "addresses": addresses,
+            }),
+        }
 
         # Gerar HTML
         html_content = f"""<!DOCTYPE html>
@@ -216,12 +288,13 @@ class MapGenerator:
 <body>
     <div class="info-header">
         <h1>🏢 Mapa de Imóveis - {region_name}</h1>
-        <p>📊 {len(markers_data)} anúncios | 💰 Clique nos pins para detalhes</p>
+        <p>📊 {len(listings)} anúncios | 💰 Clique nos pins para detalhes, nos grupos para aproximar</p>
     </div>
     <div id="map"></div>
 
     <script>
-        function initMap() {{
+{DECODE_JS}
+        async function initMap() {{
             // Configurar mapa
             const map = new google.maps.Map(document.getElementById('map'), {{
                 center: {{ lat: {center_lat}, lng: {center_lng} }},
@@ -235,17 +308,52 @@ class MapGenerator:
                 ]
             }});
 
-            // Dados dos anúncios
-            const listings = {json.dumps(markers_data, ensure_ascii=False)};
+            // Dados dos anúncios (colunas: listings.lat[i], listings.price[i], ...)
+            const listings = await decodePayload(window.MAP_MARKERS);
+            const clusters = window.MAP_CLUSTERS;
+            const infoWindow = new google.maps.InfoWindow();
+            let visible = [];
+            let openListing = -1;
+
+            // Link e endereço: marker_details.js só é baixado no primeiro clique
+            let details = null;
+            function loadDetails() {{
+                if (!details) {{
+                    details = new Promise((resolve, reject) => {{
+                        const script = document.createElement('script');
+                        script.src = 'marker_details.js';
+                        script.onload = resolve;
+                        script.onerror = reject;
+                        document.head.appendChild(script);
+                    }}).then(() => decodePayload(window.MAP_MARKER_DETAILS));
+                }}
+                return details;
+            }}
 
-            // Adicionar marcadores
-            listings.forEach((listing, index) => {{
+            function infoContent(i, detail) {{
+                const address = detail ? detail.addresses[detail.address[i]] : 'Carregando...';
+                const link = detail ? `<a href="${{detail.link[i]}}" target="_blank">Ver Anúncio →</a>` : '';
+                return `
+                    <div class="info-window">
+                        <h3>R$ ${{listings.price[i].toLocaleString('pt-BR')}}</h3>
+                        <p><strong>📏 Área:</strong> ${{listings.area[i]}} m²</p>
+                        <p><strong>💰 Valor/m²:</strong> R$ ${{listings.price_per_sqm[i].toLocaleString('pt-BR')}}/m²</p>
+                        <p><strong>🏘️ Bairro:</strong> ${{listings.regions[listings.region[i]]}}</p>
+                        <p><strong>📍 Endereço:</strong> ${{address}}</p>
+                        ${{link}}
+                    </div>
+                `;
+            }}
+
+            // Pin de um anúncio
+            function listingMarker(i) {{
+                const price = listings.price[i];
                 const marker = new google.maps.Marker({{
-                    position: {{ lat: listing.lat, lng: listing.lng }},
+                    position: {{ lat: listings.lat[i], lng: listings.lng[i] }},
                     map: map,
-                    title: `R$ ${{listing.price.toLocaleString('pt-BR')}}`,
+                    title: `R$ ${{price.toLocaleString('pt-BR')}}`,
                     label: {{
-                        text: `${{(listing.price / 1000).toFixed(0)}}k`,
+                        text: `${{(price / 1000).toFixed(0)}}k`,
                         color: 'white',
                         fontSize: '12px',
                         fontWeight: 'bold'
@@ -253,32 +361,84 @@ class MapGenerator:
                     icon: {{
                         path: google.maps.SymbolPath.CIRCLE,
                         scale: 15,
-                        fillColor: getColorByPrice(listing.price_per_sqm),
+                        fillColor: getColorByPrice(listings.price_per_sqm[i]),
                         fillOpacity: 0.8,
                         strokeColor: 'white',
                         strokeWeight: 2
                     }}
                 }});
 
-                // Info window
-                const infoContent = `
-                    <div class="info-window">
-                        <h3>R$ ${{listing.price.toLocaleString('pt-BR')}}</h3>
-                        <p><strong>📏 Área:</strong> ${{listing.area}} m²</p>
-                        <p><strong>💰 Valor/m²:</strong> R$ ${{listing.price_per_sqm.toLocaleString('pt-BR')}}/m²</p>
-                        <p><strong>📍 Endereço:</strong> ${{listing.address}}</p>
-                        <a href="${{listing.link}}" target="_blank">Ver Anúncio →</a>
-                    </div>
-                `;
+                marker.addListener('click', () => {{
+                    openListing = i;
+                    infoWindow.setContent(infoContent(i, null));
+                    infoWindow.open(map, marker);
+                    loadDetails()
+                        .then(detail => {{ if (openListing === i) infoWindow.setContent(infoContent(i, detail)); }})
+                        .catch(() => {{ details = null; }});
+                }});
+                return marker;
+            }}
 
-                const infoWindow = new google.maps.InfoWindow({{
-                    content: infoContent
+            // Grupo de anúncios: quantidade e mediana do preço/m²
+            function clusterMarker(level, i) {{
+                const count = level.count[i];
+                const median = level.median[i];
+                const marker = new google.maps.Marker({{
+                    position: {{ lat: level.lat[i], lng: level.lng[i] }},
+                    map: map,
+                    title: `${{count}} anúncios | mediana R$ ${{median.toLocaleString('pt-BR')}}/m²`,
+                    label: {{
+                        text: `${{count}} · ${{(median / 1000).toFixed(1)}}k`,
+                        color: 'white',
+                        fontSize: '11px',
+                        fontWeight: 'bold'
+                    }},
+                    icon: {{
+                        path: google.maps.SymbolPath.CIRCLE,
+                        scale: 30 + Math.min(12, 3 * Math.log10(count)),
+                        fillColor: getColorByPrice(median),
+                        fillOpacity: 0.85,
+                        strokeColor: 'white',
+                        strokeWeight: 2
+                    }}
                 }});
 
                 marker.addListener('click', () => {{
-                    infoWindow.open(map, marker);
+                    map.setCenter(marker.getPosition());
+                    map.setZoom(map.getZoom() + 2);
                 }});
-            }});
+                return marker;
+            }}
+
+            // Redesenhar só o que está no viewport (clusters até max_zoom)
+            function render() {{
+                const bounds = map.getBounds();
+                if (!bounds) return;
+                visible.forEach(marker => marker.setMap(null));
+                visible = [];
+
+                const zoom = map.getZoom();
+                if (zoom > clusters.max_zoom) {{
+                    for (let i = 0; i < listings.lat.length; i++) {{
+                        if (bounds.contains({{ lat: listings.lat[i], lng: listings.lng[i] }})) {{
+                            visible.push(listingMarker(i));
+                        }}
+                    }}
+                    return;
+                }}
+
+                const level = clusters.levels[Math.max(zoom, clusters.min_zoom)];
+                if (!level) return;
+                for (let i = 0; i < level.count.length; i++) {{
+                    if (!bounds.contains({{ lat: level.lat[i], lng: level.lng[i] }})) continue;
+                    visible.push(level.single[i] >= 0
+                        ? listingMarker(level.single[i])
+                        : clusterMarker(level, i));
+                }}
+            }}
+
+            map.addListener('idle', render);
+            render();
 
             // Função para colorir pins por preço/m²
             function getColorByPrice(pricePerSqm) {{
@@ -290,6 +450,9 @@ class MapGenerator:
         }}
     </script>
 
+    <!-- Pins (colunar, comprimido) e clusters pré-calculados por zoom -->
+    <script src="markers.js"></script>
+    <script src="clusters.js"></script>
     <!-- Google Maps API -->
     <script src="https://maps.googleapis.com/maps/api/js?key={google_maps_key}&callback=initMap" async defer></script>
 </body>
@@ -325,6 +488,8 @@ class MapGenerator:
         map_file = self.generate_map_html(listings, main_region.title())
 
         print(f"\n✅ Mapa gerado: {map_file}")
+        sizes = {map_file.name: map_file.stat().st_size, **self.payload_sizes}
+        print("📦 " + ", ".join(f"{name} {size / 1024:.0f} KB" for name, size in sizes.items()))
         print(f"🌐 Abra em: file://{map_file.absolute()}")
 
         return map_file
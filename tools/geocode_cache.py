@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tool: Geocode Cache
+Cache persistente (SQLite) de geocoding, indexado pelo endereço
+normalizado: caixa, acentos, pontuação, espaços e abreviações de
+logradouro ("R.", "Av.", "Al.") não geram chaves diferentes.
+
+Cada entrada guarda provedor, precisão e data. Endereços sem resultado
+também são guardados (resultado negativo), com TTL menor, para não
+consultar os provedores de novo a cada execução.
+
+    python tools/geocode_cache.py --stats
+    python tools/geocode_cache.py --normalize "R. Itaúna, 100 - Freguesia do Ó"
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Optional
+
+DAY = 24 * 3600
+DEFAULT_TTL = 180 * DAY
+DEFAULT_NEGATIVE_TTL = 7 * DAY
+
+# Abreviações de tipo de logradouro (primeira palavra de cada trecho)
+STREET_TYPES = {
+    "r": "rua",
+    "av": "avenida",
+    "avda": "avenida",
+    "al": "alameda",
+    "tv": "travessa",
+    "trav": "travessa",
+    "pc": "praca",
+    "pca": "praca",
+    "pq": "parque",
+    "est": "estrada",
+    "estr": "estrada",
+    "rod": "rodovia",
+    "lgo": "largo",
+    "lg": "largo",
+    "vl": "vila",
+    "jd": "jardim",
+    "jrd": "jardim",
+}
+
+SEGMENT_SEPARATOR_RE = re.compile(r'\s*[,;\-–—/]\s*')
+NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_address(address: str) -> str:
+    """
+    Chave canônica de um endereço.
+
+    >>> normalize_address("R. Itaúna - Freguesia do Ó, São Paulo - SP")
+    'rua itauna, freguesia do o, sao paulo, sp'
+    """
+    text = unicodedata.normalize("NFKD", address or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+    segments = []
+    for segment in SEGMENT_SEPARATOR_RE.split(text):
+        words = NON_WORD_RE.sub(" ", segment).split()
+        if not words:
+            continue
+        words[0] = STREET_TYPES.get(words[0], words[0])
+        segments.append(" ".join(words))
+
+    return ", ".join(segments)
+
+
+class GeocodeCache:
+    """Resultados de geocoding por endereço normalizado."""
+
+    def __init__(self,
+                 path: str = "data/cache/geocode.sqlite",
+                 ttl: int = DEFAULT_TTL,
+                 negative_ttl: int = DEFAULT_NEGATIVE_TTL):
+        """
+        Args:
+            path: Arquivo SQLite
+            ttl: Validade de um resultado encontrado (segundos)
+            negative_ttl: Validade de um "não encontrado" (segundos)
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS geocodes (
+                key TEXT PRIMARY KEY,
+                address TEXT NOT NULL,
+                lat REAL,
+                lng REAL,
+                provider TEXT,
+                precision TEXT,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self.db.commit()
+
+    def contains(self, address: str) -> bool:
+        """Há entrada válida, positiva ou negativa (sem contar hit/miss)."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT 1 FROM geocodes WHERE key = ? AND expires_at > ?",
+                (normalize_address(address), time.time())
+            ).fetchone()
+        return row is not None
+
+    def get(self, address: str) -> Optional[Dict]:
+        """
+        Entrada válida para o endereço, ou None (miss).
+
+        Returns:
+            {"lat", "lng", "provider", "precision", "created_at"}; lat/lng
+            None indicam resultado negativo em cache
+        """
+        key = normalize_address(address)
+        with self.lock:
+            row = self.db.execute(
+                "SELECT lat, lng, provider, precision, created_at FROM geocodes "
+                "WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            lat, lng, provider, precision, created_at = row
+            return {"lat": lat, "lng": lng, "provider": provider,
+                    "precision": precision, "created_at": created_at}
+
+    def put(self, address: str, result: Optional[Dict]):
+        """
+        Guarda um resultado ({"lat", "lng", "provider", "precision"}) ou,
+        com `result=None`, um negativo com TTL curto.
+        """
+        now = time.time()
+        result = result or {}
+        found = result.get("lat") is not None
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO geocodes "
+                "(key, address, lat, lng, provider, precision, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_address(address), address, result.get("lat"), result.get("lng"),
+                 result.get("provider"), result.get("precision"),
+                 now, now + (self.ttl if found else self.negative_ttl))
+            )
+            self.db.commit()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            entries, negatives = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(lat IS NULL), 0) FROM geocodes WHERE expires_at > ?",
+                (time.time(),)
+            ).fetchone()
+            providers = dict(self.db.execute(
+                "SELECT COALESCE(provider, '-'), COUNT(*) FROM geocodes "
+                "WHERE expires_at > ? GROUP BY provider",
+                (time.time(),)
+            ).fetchall())
+        return {"hits": self.hits, "misses": self.misses, "entries": entries,
+                "negatives": negatives, "providers": providers}
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"   🗺️  Cache de geocoding: {stats['hits']} hits, {stats['misses']} misses; "
+              f"{stats['entries']} endereços ({stats['negatives']} sem resultado)")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def main():
+    """CLI para execução standalone."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cache de geocoding")
+    parser.add_argument("--db", default="data/cache/geocode.sqlite", help="Arquivo SQLite do cache")
+    parser.add_argument("--normalize", help="Mostrar a chave normalizada de um endereço")
+    parser.add_argument("--stats", action="store_true", help="Estatísticas do cache")
+
+    args = parser.parse_args()
+
+    if args.normalize:
+        print(normalize_address(args.normalize))
+    if args.stats or not args.normalize:
+        print(json.dumps(GeocodeCache(args.db).stats(), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
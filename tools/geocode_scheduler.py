@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Tool: Geocode Scheduler
+Agenda as consultas aos provedores de geocoding remotos (Google,
+Nominatim), cada um na sua faixa com limite de taxa próprio (TokenBucket):
+Nominatim exige no máximo 1 req/s, Google tem cota de QPS.
+
+- Ordem dos provedores configurável por precisão do endereço ("street"
+  para endereço com rua, "neighborhood" para só bairro)
+- Balanceamento: o primeiro provedor da ordem com token livre atende
+  (try_acquire); só se nenhum tiver token a chamada espera o preferido.
+  Com várias threads, a vazão chega à soma das cotas dos provedores
+- Hedge opcional: se o provedor não responde em `hedge_after` segundos,
+  o próximo da ordem é disparado em paralelo e vale o primeiro resultado
+- Sem resultado (ou erro), o próximo provedor é consultado em seguida
+- Métricas por provedor: chamadas, encontrados, vazios, erros, latência
+
+    python tools/extract_addresses.py --pipeline --nominatim-rps 1 --google-qps 10 --hedge-after 1.5
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from gazetteer import PRECISION_NEIGHBORHOOD, PRECISION_STREET
+from rate_limit import TokenBucket
+
+# Google é mais preciso para ruas; para bairros o Nominatim basta e poupa a cota
+DEFAULT_ORDER = {
+    PRECISION_STREET: ["google", "nominatim"],
+    PRECISION_NEIGHBORHOOD: ["nominatim", "google"],
+}
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ProviderLane:
+    """Um provedor de geocoding com seu limite de taxa e suas métricas."""
+
+    def __init__(self, name: str, fn: Callable[[str], Optional[Dict]], rate: float):
+        """
+        Args:
+            name: Nome do provedor ("google", "nominatim")
+            fn: Função endereço → {"lat", "lng", "provider", "precision"} ou
+                None (sem resultado); exceção = erro
+            rate: Requests por segundo permitidos
+        """
+        self.name = name
+        self.fn = fn
+        self.bucket = TokenBucket(rate, capacity=1)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.found = 0
+        self.empty = 0
+        self.errors = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.latencies: List[float] = []
+
+    def call(self, address: str) -> Tuple[Optional[Dict], Optional[Exception]]:
+        """Consulta o provedor (o token já deve ter sido obtido)."""
+        started_at = time.monotonic()
+        result, error = None, None
+        try:
+            result = self.fn(address)
+        except Exception as e:
+            error = e
+        latency = time.monotonic() - started_at
+
+        with self.lock:
+            self.calls += 1
+            self.latencies.append(latency)
+            if error is not None:
+                self.errors += 1
+            elif result:
+                self.found += 1
+            else:
+                self.empty += 1
+        return result, error
+
+    def stats(self) -> Dict:
+        with self.lock:
+            latencies = list(self.latencies)
+            stats = {"calls": self.calls, "found": self.found, "empty": self.empty,
+                     "errors": self.errors, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+        p50, p95 = _percentile(latencies, 0.5), _percentile(latencies, 0.95)
+        stats["success_rate"] = (stats["calls"] - stats["errors"]) / stats["calls"] if stats["calls"] else None
+        stats["latency_p50_ms"] = round(p50 * 1000) if p50 is not None else None
+        stats["latency_p95_ms"] = round(p95 * 1000) if p95 is not None else None
+        return stats
+
+
+class GeocodeScheduler:
+    """Distribui consultas de geocoding entre as faixas dos provedores."""
+
+    def __init__(self,
+                 lanes: List[ProviderLane],
+                 order: Optional[Dict[str, List[str]]] = None,
+                 hedge_after: Optional[float] = None,
+                 max_workers: int = 16):
+        """
+        Args:
+            lanes: Provedores disponíveis
+            order: Precisão → nomes dos provedores, em ordem de preferência
+                   (provedor fora da lista não é usado para essa precisão)
+            hedge_after: Segundos até disparar o próximo provedor em paralelo
+                         (None = sem hedge, só fallback sequencial)
+            max_workers: Threads para as chamadas aos provedores
+        """
+        self.lanes = {lane.name: lane for lane in lanes}
+        self.order = {**DEFAULT_ORDER, **(order or {})}
+        self.hedge_after = hedge_after
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="geocode")
+
+    def providers_for(self, precision: str) -> List[ProviderLane]:
+        names = self.order.get(precision) or list(self.lanes)
+        return [self.lanes[name] for name in names if name in self.lanes]
+
+    def _start(self, lanes: List[ProviderLane]) -> ProviderLane:
+        """Primeiro provedor com token livre; se nenhum, espera o preferido."""
+        for i, lane in enumerate(lanes):
+            if lane.bucket.try_acquire():
+                return lanes.pop(i)
+        lanes[0].bucket.acquire()
+        return lanes.pop(0)
+
+    def geocode(self, address: str, precision: str = PRECISION_STREET) -> Tuple[Optional[Dict], bool]:
+        """
+        Geocodifica nos provedores da precisão informada.
+
+        Returns:
+            (resultado ou None, se algum provedor falhou com erro); o
+            chamador usa o segundo valor para não cachear "não encontrado"
+            que pode ter sido erro
+        """
+        waiting = self.providers_for(precision)
+        if not waiting:
+            return None, False
+
+        failed = False
+        hedged = set()
+        lane = self._start(waiting)
+        running = {self.executor.submit(lane.call, address): lane}
+
+        while running:
+            can_hedge = self.hedge_after is not None and waiting
+            done, _ = wait(running, timeout=self.hedge_after if can_hedge else None,
+                           return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Provedor lento: dispara o próximo se ele tiver token agora
+                hedge = waiting[0]
+                if hedge.bucket.try_acquire():
+                    waiting.pop(0)
+                    hedged.add(hedge.name)
+                    with hedge.lock:
+                        hedge.hedges += 1
+                    running[self.executor.submit(hedge.call, address)] = hedge
+                continue
+
+            for future in done:
+                lane = running.pop(future)
+                result, error = future.result()
+                if result:
+                    if lane.name in hedged:
+                        with lane.lock:
+                            lane.hedge_wins += 1
+                    # Chamadas ainda em andamento terminam sozinhas (só métricas)
+                    return result, False
+                if error is not None:
+                    print(f"   ⚠️  Erro {lane.name}: {error}")
+                    failed = True
+
+            if not running and waiting:
+                lane = waiting.pop(0)
+                lane.bucket.acquire()
+                running[self.executor.submit(lane.call, address)] = lane
+
+        return None, failed
+
+    def stats(self) -> Dict[str, Dict]:
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+    def print_stats(self):
+        for name, stats in self.stats().items():
+            if not stats["calls"]:
+                continue
+            print(f"   🛰️  {name}: {stats['calls']} chamadas, {stats['found']} encontrados, "
+                  f"{stats['empty']} vazios, {stats['errors']} erros; "
+                  f"latência p50 {stats['latency_p50_ms']} ms, p95 {stats['latency_p95_ms']} ms"
+                  + (f"; {stats['hedges']} hedges ({stats['hedge_wins']} venceram)" if stats['hedges'] else ""))
+
+
+def parse_order(specs: List[str]) -> Dict[str, List[str]]:
+    """
+    Ordem de provedores a partir de "precisão=prov1,prov2".
+
+    >>> parse_order(["neighborhood=nominatim", "street=google,nominatim"])
+    {'neighborhood': ['nominatim'], 'street': ['google', 'nominatim']}
+    """
+    order = {}
+    for spec in specs:
+        precision, sep, names = spec.partition("=")
+        if not sep or not names.strip():
+            raise ValueError(f"ordem inválida: {spec!r} (use precisão=prov1,prov2)")
+        order[precision.strip()] = [name.strip() for name in names.split(",") if name.strip()]
+    return order
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tool: Resilient HTTP Client
+Cliente HTTP compartilhado por crawler, Firecrawl e geocoding:
+- sessão com pool de conexões keep-alive
+- retry com backoff exponencial + jitter em 429/5xx e erros de conexão
+- respeita o header Retry-After
+- circuit breaker por endpoint (host + path)
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Endpoint com circuito aberto: request nem é enviado."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples.
+
+    - closed: requests passam normalmente
+    - open: após `failure_threshold` falhas seguidas, bloqueia por
+      `reset_timeout` segundos
+    - half-open: depois do timeout, deixa passar um request de teste
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.half_open_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.half_open_in_flight:
+                self.half_open_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.half_open_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.half_open_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Converte Retry-After (segundos ou data HTTP) em segundos de espera."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class ResilientHTTPClient:
+    """Wrapper de requests.Session com retry, backoff e circuit breaker."""
+
+    def __init__(self,
+                 max_retries: int = 4,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 30.0,
+                 max_retry_after: float = 120.0,
+                 pool_size: int = 20,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        """
+        Args:
+            max_retries: Tentativas extras após a primeira
+            backoff_base: Base do backoff exponencial (segundos)
+            backoff_max: Teto de cada espera (segundos)
+            max_retry_after: Retry-After maior que isso não é aguardado
+            pool_size: Conexões keep-alive por host
+            failure_threshold: Falhas seguidas para abrir o circuito
+            reset_timeout: Tempo com circuito aberto antes do teste
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.lock = threading.Lock()
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        parts = urlsplit(url)
+        endpoint = f"{parts.netloc.lower()}{parts.path}"
+        with self.lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self.breakers[endpoint] = breaker
+            return breaker
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": espera aleatória entre 0 e o teto exponencial
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Envia request com retry.
+
+        Retorna a última resposta (mesmo com status de erro, para o caller
+        decidir com raise_for_status). Levanta CircuitOpenError se o
+        endpoint estiver bloqueado, ou a última exceção de conexão.
+        """
+        breaker = self.breaker_for(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuito aberto para {url}")
+
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    breaker.record_failure()
+                    raise
+                wait = self._backoff(attempt)
+                print(f"   🔁 {type(e).__name__}, nova tentativa em {wait:.1f}s")
+            except Exception:
+                # Sem retry, mas libera a sonda half-open (senão o circuito não fecha mais)
+                breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    breaker.record_success()
+                    return response
+
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if attempt >= self.max_retries or (
+                        retry_after is not None and retry_after > self.max_retry_after):
+                    breaker.record_failure()
+                    return response
+
+                wait = retry_after if retry_after is not None else self._backoff(attempt)
+                response.close()
+                print(f"   🔁 HTTP {response.status_code}, nova tentativa em {wait:.1f}s")
+
+            time.sleep(wait)
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+_default_client: Optional[ResilientHTTPClient] = None
+_default_lock = threading.Lock()
+
+
+def get_default_client() -> ResilientHTTPClient:
+    """Cliente compartilhado pelo processo (mesmo pool e mesmos circuitos)."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = ResilientHTTPClient()
+        return _default_client
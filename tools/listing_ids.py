@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tool: Listing IDs
+Extrai IDs de anúncios (segmento "id-NNNNNNN" das URLs /imovel/) e
+controla a novidade das páginas durante a paginação.
+"""
+
+import re
+from typing import List, Optional, Set
+
+# Ex.: /imovel/apartamento-2-quartos-...-venda-RS295000-id-2869100154/
+LISTING_ID_PATTERN = re.compile(r'/imovel/[^\s"\'<>()]*?-id-(\d+)')
+
+# Motivos de parada registrados na metadata do crawl
+STOP_MAX_PAGES = "max_pages"
+STOP_NO_NEW_LISTINGS = "no_new_listings"
+STOP_MIN_COUNT = "min_count_reached"
+STOP_FETCH_ERROR = "fetch_error"
+STOP_BUDGET = "budget_exceeded"
+
+
+def extract_listing_ids(content: str) -> List[str]:
+    """Retorna IDs únicos encontrados no conteúdo, na ordem de aparição."""
+    if not content:
+        return []
+    return list(dict.fromkeys(LISTING_ID_PATTERN.findall(content)))
+
+
+def listing_id_from_url(url: str) -> Optional[str]:
+    """Extrai o ID de uma URL de anúncio (ou None)."""
+    if not url:
+        return None
+    match = LISTING_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+class NoveltyTracker:
+    """
+    Acumula IDs vistos e decide quando a paginação deve parar:
+    - página sem nenhum ID novo (repetição ou página vazia)
+    - `min_count` IDs únicos coletados
+    """
+
+    def __init__(self, min_count: Optional[int] = None):
+        self.min_count = min_count
+        self.seen: Set[str] = set()
+
+    def add_page(self, content: str) -> int:
+        """Registra IDs da página e retorna quantos são novos."""
+        new_ids = [i for i in extract_listing_ids(content) if i not in self.seen]
+        self.seen.update(new_ids)
+        return len(new_ids)
+
+    def check(self, new_count: int, had_previous: bool) -> Optional[str]:
+        """
+        Retorna o motivo de parada, ou None para continuar.
+
+        `had_previous` indica se já havia IDs antes desta página: se nenhuma
+        página trouxe IDs, o formato provavelmente não é reconhecido e a
+        parada por novidade fica desativada.
+        """
+        if new_count == 0 and had_previous:
+            return STOP_NO_NEW_LISTINGS
+        if self.min_count and len(self.seen) >= self.min_count:
+            return STOP_MIN_COUNT
+        return None
+
+    def observe(self, content: str) -> Optional[str]:
+        """Atalho: registra a página e retorna o motivo de parada (se houver)."""
+        had_previous = bool(self.seen)
+        new_count = self.add_page(content)
+        print(f"   🆔 {new_count} IDs novos ({len(self.seen)} únicos)")
+        return self.check(new_count, had_previous)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tool: Map Clusters
+Agrupamento hierárquico dos pins do mapa, pré-calculado em Python para
+que mapa.html continue leve com 100k+ anúncios.
+
+Grade fixa em pixels na projeção Web Mercator do Google Maps: em cada
+zoom, os anúncios que caem na mesma célula de `cell_px` pixels viram um
+cluster (centróide, quantidade, mediana do preço/m²). Como a célula do
+zoom z-1 cobre exatamente 2x2 células do zoom z, os níveis se aninham.
+
+Saída: clusters.js, ao lado de mapa.html, com um nível por zoom em
+arrays paralelos:
+
+    window.MAP_CLUSTERS = {"cell_px": 64, "min_zoom": 0, "max_zoom": 15,
+                           "levels": {"13": {"lat": [...], "lng": [...], "count": [...],
+                                             "median": [...], "single": [...]}}}
+
+"single" é o índice do anúncio quando o cluster tem um só (senão -1);
+a página desenha esses como pins normais. Acima de max_zoom a página
+mostra os anúncios individuais do viewport.
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Dict, Sequence
+
+import numpy as np
+
+TILE_SIZE = 256
+DEFAULT_CELL_PX = 64
+DEFAULT_MIN_ZOOM = 0
+DEFAULT_MAX_ZOOM = 15
+
+
+def world_pixels(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """Coordenadas Web Mercator no zoom 0 (0..256), como google.maps.Projection."""
+    siny = np.clip(np.sin(np.radians(lat)), -0.9999, 0.9999)
+    x = (lng + 180.0) / 360.0 * TILE_SIZE
+    y = (0.5 - np.log((1 + siny) / (1 - siny)) / (4 * math.pi)) * TILE_SIZE
+    return np.stack([x, y])
+
+
+def cluster_level(lat: np.ndarray,
+                  lng: np.ndarray,
+                  price_per_sqm: np.ndarray,
+                  pixels: np.ndarray,
+                  zoom: int,
+                  cell_px: int = DEFAULT_CELL_PX) -> Dict[str, list]:
+    """Clusters de um zoom, em arrays paralelos (ver docstring do módulo)."""
+    cells = np.floor(pixels * (2 ** zoom / cell_px)).astype(np.int64)
+    keys = cells[0] * (1 << 32) + cells[1]
+    _, group, counts = np.unique(keys, return_inverse=True, return_counts=True)
+
+    # Membros de cada grupo contíguos e ordenados por preço/m² → mediana por posição
+    order = np.lexsort((price_per_sqm, group))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sorted_prices = price_per_sqm[order]
+    median = (sorted_prices[starts + (counts - 1) // 2] + sorted_prices[starts + counts // 2]) / 2
+
+    return {
+        "lat": np.round(np.bincount(group, weights=lat) / counts, 6).tolist(),
+        "lng": np.round(np.bincount(group, weights=lng) / counts, 6).tolist(),
+        "count": counts.tolist(),
+        "median": np.round(median).astype(np.int64).tolist(),
+        "single": np.where(counts == 1, order[starts], -1).tolist(),
+    }
+
+
+def build_clusters(lat: Sequence[float],
+                   lng: Sequence[float],
+                   price_per_sqm: Sequence[float],
+                   min_zoom: int = DEFAULT_MIN_ZOOM,
+                   max_zoom: int = DEFAULT_MAX_ZOOM,
+                   cell_px: int = DEFAULT_CELL_PX) -> Dict:
+    """
+    Clusters de todos os zooms de min_zoom a max_zoom.
+
+    Args:
+        lat, lng: Coordenadas dos anúncios (mesma ordem dos pins da página)
+        price_per_sqm: Preço/m² de cada anúncio
+        min_zoom, max_zoom: Zooms com clusters
+        cell_px: Lado da célula da grade, em pixels de tela
+
+    Returns:
+        Estrutura de window.MAP_CLUSTERS
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    price_per_sqm = np.asarray(price_per_sqm, dtype=np.float64)
+
+    levels = {}
+    if len(lat):
+        pixels = world_pixels(lat, lng)
+        for zoom in range(min_zoom, max_zoom + 1):
+            levels[str(zoom)] = cluster_level(lat, lng, price_per_sqm, pixels, zoom, cell_px)
+
+    return {"cell_px": cell_px, "min_zoom": min_zoom, "max_zoom": max_zoom, "levels": levels}
+
+
+def write_clusters_js(path: Path, clusters: Dict) -> Path:
+    """Grava clusters.js (window.MAP_CLUSTERS = {...})."""
+    path = Path(path)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("window.MAP_CLUSTERS = ")
+        json.dump(clusters, f, separators=(",", ":"))
+        f.write(";\n")
+    return path
+
+
+def main():
+    """CLI: clusters de um JSON de anúncios com 'coordinates' (benchmark)."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Clusters do mapa por zoom")
+    parser.add_argument("--input", default="data/processed/listings_with_addresses.json")
+    parser.add_argument("--output", default="clusters.js")
+    parser.add_argument("--max-zoom", type=int, default=DEFAULT_MAX_ZOOM)
+    parser.add_argument("--cell-px", type=int, default=DEFAULT_CELL_PX)
+
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        listings = [l for l in json.load(f) if l.get('coordinates')]
+
+    started_at = time.perf_counter()
+    clusters = build_clusters(
+        [l['coordinates']['lat'] for l in listings],
+        [l['coordinates']['lng'] for l in listings],
+        [l['price_per_sqm'] for l in listings],
+        max_zoom=args.max_zoom,
+        cell_px=args.cell_px
+    )
+    elapsed = time.perf_counter() - started_at
+
+    write_clusters_js(Path(args.output), clusters)
+    for zoom, level in clusters["levels"].items():
+        print(f"   zoom {zoom:>2}: {len(level['count'])} clusters")
+    print(f"✅ {len(listings)} anúncios em {elapsed:.2f}s → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tool: Map Payload
+Dados dos pins do mapa em formato colunar compacto, fora do HTML.
+
+- Arrays paralelos (lat, lng, price, ...) em vez de uma lista de objetos
+  que repete os nomes das chaves em cada anúncio
+- Textos repetidos (bairro, endereço) codificados por dicionário: um
+  índice por anúncio + a lista de valores distintos
+- JSON compacto → gzip → base64, gravado como script
+  (window.<NOME> = "...") para funcionar também com mapa.html aberto via
+  file://, onde fetch() é bloqueado; a página decodifica uma vez com
+  DecompressionStream
+
+    python tools/map_payload.py --decode reports/.../markers.js
+"""
+
+import base64
+import gzip
+import json
+import re
+from pathlib import Path
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+PAYLOAD_RE = re.compile(r'^window\.(\w+) = "([A-Za-z0-9+/=]*)";\s*$')
+
+# Decodificação no navegador (usada por generate_map.py)
+DECODE_JS = """
+        async function decodePayload(encoded) {
+            const bytes = Uint8Array.from(atob(encoded), c => c.charCodeAt(0));
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+            return JSON.parse(await new Response(stream).text());
+        }
+"""
+
+
+def dictionary_encode(values: Sequence[Hashable]) -> Tuple[List[int], List]:
+    """
+    (índice de cada valor, valores distintos na ordem de aparição).
+
+    >>> dictionary_encode(["Lapa", "Moema", "Lapa"])
+    ([0, 1, 0], ['Lapa', 'Moema'])
+    """
+    positions: Dict[Hashable, int] = {}
+    codes = [positions.setdefault(value, len(positions)) for value in values]
+    return codes, list(positions)
+
+
+def encode_payload(data) -> str:
+    """JSON compacto, gzip (mtime fixo: saída reproduzível) e base64."""
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(gzip.compress(raw, mtime=0)).decode("ascii")
+
+
+def decode_payload(encoded: str):
+    return json.loads(gzip.decompress(base64.b64decode(encoded)).decode("utf-8"))
+
+
+def write_payload_js(path: Path, name: str, data) -> int:
+    """
+    Grava `window.<name> = "<base64>";`.
+
+    Returns:
+        Tamanho do arquivo (bytes)
+    """
+    path = Path(path)
+    content = f'window.{name} = "{encode_payload(data)}";\n'
+    with open(path, 'w', encoding='ascii') as f:
+        f.write(content)
+    return len(content)
+
+
+def read_payload_js(path: Path) -> Tuple[str, object]:
+    """(nome da variável, dados) de um arquivo gravado por write_payload_js."""
+    match = PAYLOAD_RE.match(Path(path).read_text(encoding='ascii'))
+    if not match:
+        raise ValueError(f"{path} não é um payload window.NOME = \"...\"")
+    return match.group(1), decode_payload(match.group(2))
+
+
+def main():
+    """CLI: inspecionar um payload gravado."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Payload colunar do mapa")
+    parser.add_argument("--decode", required=True, help="Arquivo .js (window.NOME = \"...\")")
+    args = parser.parse_args()
+
+    name, data = read_payload_js(Path(args.decode))
+    print(f"window.{name}:")
+    for key, value in data.items():
+        size = len(value) if isinstance(value, list) else value
+        print(f"   {key}: {size}")
+
+
+if __name__ == "__main__":
+    main()
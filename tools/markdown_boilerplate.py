@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Tool: Markdown Boilerplate
+Remove o cabeçalho/rodapé comum (menus, navegação, links do rodapé) das
+páginas Markdown de um crawl do Firecrawl, guardando-o uma única vez.
+
+- compact: detecta as linhas iniciais e finais idênticas em todas as
+  páginas page_*.md, grava-as em boilerplate.json e deixa em cada página
+  só a região dos anúncios
+- restore: reconstrói os arquivos originais, byte a byte (verificado por
+  SHA-256)
+
+Uma página só é compactada se o parser extrair exatamente os mesmos
+anúncios (links /imovel/) antes e depois. O que some é só o falso anúncio
+que o cabeçalho gerava: link de menu com preço/área do primeiro card.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+from parse_markdown import MarkdownParser
+
+MANIFEST_NAME = "boilerplate.json"
+PAGE_GLOB = "page_*.md"
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _real_listings(listings: List[Dict]) -> List[Dict]:
+    """Só anúncios de verdade (link de imóvel), não links de navegação."""
+    return [listing for listing in listings if '/imovel/' in listing['link']]
+
+
+def common_prefix_lines(pages: List[List[bytes]]) -> int:
+    """Número de linhas iniciais idênticas em todas as páginas."""
+    count = 0
+    for lines in zip(*pages):
+        if any(line != lines[0] for line in lines[1:]):
+            break
+        count += 1
+    return count
+
+
+def common_suffix_lines(pages: List[List[bytes]], skip: int) -> int:
+    """Número de linhas finais idênticas, sem invadir as `skip` primeiras."""
+    limit = min(len(lines) for lines in pages) - skip
+    count = 0
+    while count < limit:
+        last = pages[0][-1 - count]
+        if any(lines[-1 - count] != last for lines in pages[1:]):
+            break
+        count += 1
+    return count
+
+
+class BoilerplateStore:
+    """Cabeçalho/rodapé compartilhado das páginas Markdown de um diretório."""
+
+    def __init__(self, directory: str = "data/raw", min_pages: int = 2, min_lines: int = 5):
+        """
+        Args:
+            directory: Diretório com page_*.md
+            min_pages: Mínimo de páginas para detectar o boilerplate
+            min_lines: Mínimo de linhas (cabeçalho + rodapé) para compactar
+        """
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / MANIFEST_NAME
+        self.min_pages = min_pages
+        self.min_lines = min_lines
+
+    def load(self) -> Optional[Dict]:
+        if not self.manifest_path.exists():
+            return None
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def restore(self) -> int:
+        """
+        Reconstrói as páginas originais.
+
+        Entradas de páginas que não puderam ser restauradas (alteradas
+        depois da compactação, hash da reconstrução não confere) ficam no
+        manifest, para não perder o cabeçalho/rodapé delas; o manifest só
+        é removido quando não sobra nenhuma.
+
+        Returns:
+            Número de páginas restauradas
+        """
+        manifest = self.load()
+        if manifest is None:
+            return 0
+
+        header = manifest["header"].encode('utf-8')
+        footer = manifest["footer"].encode('utf-8')
+        restored = 0
+        pending: Dict[str, Dict] = {}
+
+        for name, entry in manifest["pages"].items():
+            page_path = self.directory / name
+            if not page_path.exists():
+                continue
+
+            current = page_path.read_bytes()
+            current_hash = _sha256(current)
+            if current_hash == entry["sha256"]:
+                # Já é o original (ex.: compactação interrompida)
+                continue
+            if current_hash != entry["body_sha256"]:
+                print(f"⚠️  {name} foi alterado depois da compactação, mantendo como está")
+                pending[name] = entry
+                continue
+
+            original = header + current + footer
+            if _sha256(original) != entry["sha256"]:
+                print(f"⚠️  {name}: reconstrução não confere com o hash original, mantendo como está")
+                pending[name] = entry
+                continue
+
+            _write_atomic(page_path, original)
+            restored += 1
+
+        if pending:
+            manifest["pages"] = pending
+            _write_atomic(self.manifest_path,
+                          json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8'))
+            print(f"⚠️  Boilerplate: {len(pending)} página(s) não restauradas, mantidas em {self.manifest_path}")
+        else:
+            self.manifest_path.unlink()
+        print(f"♻️  Boilerplate: {restored} página(s) restauradas")
+        return restored
+
+    def compact(self) -> Dict:
+        """
+        Detecta o boilerplate comum e compacta as páginas.
+
+        Páginas já compactadas são restauradas antes, para que o
+        boilerplate seja recalculado sobre o conjunto completo (ex.: após
+        um crawl retomado com páginas novas).
+
+        Returns:
+            Estatísticas (páginas, linhas removidas, bytes antes/depois)
+        """
+        self.restore()
+
+        stats = {"pages": 0, "header_lines": 0, "footer_lines": 0, "bytes_before": 0, "bytes_after": 0}
+        if self.manifest_path.exists():
+            # Recompactar sobrescreveria o manifest das páginas pendentes
+            print(f"⚠️  Boilerplate: há páginas não restauradas em {self.manifest_path}, "
+                  f"compactação cancelada")
+            return stats
+
+        originals: Dict[str, bytes] = {}
+        for page_path in sorted(self.directory.glob(PAGE_GLOB)):
+            data = page_path.read_bytes()
+            try:
+                data.decode('utf-8')
+            except UnicodeDecodeError:
+                print(f"⚠️  {page_path.name} não é UTF-8, ignorando")
+                continue
+            originals[page_path.name] = data
+
+        stats["bytes_before"] = sum(len(d) for d in originals.values())
+
+        if len(originals) < self.min_pages:
+            stats["bytes_after"] = stats["bytes_before"]
+            return stats
+
+        page_lines = [data.splitlines(keepends=True) for data in originals.values()]
+        header_count = common_prefix_lines(page_lines)
+        footer_count = common_suffix_lines(page_lines, header_count)
+
+        if header_count + footer_count < self.min_lines:
+            print(f"🧹 Boilerplate: nada em comum suficiente entre {len(originals)} páginas")
+            stats["bytes_after"] = stats["bytes_before"]
+            return stats
+
+        header = b"".join(page_lines[0][:header_count])
+        footer = b"".join(page_lines[0][len(page_lines[0]) - footer_count:])
+
+        parser = MarkdownParser(output_dir=str(self.directory), manifest_path=None)
+        bodies: Dict[str, bytes] = {}
+        entries: Dict[str, Dict] = {}
+
+        for (name, data), lines in zip(originals.items(), page_lines):
+            body = b"".join(lines[header_count:len(lines) - footer_count])
+            before = _real_listings(list(parser.iter_listings(data)))
+            if _real_listings(list(parser.iter_listings(body))) != before:
+                print(f"   ⚠️  {name}: anúncios mudariam sem o boilerplate, mantendo completo")
+                continue
+            bodies[name] = body
+            entries[name] = {"sha256": _sha256(data), "body_sha256": _sha256(body)}
+
+        if not entries:
+            stats["bytes_after"] = stats["bytes_before"]
+            return stats
+
+        # Manifest primeiro: se o processo cair no meio, restore reconhece
+        # tanto páginas ainda originais quanto as já compactadas
+        manifest = {
+            "header": header.decode('utf-8'),
+            "footer": footer.decode('utf-8'),
+            "pages": entries
+        }
+        _write_atomic(self.manifest_path,
+                      json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8'))
+
+        for name, body in bodies.items():
+            _write_atomic(self.directory / name, body)
+
+        stats.update({
+            "pages": len(entries),
+            "header_lines": header_count,
+            "footer_lines": footer_count,
+            "bytes_after": (stats["bytes_before"] - sum(len(originals[n]) for n in bodies)
+                            + sum(len(b) for b in bodies.values())
+                            + self.manifest_path.stat().st_size)
+        })
+
+        saved = 1 - stats["bytes_after"] / stats["bytes_before"] if stats["bytes_before"] else 0
+        print(f"🧹 Boilerplate: {len(entries)} páginas compactadas "
+              f"(cabeçalho {header_count} linhas, rodapé {footer_count} linhas, "
+              f"-{saved:.0%} em disco)")
+
+        return stats
+
+
+def main():
+    """CLI para execução standalone."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compacta/restaura boilerplate de páginas Markdown")
+    parser.add_argument("--dir", default="data/raw", help="Diretório com page_*.md")
+    parser.add_argument("--restore", action="store_true", help="Restaurar as páginas originais")
+    parser.add_argument("--min-lines", type=int, default=5,
+                        help="Mínimo de linhas em comum para compactar")
+
+    args = parser.parse_args()
+
+    store = BoilerplateStore(args.dir, min_lines=args.min_lines)
+    if args.restore:
+        store.restore()
+    else:
+        store.compact()
+
+
+if __name__ == "__main__":
+    main()
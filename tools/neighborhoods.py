@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Tool: Neighborhoods
+Centróides aproximados dos bairros de SP (slug da URL do VivaReal →
+lat/lng), compartilhados pelo mapa (generate_map.py) e pelo geocoder
+offline (gazetteer.py).
+"""
+
+NEIGHBORHOOD_COORDINATES = {
+    "interlagos": {"lat": -23.6797, "lng": -46.6893},
+    "socorro": {"lat": -23.6425, "lng": -46.6947},
+    "vila-mariana": {"lat": -23.5871, "lng": -46.6364},
+    "moema": {"lat": -23.6011, "lng": -46.6664},
+    "pinheiros": {"lat": -23.5629, "lng": -46.6979},
+    "santana": {"lat": -23.5065, "lng": -46.6290},
+    "tatuape": {"lat": -23.5403, "lng": -46.5766},
+    "freguesia-do-o": {"lat": -23.4983, "lng": -46.7031},
+    "brooklin": {"lat": -23.6069, "lng": -46.6950},
+    "campo-belo": {"lat": -23.6155, "lng": -46.6726},
+    "perdizes": {"lat": -23.5344, "lng": -46.6718},
+    "lapa": {"lat": -23.5279, "lng": -46.7082},
+    "mooca": {"lat": -23.5554, "lng": -46.5989},
+    "penha": {"lat": -23.5290, "lng": -46.5419},
+}
+
+# Centro de SP, para anúncios sem bairro conhecido
+DEFAULT_COORDINATES = {"lat": -23.5505, "lng": -46.6333}
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tool: Page Store
+Cache de páginas brutas endereçado por conteúdo, com revalidação HTTP
+condicional (ETag / Last-Modified).
+
+Layout em disco:
+    <cache_dir>/index.json              URL normalizada → metadata
+    <cache_dir>/objects/ab/abcdef....gz corpo comprimido, nome = sha256
+
+O índice é gravado a cada `save_every` alterações e em flush() (chamado
+no fim do crawl), não a cada página.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normaliza URL para uso como chave de cache.
+
+    - esquema e host em minúsculas
+    - parâmetros de query ordenados
+    - remove fragmento (#...)
+    """
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    path = parts.path or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+class PageCache:
+    """Armazena corpos de páginas por hash e guarda validadores HTTP por URL."""
+
+    def __init__(self, cache_dir: str = "data/cache/pages", save_every: int = 50):
+        """
+        Args:
+            cache_dir: Diretório do cache
+            save_every: Alterações no índice entre gravações em disco
+        """
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "index.json"
+        self.lock = threading.Lock()
+        self.save_every = max(1, save_every)
+        self.dirty = 0
+        self.index = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict]:
+        if not self.index_path.exists():
+            return {}
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_index(self):
+        # Escrita atômica para não corromper o índice se o processo morrer
+        # (chamado com self.lock)
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+        self.dirty = 0
+
+    def _mark_dirty(self):
+        self.dirty += 1
+        if self.dirty >= self.save_every:
+            self._save_index()
+
+    def flush(self):
+        """Grava o índice se houver alterações pendentes."""
+        with self.lock:
+            if self.dirty:
+                self._save_index()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.gz"
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Retorna a entrada do índice para a URL (ou None)."""
+        with self.lock:
+            return self.index.get(normalize_url(url))
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Headers If-None-Match / If-Modified-Since para a URL, se houver."""
+        entry = self.get(url)
+        if not entry or not self._object_path(entry["sha256"]).exists():
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def read_body(self, entry: Dict) -> str:
+        """Lê o corpo armazenado de uma entrada."""
+        with gzip.open(self._object_path(entry["sha256"]), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def put(self,
+            url: str,
+            body: str,
+            etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> Dict:
+        """Armazena corpo (se ainda não existir) e atualiza o índice da URL."""
+        data = body.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+
+        object_path = self._object_path(digest)
+        if not object_path.exists():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            # Nome único: duas threads podem gravar o mesmo corpo ao mesmo tempo
+            tmp_path = object_path.with_name(
+                f"{object_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with gzip.open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, object_path)
+
+        entry = {
+            "url": url,
+            "sha256": digest,
+            "size": len(data),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": datetime.now().isoformat(timespec="seconds")
+        }
+
+        with self.lock:
+            self.index[normalize_url(url)] = entry
+            self._mark_dirty()
+
+        return entry
+
+    def touch(self, url: str) -> Optional[Dict]:
+        """Marca a entrada como revalidada (resposta 304)."""
+        with self.lock:
+            entry = self.index.get(normalize_url(url))
+            if entry:
+                entry["fetched_at"] = datetime.now().isoformat(timespec="seconds")
+                self._mark_dirty()
+            return entry
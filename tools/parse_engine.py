@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tool: Parse Engine
+Executa o parse de vários arquivos de página em paralelo (process pool)
+e devolve os resultados na mesma ordem dos arquivos de entrada, para que
+o merge, o filtro e a deduplicação posteriores sejam determinísticos.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ParseFn = Callable[[Path], List[Dict]]
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """None/0 = um worker por CPU."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def parse_files(paths: List[Path],
+                parse_fn: ParseFn,
+                workers: Optional[int] = None) -> List[List[Dict]]:
+    """
+    Aplica `parse_fn` a cada arquivo.
+
+    `parse_fn` precisa ser serializável (função de módulo ou método de
+    instância serializável), pois roda em outro processo.
+
+    Returns:
+        Lista de resultados por arquivo, na ordem de `paths`
+    """
+    workers = min(resolve_workers(workers), len(paths))
+
+    if workers <= 1:
+        return [parse_fn(path) for path in paths]
+
+    # Lotes maiores reduzem o custo de IPC com muitos arquivos pequenos
+    chunksize = max(1, len(paths) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_fn, paths, chunksize=chunksize))
+
+
+def merge_results(results: List[List[Dict]]) -> List[Dict]:
+    """Concatena resultados por arquivo, preservando a ordem."""
+    merged = []
+    for page_listings in results:
+        merged.extend(page_listings)
+    return merged
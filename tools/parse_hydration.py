@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tool: Hydration Parser
+Extrai anúncios direto do JSON de hidratação embutido na página
+(<script id="__NEXT_DATA__"> ou window.__INITIAL_STATE__ = {...}),
+sem construir árvore DOM.
+
+A busca do blob é feita nos bytes crus; só o trecho JSON é decodificado.
+"""
+
+import json
+import re
+from typing import Dict, Iterator, List, Optional
+
+BASE_URL = "https://www.vivareal.com.br"
+
+# <script id="__NEXT_DATA__" type="application/json">{...}</script>
+NEXT_DATA_RE = re.compile(rb'<script[^>]*\bid=["\']__NEXT_DATA__["\'][^>]*>')
+# window.__INITIAL_STATE__ = {...};  (e variações usadas por portais)
+STATE_ASSIGN_RE = re.compile(
+    rb'window\.__(?:INITIAL_STATE|PRELOADED_STATE|INITIAL_PROPS)__\s*=\s*'
+)
+
+
+def find_hydration_blob(raw: bytes) -> Optional[object]:
+    """
+    Localiza e decodifica o JSON de hidratação.
+
+    Returns:
+        Objeto JSON decodificado, ou None se não houver blob válido
+    """
+    match = NEXT_DATA_RE.search(raw)
+    if match:
+        end = raw.find(b'</script>', match.end())
+        if end != -1:
+            try:
+                return json.loads(raw[match.end():end])
+            except ValueError:
+                pass
+
+    match = STATE_ASSIGN_RE.search(raw)
+    if match:
+        end = raw.find(b'</script>', match.end())
+        chunk = raw[match.end():end if end != -1 else None].decode('utf-8', 'replace')
+        try:
+            # raw_decode ignora o ";" e o que vier depois do objeto
+            obj, _ = json.JSONDecoder().raw_decode(chunk.lstrip())
+            return obj
+        except ValueError:
+            pass
+
+    return None
+
+
+def iter_listing_nodes(obj: object) -> Iterator[Dict]:
+    """
+    Percorre o JSON (iterativo, sem recursão) e produz os nós de resultado:
+    dicts com chave "listing" contendo preços ou áreas.
+    """
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            listing = node.get("listing")
+            if isinstance(listing, dict) and (
+                    "pricingInfos" in listing or "usableAreas" in listing):
+                yield node
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def _first(values) -> Optional[object]:
+    if isinstance(values, list):
+        return values[0] if values else None
+    return values
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def listing_from_node(node: Dict) -> Optional[Dict]:
+    """Converte um nó de resultado em dict de anúncio (mesmo formato do parser DOM + extras)."""
+    listing = node["listing"]
+
+    link = (node.get("link") or {}).get("href") or listing.get("link")
+    if isinstance(link, dict):
+        link = link.get("href")
+    if not link:
+        return None
+    if link.startswith('/'):
+        link = f"{BASE_URL}{link}"
+
+    pricing = listing.get("pricingInfos") or []
+    sale = next((p for p in pricing if p.get("businessType") == "SALE"), None)
+    pricing_info = sale or (pricing[0] if pricing else {})
+
+    price = _to_float(pricing_info.get("price"))
+    area = _to_float(_first(listing.get("usableAreas"))) or _to_float(_first(listing.get("totalAreas")))
+
+    if not price or not area:
+        return None
+
+    address = listing.get("address") or {}
+    point = address.get("point") or {}
+
+    result = {
+        "link": link,
+        "price": price,
+        "area": area,
+        "price_per_sqm": round(price / area, 2) if area > 0 else None,
+        "listing_id": str(listing["id"]) if listing.get("id") else None,
+        "title": listing.get("title"),
+        "bedrooms": _first(listing.get("bedrooms")),
+        "bathrooms": _first(listing.get("bathrooms")),
+        "suites": _first(listing.get("suites")),
+        "parking_spaces": _first(listing.get("parkingSpaces")),
+        "condo_fee": _to_float(pricing_info.get("monthlyCondoFee")),
+        "iptu": _to_float(pricing_info.get("yearlyIptu")),
+        "business_type": pricing_info.get("businessType"),
+        "street": address.get("street"),
+        "street_number": address.get("streetNumber"),
+        "neighborhood": address.get("neighborhood"),
+        "city": address.get("city"),
+        "zone": address.get("zone"),
+    }
+
+    lat, lng = _to_float(point.get("lat")), _to_float(point.get("lon", point.get("lng")))
+    if lat is not None and lng is not None:
+        result["coordinates"] = {"lat": lat, "lng": lng}
+
+    return result
+
+
+def parse_hydration(raw: bytes) -> Optional[List[Dict]]:
+    """
+    Extrai anúncios do blob de hidratação.
+
+    Returns:
+        Lista de anúncios, ou None se a página não tiver blob com
+        resultados (o chamador deve usar o parser DOM)
+    """
+    blob = find_hydration_blob(raw)
+    if blob is None:
+        return None
+
+    nodes = list(iter_listing_nodes(blob))
+    if not nodes:
+        return None
+
+    listings = []
+    for node in nodes:
+        listing = listing_from_node(node)
+        if listing:
+            listings.append(listing)
+    return listings
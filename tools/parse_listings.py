@@ -7,14 +7,51 @@ Extrai dados estruturados de páginas HTML crawleadas do VivaReal.
 import json
 import re
 from pathlib import Path
+import sys
 from typing import List, Dict, Optional
 from bs4 import BeautifulSoup
 
+sys.path.insert(0, str(Path(__file__).parent))
+from dedup import dedupe_near_duplicates
+from listing_ids import listing_id_from_url
+from parse_hydration import parse_hydration
+from parse_engine import merge_results, resolve_workers
+from parse_manifest import ParseManifest, parse_incremental
+
+PARSE_MODES = ("auto", "hydration", "dom")
+PARSER_BACKENDS = ("bs4", "lxml")
+# Incrementar quando a extração mudar, para invalidar os manifests de parse
+PARSER_VERSION = 1
+
 class VivaRealParser:
-    def __init__(self, input_dir: str = "data/raw", output_dir: str = "data/processed"):
+    def __init__(self,
+                 input_dir: str = "data/raw",
+                 output_dir: str = "data/processed",
+                 mode: str = "auto",
+                 manifest_path: Optional[str] = "data/cache/parse_manifest_html.json",
+                 near_dedup: bool = True):
+        """
+        Args:
+            input_dir: Diretório com page_*.html
+            output_dir: Diretório do listings.json
+            mode: "auto" (JSON de hidratação, com fallback para DOM),
+                  "hydration" (só JSON) ou "dom" (só cards HTML)
+            manifest_path: Manifest de parse incremental (None = reparsear tudo)
+            near_dedup: Remover também quase duplicados (MinHash/LSH)
+        """
+        if mode not in PARSE_MODES:
+            raise ValueError(f"Modo inválido: {mode} (use {', '.join(PARSE_MODES)})")
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.mode = mode
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        self.near_dedup = near_dedup
+
+    @property
+    def parser_key(self) -> str:
+        """Identifica backend, modo e versão: resultados de outro parser não são reaproveitados."""
+        return f"{type(self).__name__}:{self.mode}:{PARSER_VERSION}"
 
     def extract_price(self, text: str) -> Optional[float]:
         """Extrai valor em reais de texto."""
@@ -100,13 +137,33 @@ class VivaRealParser:
             return None
 
     def parse_page(self, html_path: Path) -> List[Dict]:
-        """Parseia uma página HTML e extrai todos os anúncios."""
+        """
+        Parseia uma página HTML e extrai todos os anúncios.
+
+        Caminho rápido: JSON de hidratação embutido (sem árvore DOM).
+        Só cai para os seletores de cards quando o blob não existe.
+        """
         print(f"📄 Parsing: {html_path.name}")
 
-        with open(html_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        with open(html_path, 'rb') as f:
+            raw = f.read()
+
+        if self.mode != "dom":
+            listings = parse_hydration(raw)
+            if listings is not None:
+                print(f"   ⚡ JSON de hidratação: {len(listings)} anúncios")
+                return listings
+            if self.mode == "hydration":
+                print(f"   ⚠️  JSON de hidratação não encontrado")
+                return []
 
-        soup = BeautifulSoup(html_content, 'lxml')
+        listings = self.parse_dom(raw)
+        print(f"   ✅ Extraídos {len(listings)} anúncios válidos")
+        return listings
+
+    def parse_dom(self, raw: bytes) -> List[Dict]:
+        """Extrai anúncios dos cards HTML (seletores + fallback por links)."""
+        soup = BeautifulSoup(raw.decode('utf-8'), 'lxml')
 
         # Tentar identificar cards de anúncios
         # VivaReal geralmente usa classes como "property-card", "result-card", etc.
@@ -129,8 +186,8 @@ class VivaRealParser:
         if not cards:
             # Procurar por links que contenham "/imovel/"
             links = soup.find_all('a', href=re.compile(r'/imovel/'))
-            # Pegar parent elements como "cards"
-            cards = list(set([link.find_parent(['div', 'article', 'li']) for link in links if link.find_parent(['div', 'article', 'li'])]))
+            # Pegar parent elements como "cards" (sem repetir, na ordem do documento)
+            cards = list(dict.fromkeys([link.find_parent(['div', 'article', 'li']) for link in links if link.find_parent(['div', 'article', 'li'])]))
             print(f"   ✓ Encontrados {len(cards)} cards via links")
 
         # Extrair dados de cada card
@@ -140,35 +197,45 @@ class VivaRealParser:
             if listing:
                 listings.append(listing)
 
-        print(f"   ✅ Extraídos {len(listings)} anúncios válidos")
         return listings
 
-    def parse_all(self, min_area: float = 40, max_area: float = 45) -> List[Dict]:
+    def parse_all(self,
+                  min_area: float = 40,
+                  max_area: float = 45,
+                  workers: Optional[int] = None) -> List[Dict]:
         """
         Parseia todas as páginas HTML no diretório de entrada.
 
+        Só páginas novas ou alteradas são parseadas (manifest por hash de
+        conteúdo); as demais vêm do cache. O parse roda em paralelo
+        (process pool); filtro e deduplicação acontecem depois do merge,
+        na ordem dos arquivos.
+
         Args:
             min_area: Filtro de área mínima
             max_area: Filtro de área máxima
+            workers: Processos de parse (None = um por CPU, 1 = sequencial)
 
         Returns:
             Lista de anúncios filtrados e validados
         """
         print(f"\n🔍 Iniciando parsing de arquivos HTML")
         print(f"   Input dir: {self.input_dir}")
-        print(f"   Filtro área: {min_area}-{max_area} m²\n")
+        print(f"   Filtro área: {min_area}-{max_area} m²")
+        print(f"   Workers: {resolve_workers(workers)}\n")
 
-        html_files = sorted(self.input_dir.glob("page_*.html"))
+        # Inclui páginas de crawls particionados (shard_*/page_*.html)
+        html_files = (
+            sorted(self.input_dir.glob("page_*.html")) +
+            sorted(self.input_dir.glob("shard_*/page_*.html"))
+        )
 
         if not html_files:
             print("❌ Nenhum arquivo HTML encontrado!")
             return []
 
-        all_listings = []
-
-        for html_file in html_files:
-            page_listings = self.parse_page(html_file)
-            all_listings.extend(page_listings)
+        manifest = ParseManifest(self.manifest_path, self.parser_key) if self.manifest_path else None
+        all_listings = merge_results(parse_incremental(html_files, self.parse_page, manifest, workers))
 
         # Filtrar por área
         filtered_listings = [
@@ -176,17 +243,25 @@ class VivaRealParser:
             if min_area <= listing['area'] <= max_area
         ]
 
-        # Remover duplicatas (mesmo link)
+        # Remover duplicatas (mesmo ID de anúncio; sem ID, mesmo link)
         unique_listings = {}
         for listing in filtered_listings:
-            unique_listings[listing['link']] = listing
+            key = listing_id_from_url(listing['link']) or listing['link']
+            unique_listings[key] = listing
 
         final_listings = list(unique_listings.values())
+        exact_count = len(final_listings)
+
+        # Mesmo imóvel com outro anúncio (corretor, preço/área ligeiramente diferentes)
+        if self.near_dedup:
+            final_listings = dedupe_near_duplicates(final_listings, self.output_dir)
 
         print(f"\n📊 Resumo do Parsing:")
         print(f"   Total extraído: {len(all_listings)}")
         print(f"   Após filtro de área: {len(filtered_listings)}")
-        print(f"   Após remoção de duplicatas: {len(final_listings)}")
+        print(f"   Após remoção de duplicatas: {exact_count}")
+        if self.near_dedup:
+            print(f"   Após remoção de quase duplicados: {len(final_listings)}")
 
         # Salvar resultado
         output_path = self.output_dir / "listings.json"
@@ -198,6 +273,21 @@ class VivaRealParser:
         return final_listings
 
 
+def create_parser(backend: str = "bs4", **kwargs) -> VivaRealParser:
+    """
+    Instancia o parser do backend escolhido.
+
+    "bs4" usa BeautifulSoup; "lxml" usa XPath direto na árvore lxml
+    (mesma saída, mais rápido).
+    """
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Backend inválido: {backend} (use {', '.join(PARSER_BACKENDS)})")
+    if backend == "lxml":
+        from parse_listings_lxml import LxmlVivaRealParser
+        return LxmlVivaRealParser(**kwargs)
+    return VivaRealParser(**kwargs)
+
+
 def main():
     """CLI para execução standalone."""
     import argparse
@@ -207,11 +297,31 @@ def main():
     parser.add_argument("--output", default="data/processed", help="Diretório de saída (JSON)")
     parser.add_argument("--min-area", type=float, default=40, help="Área mínima (m²)")
     parser.add_argument("--max-area", type=float, default=45, help="Área máxima (m²)")
+    parser.add_argument("--mode", choices=PARSE_MODES, default="auto",
+                        help="auto: JSON de hidratação com fallback DOM")
+    parser.add_argument("--workers", type=int, help="Processos de parse (padrão: um por CPU)")
+    parser.add_argument("--backend", choices=PARSER_BACKENDS, default="bs4",
+                        help="Parser DOM: bs4 (BeautifulSoup) ou lxml (XPath, mais rápido)")
+    parser.add_argument("--manifest", default="data/cache/parse_manifest_html.json",
+                        help="Manifest de parse incremental")
+    parser.add_argument("--no-manifest", action="store_true",
+                        help="Reparsear todas as páginas, sem manifest")
+    parser.add_argument("--exact-dedup", action="store_true",
+                        help="Só remover duplicatas exatas (sem MinHash/LSH). O MinHash/LSH "
+                             "só une IDs diferentes com título/rua/número iguais, que vêm "
+                             "do JSON de hidratação (modos auto e hydration)")
 
     args = parser.parse_args()
 
-    parser = VivaRealParser(input_dir=args.input, output_dir=args.output)
-    listings = parser.parse_all(min_area=args.min_area, max_area=args.max_area)
+    parser = create_parser(
+        args.backend,
+        input_dir=args.input,
+        output_dir=args.output,
+        mode=args.mode,
+        manifest_path=None if args.no_manifest else args.manifest,
+        near_dedup=not args.exact_dedup
+    )
+    listings = parser.parse_all(min_area=args.min_area, max_area=args.max_area, workers=args.workers)
 
     if listings:
         print(f"\n🎉 Sucesso! {len(listings)} anúncios prontos para análise")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Tool: VivaReal Parser (backend lxml)
+Mesma saída do VivaRealParser (BeautifulSoup), mas com árvore lxml
+construída direto dos bytes e seletores XPath pré-compilados.
+
+Equivalências com o BeautifulSoup reproduzidas aqui:
+- class_=re.compile(...) testa a string de classes normalizada
+  (classes separadas por um espaço)
+- get_text() ignora comentários e conteúdo de <script>/<style>
+- string=re.compile(...) usa a semântica de Tag.string (um único filho,
+  recursivamente)
+- set() de cards deduplica por estrutura (mesmo HTML), não por identidade
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from lxml import etree
+
+sys.path.insert(0, str(Path(__file__).parent))
+from parse_listings import VivaRealParser
+
+REGEX_NS = {"re": "http://exslt.org/regular-expressions"}
+SKIP_TEXT_TAGS = {"script", "style"}
+
+
+def _xpath(expression: str) -> etree.XPath:
+    return etree.XPath(expression, namespaces=REGEX_NS)
+
+
+def _element_text(element, strip: bool = False) -> str:
+    """Equivalente a Tag.get_text() / get_text(strip=True) do BeautifulSoup."""
+    parts = []
+
+    def walk(node):
+        # Comentários e instruções de processamento não têm tag string
+        if not isinstance(node.tag, str) or node.tag in SKIP_TEXT_TAGS:
+            return
+        if node.text:
+            parts.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                parts.append(child.tail)
+
+    walk(element)
+
+    if strip:
+        return "".join(p.strip() for p in parts if p.strip())
+    return "".join(parts)
+
+
+def _element_string(element) -> Optional[str]:
+    """Equivalente a Tag.string: texto do único filho (recursivo), ou None."""
+    children = len(element) + sum(1 for child in element if child.tail)
+    if element.text:
+        children += 1
+    if children != 1:
+        return None
+    if element.text:
+        return element.text
+
+    child = element[0]
+    if not isinstance(child.tag, str):
+        # Comentário como único filho também é uma string para o BeautifulSoup
+        return child.text
+    return _element_string(child)
+
+
+class LxmlVivaRealParser(VivaRealParser):
+    """Backend lxml do VivaRealParser (parse_dom/extract_listing reescritos)."""
+
+    CARD_SELECTORS = [
+        ("class~=property.*card",
+         _xpath("//*[self::div or self::article or self::li]"
+                "[re:test(normalize-space(@class), 'property.*card', 'i')]")),
+        ("class~=result.*card",
+         _xpath("//*[self::div or self::article or self::li]"
+                "[re:test(normalize-space(@class), 'result.*card', 'i')]")),
+        ("class~=listing.*card",
+         _xpath("//*[self::div or self::article or self::li]"
+                "[re:test(normalize-space(@class), 'listing.*card', 'i')]")),
+        ("data-type=property",
+         _xpath("//*[self::div or self::article or self::li][@data-type='property']")),
+    ]
+
+    LISTING_LINKS = _xpath("//a[contains(@href, '/imovel/')]")
+    CARD_PARENT = _xpath("ancestor::*[self::div or self::article or self::li][1]")
+    CARD_LINK = _xpath(".//a[@href][1]")
+
+    PRICE_BY_CLASS = _xpath(".//*[self::p or self::span or self::div]"
+                            "[re:test(normalize-space(@class), 'price', 'i')][1]")
+    PRICE_BY_ATTR = _xpath(".//*[self::p or self::span or self::div][@data-type='price'][1]")
+    PRICE_CANDIDATES = _xpath(".//*[self::p or self::span or self::div]")
+    PRICE_STRING_RE = re.compile(r'R\$', re.I)
+
+    def _find_price_element(self, card):
+        for selector in (self.PRICE_BY_CLASS, self.PRICE_BY_ATTR):
+            found = selector(card)
+            if found:
+                return found[0]
+
+        for element in self.PRICE_CANDIDATES(card):
+            string = _element_string(element)
+            if string is not None and self.PRICE_STRING_RE.search(string):
+                return element
+
+        return None
+
+    def extract_listing(self, card_element) -> Optional[Dict]:
+        """Extrai dados de um card (elemento lxml)."""
+        try:
+            found = self.CARD_LINK(card_element)
+            if not found:
+                return None
+
+            link = found[0].get('href', '')
+            if link.startswith('/'):
+                link = f"https://www.vivareal.com.br{link}"
+
+            price_elem = self._find_price_element(card_element)
+            price_text = _element_text(price_elem, strip=True) if price_elem is not None else None
+            price = self.extract_price(price_text) if price_text else None
+
+            area = self.extract_area(_element_text(card_element))
+
+            # Validar dados mínimos
+            if not link or not price or not area:
+                return None
+
+            return {
+                "link": link,
+                "price": price,
+                "area": area,
+                "price_per_sqm": round(price / area, 2) if area > 0 else None
+            }
+
+        except Exception as e:
+            print(f"⚠️  Erro ao processar card: {e}")
+            return None
+
+    def parse_dom(self, raw: bytes) -> List[Dict]:
+        """Extrai anúncios dos cards HTML usando lxml."""
+        html_parser = etree.HTMLParser(encoding='utf-8')
+        root = etree.fromstring(raw, html_parser)
+        if root is None:
+            return []
+
+        cards = []
+        for name, selector in self.CARD_SELECTORS:
+            found = selector(root)
+            if found:
+                cards = found
+                print(f"   ✓ Encontrados {len(cards)} cards com seletor: {name}")
+                break
+
+        # Se não encontrou cards específicos, usar o pai de cada link /imovel/
+        if not cards:
+            unique_cards = {}
+            for link in self.LISTING_LINKS(root):
+                parent = self.CARD_PARENT(link)
+                if parent:
+                    key = etree.tostring(parent[0], with_tail=False)
+                    unique_cards.setdefault(key, parent[0])
+            cards = list(unique_cards.values())
+            print(f"   ✓ Encontrados {len(cards)} cards via links")
+
+        listings = []
+        for card in cards:
+            listing = self.extract_listing(card)
+            if listing:
+                listings.append(listing)
+
+        return listings
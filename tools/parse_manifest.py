@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tool: Parse Manifest
+Cache incremental de parse: guarda, por hash de conteúdo da página, os
+anúncios extraídos. Reexecuções só parseiam páginas novas ou alteradas e
+reconstroem a saída a partir dos resultados salvos.
+
+Formato (data/cache/parse_manifest_<nome>.json):
+    {
+      "parser_key": "VivaRealParser:auto:1",
+      "files": {"/abs/page_001.html": {"size": ..., "mtime_ns": ..., "sha256": ...}},
+      "pages": {"<sha256>": [ {anúncio}, ... ]}
+    }
+
+`files` só evita recalcular o hash de arquivos intocados (mesmo tamanho e
+mtime); o resultado é sempre indexado pelo hash do conteúdo. Se o
+`parser_key` mudar (outro backend, modo ou versão do parser), o cache
+inteiro é descartado.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+from crawl_journal import file_sha256
+from parse_engine import parse_files
+
+
+class ParseManifest:
+    """Resultados de parse por página, indexados pelo hash do conteúdo."""
+
+    def __init__(self, path: Path, parser_key: str):
+        self.path = Path(path)
+        self.parser_key = parser_key
+        self.files: Dict[str, Dict] = {}
+        self.pages: Dict[str, List[Dict]] = {}
+        self.load()
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            print(f"⚠️  Manifest de parse ilegível, reparseando tudo: {self.path}")
+            return
+
+        if data.get("parser_key") != self.parser_key:
+            print(f"   ♻️  Parser mudou ({data.get('parser_key')} → {self.parser_key}), "
+                  f"descartando manifest")
+            return
+
+        self.files = data.get("files", {})
+        self.pages = data.get("pages", {})
+
+    def content_hash(self, path: Path) -> str:
+        """Hash do arquivo, reaproveitando o anterior se tamanho e mtime não mudaram."""
+        stat = path.stat()
+        key = str(path.resolve())
+        entry = self.files.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+
+        sha256 = file_sha256(path)
+        self.files[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+        return sha256
+
+    def get(self, sha256: str) -> Optional[List[Dict]]:
+        return self.pages.get(sha256)
+
+    def put(self, sha256: str, listings: List[Dict]):
+        self.pages[sha256] = listings
+
+    def prune(self, paths: List[Path]):
+        """
+        Remove entradas de arquivos que não existem mais e resultados de
+        conteúdo que nenhum arquivo tem.
+
+        Arquivos fora de `paths` que ainda existem são mantidos: o mesmo
+        manifest atende entradas diferentes (ex.: crawl.md e o diretório
+        de páginas), e uma não deve apagar o cache da outra.
+        """
+        keys = {str(path.resolve()) for path in paths}
+        self.files = {k: v for k, v in self.files.items() if k in keys or os.path.exists(k)}
+        hashes = {v["sha256"] for v in self.files.values()}
+        self.pages = {k: v for k, v in self.pages.items() if k in hashes}
+
+    def save(self):
+        """Grava de forma atômica (arquivo temporário + rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "parser_key": self.parser_key,
+                "files": self.files,
+                "pages": self.pages
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def parse_incremental(paths: List[Path],
+                      parse_fn,
+                      manifest: Optional[ParseManifest],
+                      workers: Optional[int] = None) -> List[List[Dict]]:
+    """
+    Parseia só as páginas sem resultado no manifest.
+
+    Args:
+        paths: Arquivos de página (ordem da saída)
+        parse_fn: Função de parse de um arquivo
+        manifest: Manifest (None = parsear tudo, sem cache)
+        workers: Processos de parse (ver parse_engine.parse_files)
+
+    Returns:
+        Resultados por arquivo, na ordem de `paths`
+    """
+    if manifest is None:
+        return parse_files(paths, parse_fn, workers)
+
+    hashes = [manifest.content_hash(path) for path in paths]
+
+    pending = []
+    seen = set()
+    for path, sha256 in zip(paths, hashes):
+        # Páginas com conteúdo idêntico são parseadas uma vez só
+        if manifest.get(sha256) is None and sha256 not in seen:
+            pending.append((path, sha256))
+            seen.add(sha256)
+
+    print(f"   ♻️  Manifest: {len(paths) - len(pending)} página(s) em cache, "
+          f"{len(pending)} para parsear")
+
+    if pending:
+        results = parse_files([path for path, _ in pending], parse_fn, workers)
+        for (_, sha256), listings in zip(pending, results):
+            manifest.put(sha256, listings)
+
+    manifest.prune(paths)
+    manifest.save()
+
+    # Cópias rasas: o chamador pode alterar os dicts sem sujar o cache
+    return [[dict(listing) for listing in manifest.get(sha256)] for sha256 in hashes]
@@ -6,16 +6,58 @@ Parser específico para arquivos Markdown do Firecrawl/VivaReal.
 
 import re
 import json
+import mmap
+import os
+import sys
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple, Union
+
+sys.path.insert(0, str(Path(__file__).parent))
+from dedup import dedupe_near_duplicates
+from listing_ids import listing_id_from_url
+from parse_engine import merge_results, resolve_workers
+from parse_manifest import ParseManifest, parse_incremental
+
+# Incrementar quando a extração mudar, para invalidar o manifest de parse
+PARSER_VERSION = 2
+
+# Os padrões abaixo rodam em bytes (mmap), mas reproduzem a semântica de
+# str: \s em str também casa espaços Unicode (NBSP, thin space, ...)
+_WS = (rb'(?:[\t\n\x0b\x0c\r\x1c-\x1f ]|\xc2[\x85\xa0]|\xe1\x9a\x80'
+       rb'|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80)')
+
+# Linha com link de anúncio = início de bloco
+LISTING_LINE_RE = re.compile(rb'(?i:vivareal\.com\.br/imovel)')
+LINK_RE = re.compile(rb'https://www\.vivareal\.com\.br/imovel/(?:(?!' + _WS + rb')[^)])+')
+MD_LINK_RE = re.compile(rb'\]\((https://www\.vivareal\.com\.br/[^)]+)\)')
+PRICE_RE = re.compile(rb'R\$' + _WS + rb'*([\d.]+)')
+AREA_RE = re.compile(rb'(\d+(?:[.,]\d+)?)' + _WS + rb'*[mM](?:\xc2\xb2|2)')
 
 class MarkdownParser:
     """Parser para extrair anúncios de arquivos Markdown."""
 
-    def __init__(self, input_file: str = "crawl.md", output_dir: str = "data/processed"):
+    def __init__(self,
+                 input_file: str = "crawl.md",
+                 output_dir: str = "data/processed",
+                 manifest_path: Optional[str] = "data/cache/parse_manifest_md.json",
+                 near_dedup: bool = True):
         self.input_file = Path(input_file)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Manifest de parse incremental (None = reparsear tudo)
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        # Quase duplicados (MinHash/LSH) além do mesmo ID/link; sem título/rua
+        # no Markdown, na prática só une o mesmo ID (ver dedup._has_evidence)
+        self.near_dedup = near_dedup
+
+    @property
+    def parser_key(self) -> str:
+        return f"{type(self).__name__}:{PARSER_VERSION}"
+
+    def _parse_paths(self, md_files: List[Path], workers: Optional[int] = None) -> List[Dict]:
+        """Parse com reaproveitamento dos arquivos já parseados (manifest)."""
+        manifest = ParseManifest(self.manifest_path, self.parser_key) if self.manifest_path else None
+        return merge_results(parse_incremental(md_files, self.parse_file, manifest, workers))
 
     def extract_price(self, text: str) -> Optional[float]:
         """Extrai preço em reais."""
@@ -100,88 +142,122 @@ class MarkdownParser:
         - Preço: R$ XXX.XXX
         - Área: XX m²
         """
-        # Extrair link primeiro
-        link = self.extract_link(block)
-
+        return self.build_listing(
+            self.extract_link(block),
+            self.extract_price(block),
+            self.extract_area(block)
+        )
+
+    def build_listing(self,
+                      link: Optional[str],
+                      text_price: Optional[float],
+                      area: Optional[float]) -> Optional[Dict]:
+        """Monta o anúncio a partir dos campos do bloco (preço da URL tem prioridade)."""
         # Extrair preço da URL (mais confiável!)
         price = self.extract_price_from_url(link) if link else None
 
-        # Se não conseguiu da URL, tenta do texto
+        # Se não conseguiu da URL, usa o do texto
         if not price:
-            price = self.extract_price(block)
-
-        # Extrair área
-        area = self.extract_area(block)
+            price = text_price
 
-        # Extrair região para deduplicação
+        # Extrair região (entra nos shingles da deduplicação)
         region = self.extract_region_from_url(link)
 
         # Validar dados mínimos
         if not link or not price or not area:
             return None
 
-        # Criar hash único para deduplicação inteligente
-        # Mesmo imóvel = mesmo preço + área + região
-        dedup_key = f"{price}_{area}_{region}"
-
         return {
             "link": link,
             "price": price,
             "area": area,
             "region": region,
-            "price_per_sqm": round(price / area, 2) if area > 0 else None,
-            "_dedup_key": dedup_key  # Para deduplicação
+            "price_per_sqm": round(price / area, 2) if area > 0 else None
         }
 
-    def parse_markdown(self, min_area: float = 40, max_area: float = 45) -> List[Dict]:
+    def iter_blocks(self, data: Union[bytes, mmap.mmap]) -> Iterator[Tuple[int, int]]:
         """
-        Parseia arquivo Markdown completo.
+        Limites (início, fim) de cada bloco de anúncio, sem copiar o conteúdo.
 
-        Estratégia: Dividir em blocos por anúncio e processar cada um.
+        Cada linha com link do vivareal inicia um novo bloco; o bloco vai
+        até a linha anterior ao próximo início (sem a quebra de linha final).
         """
-        print(f"\n🔍 Parsing Markdown: {self.input_file}")
-        print(f"   Filtro área: {min_area}-{max_area} m²\n")
+        start = 0
+        pos = 0
+        while True:
+            match = LISTING_LINE_RE.search(data, pos)
+            if not match:
+                break
+
+            line_start = data.rfind(b'\n', 0, match.start()) + 1
+            if line_start > start:
+                yield start, line_start - 1
+            start = line_start
+
+            # Uma ocorrência basta por linha: continuar da próxima
+            line_end = data.find(b'\n', match.end())
+            if line_end == -1:
+                break
+            pos = line_end + 1
+
+        yield start, len(data)
+
+    def parse_block(self, data: Union[bytes, mmap.mmap], start: int, end: int) -> Optional[Dict]:
+        """
+        Parseia o bloco data[start:end] direto no buffer.
 
-        if not self.input_file.exists():
-            print(f"❌ Arquivo não encontrado: {self.input_file}")
-            return []
+        As buscas usam pos/endpos, então nenhum campo ultrapassa o bloco
+        (mesmo resultado de parse_listing_block no texto do bloco).
+        """
+        match = LINK_RE.search(data, start, end)
+        if match:
+            link = match.group(0).decode('utf-8', 'replace')
+        else:
+            match = MD_LINK_RE.search(data, start, end)
+            link = match.group(1).decode('utf-8', 'replace') if match else None
+
+        # Preço do texto só é necessário quando a URL não traz o preço
+        text_price = None
+        if not (link and self.extract_price_from_url(link)):
+            match = PRICE_RE.search(data, start, end)
+            if match:
+                try:
+                    text_price = float(match.group(1).replace(b'.', b''))
+                except ValueError:
+                    text_price = None
+
+        area = None
+        match = AREA_RE.search(data, start, end)
+        if match:
+            area = float(match.group(1).replace(b',', b'.'))
 
-        # Ler arquivo
-        with open(self.input_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Dividir por anúncios
-        # Cada anúncio geralmente começa com "- [" ou tem um padrão de link
-        # Vamos dividir em chunks maiores e processar
-
-        listings = []
-        lines = content.split('\n')
-
-        current_block = []
-
-        for line in lines:
-            # Se linha tem link do vivareal, pode ser início de novo anúncio
-            if 'vivareal.com.br/imovel' in line.lower():
-                # Processar bloco anterior se existir
-                if current_block:
-                    block_text = '\n'.join(current_block)
-                    listing = self.parse_listing_block(block_text)
-                    if listing:
-                        listings.append(listing)
-
-                # Iniciar novo bloco
-                current_block = [line]
-            else:
-                # Adicionar linha ao bloco atual
-                current_block.append(line)
-
-        # Processar último bloco
-        if current_block:
-            block_text = '\n'.join(current_block)
-            listing = self.parse_listing_block(block_text)
-            if listing:
-                listings.append(listing)
+        return self.build_listing(link, text_price, area)
 
+    def iter_listings(self, data: Union[bytes, mmap.mmap]) -> Iterator[Dict]:
+        """Extrai anúncios (sem filtro/deduplicação) em uma única passada."""
+        for start, end in self.iter_blocks(data):
+            listing = self.parse_block(data, start, end)
+            if listing:
+                yield listing
+
+    def iter_file(self, md_path: Path) -> Iterator[Dict]:
+        """Anúncios de um arquivo, lido via mmap (memória constante)."""
+        with open(md_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield from self.iter_listings(data)
+
+    def extract_listings(self, content: str) -> List[Dict]:
+        """Extrai anúncios (sem filtro/deduplicação) do conteúdo Markdown."""
+        return list(self.iter_listings(content.encode('utf-8')))
+
+    def parse_file(self, md_path: Path) -> List[Dict]:
+        """Lê um arquivo Markdown e extrai seus anúncios."""
+        return list(self.iter_file(md_path))
+
+    def finalize(self, listings: List[Dict], min_area: float, max_area: float) -> List[Dict]:
+        """Filtra por área, remove duplicatas e salva listings.json."""
         print(f"   ✅ Total extraído: {len(listings)} anúncios")
 
         # Filtrar por área
@@ -192,18 +268,18 @@ class MarkdownParser:
 
         print(f"   ✅ Após filtro ({min_area}-{max_area} m²): {len(filtered_listings)} anúncios")
 
-        # Remover duplicatas inteligentes (mesmo imóvel = preço + área + região)
+        # Remover duplicatas exatas (mesmo ID de anúncio; sem ID, mesmo link)
         unique_listings = {}
         for listing in filtered_listings:
-            dedup_key = listing.get('_dedup_key', listing['link'])
-            if dedup_key not in unique_listings:
-                unique_listings[dedup_key] = listing
+            key = listing_id_from_url(listing['link']) or listing['link']
+            if key not in unique_listings:
+                unique_listings[key] = listing
 
         final_listings = list(unique_listings.values())
 
-        # Remover campo interno de deduplicação
-        for listing in final_listings:
-            listing.pop('_dedup_key', None)
+        # Mesmo imóvel com outro anúncio (corretor, preço/área ligeiramente diferentes)
+        if self.near_dedup:
+            final_listings = dedupe_near_duplicates(final_listings, self.output_dir)
 
         print(f"   ✅ Após remover duplicatas: {len(final_listings)} anúncios")
 
@@ -216,21 +292,81 @@ class MarkdownParser:
 
         return final_listings
 
+    def parse_markdown(self, min_area: float = 40, max_area: float = 45) -> List[Dict]:
+        """Parseia arquivo Markdown completo."""
+        print(f"\n🔍 Parsing Markdown: {self.input_file}")
+        print(f"   Filtro área: {min_area}-{max_area} m²\n")
+
+        if not self.input_file.exists():
+            print(f"❌ Arquivo não encontrado: {self.input_file}")
+            return []
+
+        return self.finalize(self._parse_paths([self.input_file], workers=1), min_area, max_area)
+
+    def parse_files(self,
+                    md_files: List[Path],
+                    min_area: float = 40,
+                    max_area: float = 45,
+                    workers: Optional[int] = None) -> List[Dict]:
+        """
+        Parseia vários arquivos Markdown em paralelo (process pool).
+
+        Só arquivos novos ou alterados são parseados (manifest por hash de
+        conteúdo). Resultados são unidos na ordem dos arquivos; filtro e
+        deduplicação acontecem depois do merge.
+        """
+        print(f"\n🔍 Parsing Markdown: {len(md_files)} arquivos")
+        print(f"   Filtro área: {min_area}-{max_area} m²")
+        print(f"   Workers: {resolve_workers(workers)}\n")
+
+        if not md_files:
+            print("❌ Nenhum arquivo Markdown encontrado!")
+            return []
+
+        listings = self._parse_paths(md_files, workers)
+        return self.finalize(listings, min_area, max_area)
+
 
 def main():
     """CLI para execução standalone."""
     import argparse
 
     parser = argparse.ArgumentParser(description="Parse VivaReal Markdown file")
-    parser.add_argument("--input", default="crawl.md", help="Arquivo Markdown de entrada")
+    parser.add_argument("--input", default="crawl.md",
+                        help="Arquivo Markdown ou diretório com page_*.md")
     parser.add_argument("--output-dir", default="data/processed", help="Diretório de saída")
     parser.add_argument("--min-area", type=float, default=40, help="Área mínima (m²)")
     parser.add_argument("--max-area", type=float, default=45, help="Área máxima (m²)")
+    parser.add_argument("--workers", type=int, help="Processos de parse (padrão: um por CPU)")
+    parser.add_argument("--manifest", default="data/cache/parse_manifest_md.json",
+                        help="Manifest de parse incremental")
+    parser.add_argument("--no-manifest", action="store_true",
+                        help="Reparsear todos os arquivos, sem manifest")
+    parser.add_argument("--exact-dedup", action="store_true",
+                        help="Só remover duplicatas exatas (sem MinHash/LSH). Anúncios "
+                             "do Markdown só têm link/região/preço/área, sem título ou "
+                             "rua para confirmar a mesma unidade, então o MinHash/LSH "
+                             "só une repetições do mesmo ID e o resultado é igual")
 
     args = parser.parse_args()
 
-    md_parser = MarkdownParser(input_file=args.input, output_dir=args.output_dir)
-    listings = md_parser.parse_markdown(min_area=args.min_area, max_area=args.max_area)
+    md_parser = MarkdownParser(
+        input_file=args.input,
+        output_dir=args.output_dir,
+        manifest_path=None if args.no_manifest else args.manifest,
+        near_dedup=not args.exact_dedup
+    )
+
+    input_path = Path(args.input)
+    if input_path.is_dir():
+        listings = md_parser.parse_files(
+            sorted(input_path.glob("page_*.md")),
+            min_area=args.min_area,
+            max_area=args.max_area,
+            workers=args.workers
+        )
+    else:
+        listings = md_parser.parse_markdown(min_area=args.min_area, max_area=args.max_area)
 
     if listings:
         print(f"\n🎉 Sucesso! {len(listings)} anúncios prontos para análise")
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Tool: Scrape Cache
+Cache persistente das respostas do Firecrawl (scrape_url e batch), para
+não pagar de novo por páginas que não mudam (ex.: endereço de um anúncio).
+
+- chave: URL normalizada + formatos pedidos (ordenados)
+- validade: TTL por tipo de página (detalhe de anúncio quase não muda,
+  busca muda todo dia), limitado pelo TTL de formatos voláteis
+  (screenshot); vale o menor
+- limite de espaço: orçamento em bytes (comprimidos), com despejo LRU
+- contadores de hit/miss/expirado/despejo persistidos
+
+Layout em disco:
+    <cache_dir>/index.sqlite                 índice (chave → metadata, último acesso)
+    <cache_dir>/objects/ab/abcdef....json.gz resposta comprimida, nome = chave
+
+O índice é SQLite (e não JSON como no page_store) porque cada hit
+atualiza o último acesso usado pelo LRU.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+from firecrawl_budget import KIND_DETAIL, KIND_LISTING
+from page_store import normalize_url
+
+DAY = 24 * 3600
+
+# Página de detalhe praticamente não muda; a busca ganha e perde anúncios
+# ao longo do dia, então só evita refazer a mesma página na mesma execução
+DEFAULT_TTLS = {
+    KIND_DETAIL: 30 * DAY,
+    KIND_LISTING: 6 * 3600,
+}
+# Teto por formato, qualquer que seja a página (URL do screenshot expira)
+FORMAT_TTLS = {
+    "screenshot": 3600,
+}
+DEFAULT_TTL = 6 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+COUNTERS = ("hits", "misses", "expired", "evictions")
+
+
+class ScrapeCache:
+    """Respostas de scrape em disco, com TTL por tipo de página e LRU por bytes."""
+
+    def __init__(self,
+                 cache_dir: str = "data/cache/scrape",
+                 ttls: Optional[Dict[str, int]] = None,
+                 default_ttl: int = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: Diretório do cache
+            ttls: TTL em segundos por tipo de página (sobrescreve DEFAULT_TTLS)
+            default_ttl: TTL de tipos sem valor em `ttls`
+            max_bytes: Orçamento de disco (bytes comprimidos)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # Contadores desta execução (os totais ficam no SQLite)
+        self.session = dict.fromkeys(COUNTERS, 0)
+
+        self.db = sqlite3.connect(str(self.cache_dir / "index.sqlite"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                formats TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        self.db.commit()
+
+    @staticmethod
+    def make_key(url: str, formats: List[str]) -> str:
+        raw = normalize_url(url) + "|" + ",".join(sorted(set(formats)))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, formats: List[str], kind: str = KIND_LISTING) -> int:
+        ttl = self.ttls.get(kind, self.default_ttl)
+        return min([ttl] + [FORMAT_TTLS[f] for f in formats if f in FORMAT_TTLS])
+
+    def _valid(self, row, formats: List[str], kind: str, now: float) -> bool:
+        # Também pelo TTL atual do tipo: entradas gravadas com TTL maior
+        # (ex.: busca gravada como detalhe) não sobrevivem a ele
+        created_at, expires_at = row
+        return expires_at > now and created_at + self.ttl_for(formats, kind) > now
+
+    def _object_path(self, key: str) -> Path:
+        return self.objects_dir / key[:2] / f"{key}.json.gz"
+
+    def _count(self, name: str):
+        self.session[name] += 1
+        self.db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,)
+        )
+
+    def _delete(self, key: str):
+        self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            self._object_path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def contains(self, url: str, formats: List[str], kind: str = KIND_LISTING) -> bool:
+        """Há entrada válida (sem contar hit/miss; usado em estimativas)."""
+        with self.lock:
+            row = self.db.execute("SELECT created_at, expires_at FROM entries WHERE key = ?",
+                                  (self.make_key(url, formats),)).fetchone()
+        return bool(row) and self._valid(row, formats, kind, time.time())
+
+    def get(self, url: str, formats: List[str], kind: str = KIND_LISTING) -> Optional[Dict]:
+        """
+        Resposta em cache (campo "data" do Firecrawl) ou None.
+
+        Entradas expiradas ou com arquivo ausente/corrompido contam como miss
+        e são removidas.
+        """
+        key = self.make_key(url, formats)
+        now = time.time()
+
+        with self.lock:
+            row = self.db.execute("SELECT created_at, expires_at FROM entries WHERE key = ?",
+                                  (key,)).fetchone()
+            data = None
+
+            if row and not self._valid(row, formats, kind, now):
+                self._delete(key)
+                self._count("expired")
+            elif row:
+                try:
+                    with gzip.open(self._object_path(key), 'rb') as f:
+                        data = json.loads(f.read().decode('utf-8'))
+                except (OSError, ValueError):
+                    self._delete(key)
+
+            if data is None:
+                self._count("misses")
+            else:
+                self.db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                self._count("hits")
+
+            self.db.commit()
+            return data
+
+    def put(self, url: str, formats: List[str], data: Dict, kind: str = KIND_LISTING):
+        """Armazena a resposta e despeja as menos usadas se passar do orçamento."""
+        key = self.make_key(url, formats)
+        payload = gzip.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        if len(payload) > self.max_bytes:
+            return
+
+        object_path = self._object_path(key)
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = object_path.with_name(object_path.name + f".{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+
+        now = time.time()
+        with self.lock:
+            os.replace(tmp_path, object_path)
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, url, formats, size, created_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, ",".join(sorted(set(formats))), len(payload),
+                 now, now + self.ttl_for(formats, kind), now)
+            )
+            self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        """Remove entradas expiradas e depois as de acesso mais antigo até caber."""
+        for (key,) in self.db.execute("SELECT key FROM entries WHERE expires_at <= ?",
+                                      (time.time(),)).fetchall():
+            self._delete(key)
+            self._count("expired")
+
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self.db.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._delete(key)
+            self._count("evictions")
+            total -= size
+
+    def stats(self) -> Dict:
+        """Contadores totais e desta execução, entradas e bytes ocupados."""
+        with self.lock:
+            totals = dict(self.db.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+
+        return {
+            "session": dict(self.session),
+            "total": {name: totals.get(name, 0) for name in COUNTERS},
+            "entries": entries,
+            "bytes": size
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        session = stats["session"]
+        lookups = session["hits"] + session["misses"]
+        hit_rate = session["hits"] / lookups if lookups else 0
+        print(f"   💾 Cache de scrape: {session['hits']} hits, {session['misses']} misses "
+              f"({hit_rate:.0%}), {session['evictions']} despejos; "
+              f"{stats['entries']} entradas, {stats['bytes'] / 1024 / 1024:.1f} MB")
+
+    def clear(self):
+        with self.lock:
+            for (key,) in self.db.execute("SELECT key FROM entries").fetchall():
+                self._delete(key)
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def main():
+    """CLI para execução standalone."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cache de respostas do Firecrawl")
+    parser.add_argument("--cache-dir", default="data/cache/scrape", help="Diretório do cache")
+    parser.add_argument("--clear", action="store_true", help="Apagar todas as entradas")
+
+    args = parser.parse_args()
+
+    cache = ScrapeCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+        print("🗑️  Cache de scrape apagado")
+
+    print(json.dumps(cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
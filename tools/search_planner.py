@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Tool: Search Planner
+Divide automaticamente buscas saturadas (que atingem o limite de páginas
+do portal) em sub-buscas por faixa de área e, opcionalmente, de preço.
+
+As sub-buscas ("shards") são crawleadas em paralelo, cada uma em
+data/raw/shard_<faixa>/, e os resultados são unidos por ID de anúncio.
+"""
+
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from crawl_vivareal import VivaRealCrawler
+from listing_ids import STOP_MAX_PAGES, STOP_MIN_COUNT, STOP_NO_NEW_LISTINGS
+from page_store import PageCache
+from rate_limit import HostRateLimiter
+
+# Motivos de parada em que a busca chegou ao fim de verdade; qualquer outro
+# (erro de fetch, orçamento, exceção) deixa o shard incompleto
+NATURAL_STOPS = (STOP_NO_NEW_LISTINGS, STOP_MIN_COUNT)
+STOP_SHARD_ERROR = "shard_error"
+
+
+def shard_key(shard: Dict) -> str:
+    """Nome estável do shard, usado como sufixo do diretório."""
+    key = f"area-{shard['min_area']}-{shard['max_area']}"
+    if shard.get("min_price") is not None:
+        key += f"_preco-{shard['min_price']}-{shard['max_price']}"
+    return key
+
+
+def split_shard(shard: Dict,
+                price_range: Optional[Tuple[int, int]] = None,
+                min_price_width: int = 10000) -> List[Dict]:
+    """
+    Divide um shard saturado em dois.
+
+    Prioridade: bissecção da faixa de área (em m² inteiros); quando a
+    faixa de área tem 1 m², bissecção da faixa de preço (se configurada).
+    Retorna lista vazia se não houver como dividir mais.
+    """
+    depth = shard.get("depth", 0) + 1
+    min_area, max_area = shard["min_area"], shard["max_area"]
+
+    if max_area > min_area:
+        mid = (min_area + max_area) // 2
+        return [
+            {**shard, "min_area": min_area, "max_area": mid, "depth": depth},
+            {**shard, "min_area": mid + 1, "max_area": max_area, "depth": depth},
+        ]
+
+    if not price_range:
+        return []
+
+    min_price = shard.get("min_price")
+    max_price = shard.get("max_price")
+    if min_price is None:
+        min_price, max_price = price_range
+
+    if max_price - min_price < 2 * min_price_width:
+        return []
+
+    mid = (min_price + max_price) // 2
+    return [
+        {**shard, "min_price": min_price, "max_price": mid, "depth": depth},
+        {**shard, "min_price": mid + 1, "max_price": max_price, "depth": depth},
+    ]
+
+
+class SearchPlanner:
+    """Planeja e executa crawl particionado até cobrir buscas saturadas."""
+
+    def __init__(self,
+                 output_dir: str = "data/raw",
+                 base_url: str = "https://www.vivareal.com.br",
+                 page_cap: int = 50,
+                 max_workers: int = 4,
+                 rps: float = 1.0,
+                 price_range: Optional[Tuple[int, int]] = None,
+                 min_price_width: int = 10000,
+                 max_shards: int = 64,
+                 cache: Optional[PageCache] = None):
+        """
+        Args:
+            output_dir: Diretório base (um subdiretório por shard)
+            base_url: URL base do portal
+            page_cap: Máximo de páginas que o portal deixa paginar por busca
+            max_workers: Shards crawleados em paralelo
+            rps: Requests/s por host, compartilhado entre todos os shards
+            price_range: (mín, máx) para dividir por preço quando a área
+                         já não puder ser dividida (None = só área). Deve
+                         cobrir todo o mercado: anúncios fora da faixa não
+                         entram nos shards por preço.
+            min_price_width: Menor largura de faixa de preço aceita
+            max_shards: Limite de segurança de shards crawleados
+            cache: Cache de páginas brutas (opcional)
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url
+        self.page_cap = page_cap
+        self.max_workers = max_workers
+        self.price_range = price_range
+        self.min_price_width = min_price_width
+        self.max_shards = max_shards
+        self.cache = cache
+        # Um único limitador para que os shards paralelos respeitem o mesmo orçamento
+        self.rate_limiter = HostRateLimiter(rps, capacity=max_workers)
+
+    def _crawl_shard(self, region: str, shard: Dict) -> Dict:
+        crawler = VivaRealCrawler(
+            output_dir=str(self.output_dir / f"shard_{shard_key(shard)}"),
+            base_url=self.base_url,
+            rate_limiter=self.rate_limiter,
+            cache=self.cache
+        )
+        crawler.crawl(
+            region=region,
+            min_area=shard["min_area"],
+            max_area=shard["max_area"],
+            max_pages=self.page_cap,
+            delay=0,
+            min_price=shard.get("min_price"),
+            max_price=shard.get("max_price")
+        )
+        return crawler.last_metadata
+
+    def crawl(self, region: str, min_area: int, max_area: int) -> Dict:
+        """
+        Crawl particionado.
+
+        Cada shard que termina por `max_pages` (saturado) é dividido e os
+        filhos entram na fila. Shards que param por erro (fetch, exceção)
+        ficam marcados como incompletos e a cobertura não é completa; os
+        demais shards continuam.
+
+        Returns:
+            Metadata consolidada (também salva em crawl_metadata.json)
+        """
+        print(f"\n🧭 Crawl particionado - {region}")
+        print(f"   Área: {min_area}-{max_area} m²")
+        print(f"   Limite de páginas por busca: {self.page_cap}")
+        print(f"   Shards em paralelo: {self.max_workers}\n")
+
+        started_at = time.monotonic()
+        shards_done: List[Dict] = []
+        all_ids = set()
+        all_files: List[str] = []
+        launched = 0
+
+        root = {"min_area": min_area, "max_area": max_area, "depth": 0}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self._crawl_shard, region, root): root}
+            launched = 1
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    shard = pending.pop(future)
+                    try:
+                        metadata = future.result()
+                    except Exception as e:
+                        print(f"❌ Shard {shard_key(shard)} falhou: {e}")
+                        shards_done.append({
+                            "shard": shard_key(shard),
+                            **shard,
+                            "pages_crawled": 0,
+                            "unique_listings": 0,
+                            "new_listings": 0,
+                            "stop_reason": STOP_SHARD_ERROR,
+                            "error": str(e),
+                            "saturated": False,
+                            "split": False,
+                            "complete": False
+                        })
+                        continue
+
+                    saturated = metadata["stop_reason"] == STOP_MAX_PAGES
+                    children = []
+                    if saturated:
+                        children = split_shard(shard, self.price_range, self.min_price_width)
+                        if launched + len(children) > self.max_shards:
+                            print(f"⚠️  Limite de {self.max_shards} shards atingido")
+                            children = []
+
+                    if saturated and not children:
+                        print(f"⚠️  Shard {shard_key(shard)} saturado e indivisível: "
+                              f"pode haver anúncios não coletados")
+                    elif metadata["stop_reason"] not in NATURAL_STOPS and not saturated:
+                        print(f"⚠️  Shard {shard_key(shard)} interrompido "
+                              f"({metadata['stop_reason']}): pode haver anúncios não coletados")
+                    elif children:
+                        print(f"🔀 Shard {shard_key(shard)} saturado, dividindo em "
+                              f"{', '.join(shard_key(c) for c in children)}")
+
+                    for child in children:
+                        pending[executor.submit(self._crawl_shard, region, child)] = child
+                        launched += 1
+
+                    new_ids = set(metadata["listing_ids"]) - all_ids
+                    all_ids.update(new_ids)
+                    all_files.extend(metadata["files"])
+
+                    shards_done.append({
+                        "shard": shard_key(shard),
+                        **shard,
+                        "pages_crawled": metadata["pages_crawled"],
+                        "unique_listings": metadata["unique_listings"],
+                        "new_listings": len(new_ids),
+                        "stop_reason": metadata["stop_reason"],
+                        "saturated": saturated,
+                        "split": bool(children),
+                        "complete": bool(children) or metadata["stop_reason"] in NATURAL_STOPS
+                    })
+
+        elapsed = time.monotonic() - started_at
+        complete = all(s["complete"] for s in shards_done)
+
+        print(f"\n✅ Crawl particionado concluído!")
+        print(f"   Shards: {len(shards_done)}")
+        print(f"   Anúncios únicos: {len(all_ids)}")
+        print(f"   Cobertura completa: {'sim' if complete else 'não'}")
+        print(f"   ⏱️  {elapsed:.1f}s")
+
+        metadata = {
+            "engine": "sharded",
+            "region": region,
+            "min_area": min_area,
+            "max_area": max_area,
+            "page_cap": self.page_cap,
+            "pages_crawled": len(all_files),
+            "unique_listings": len(all_ids),
+            "complete_coverage": complete,
+            "elapsed_seconds": round(elapsed, 3),
+            "shards": sorted(shards_done, key=lambda s: (s["depth"], s["shard"])),
+            "listing_ids": sorted(all_ids),
+            "files": all_files
+        }
+
+        metadata_path = self.output_dir / "crawl_metadata.json"
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+        print(f"📋 Metadata: {metadata_path}")
+
+        return metadata
+
+
+def main():
+    """CLI para execução standalone."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crawl VivaReal particionado por faixas")
+    parser.add_argument("--region", default="freguesia-do-o", help="Região para busca")
+    parser.add_argument("--min-area", type=int, default=40, help="Área mínima (m²)")
+    parser.add_argument("--max-area", type=int, default=45, help="Área máxima (m²)")
+    parser.add_argument("--page-cap", type=int, default=50, help="Limite de páginas por busca")
+    parser.add_argument("--workers", type=int, default=4, help="Shards em paralelo")
+    parser.add_argument("--rps", type=float, default=1.0, help="Requests/s por host (total)")
+    parser.add_argument("--min-price", type=int, help="Preço mínimo para divisão por preço")
+    parser.add_argument("--max-price", type=int, help="Preço máximo para divisão por preço")
+    parser.add_argument("--max-shards", type=int, default=64, help="Limite de shards")
+    parser.add_argument("--base-url", default="https://www.vivareal.com.br", help="URL base do portal")
+    parser.add_argument("--output", default="data/raw", help="Diretório de saída")
+    parser.add_argument("--cache-dir", default="data/cache/pages", help="Cache de páginas brutas")
+    parser.add_argument("--no-cache", action="store_true", help="Desativar cache")
+
+    args = parser.parse_args()
+
+    price_range = None
+    if args.min_price is not None and args.max_price is not None:
+        price_range = (args.min_price, args.max_price)
+
+    planner = SearchPlanner(
+        output_dir=args.output,
+        base_url=args.base_url,
+        page_cap=args.page_cap,
+        max_workers=args.workers,
+        rps=args.rps,
+        price_range=price_range,
+        max_shards=args.max_shards,
+        cache=None if args.no_cache else PageCache(args.cache_dir)
+    )
+    planner.crawl(args.region, args.min_area, args.max_area)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tool: Single Flight
+Coalescência de chamadas concorrentes: enquanto uma chamada para uma
+chave está em andamento, outras threads que pedem a mesma chave esperam
+e recebem o mesmo resultado (ou a mesma exceção), sem repetir o request.
+
+Não é um cache: assim que a chamada termina, a chave é liberada.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Uma chamada em andamento por chave; as repetidas compartilham o resultado."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """Executa fn(*args, **kwargs), ou espera a execução em andamento da mesma chave."""
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()